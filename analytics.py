@@ -0,0 +1,575 @@
+"""
+Cohort analytics for the TechConnect Skills Map dashboard.
+Aggregates (crosstabs and the figures drawn from them) are computed once per
+data version and kept in a process-wide cache shared by every session.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from competency_matcher import get_versioned_evidence
+from sheets_backend import SHEET_FASE1, SHEET_FASE3, get_projection, get_catalog
+
+
+AGGREGATE_CACHE_ENTRIES = 64
+
+# Placeholder code: no Fase 1 hypothesis / dropped in Fase 3 for that category
+NONE_CODE = "(ninguna)"
+
+# Sankey: at most this many flows are drawn (largest first)
+SANKEY_MAX_LINKS = 60
+
+
+_aggregates = OrderedDict()     # (name, version, params) -> result, least recently used first
+_aggregate_locks = {}           # same keys -> Lock, so only one session builds a result
+_aggregates_guard = threading.Lock()
+
+
+def _detach(result):
+    # Shallow copies are free under copy-on-write and keep a caller's edits
+    # (including .columns = ... or .loc[...] = ...) out of the shared result
+    return result.copy(deep=False) if isinstance(result, (pd.DataFrame, pd.Series)) else result
+
+
+def _cached(key):
+    with _aggregates_guard:
+        if key in _aggregates:
+            _aggregates.move_to_end(key)
+            return True, _aggregates[key]
+    return False, None
+
+
+def cached_aggregate(name, version, params, build):
+    """
+    Result of build() for (name, data version, params), built once per process and
+    shared across sessions; the AGGREGATE_CACHE_ENTRIES most recently used are kept.
+    version must change whenever any input of build() changes.
+    DataFrames and Series come back as shallow copies that callers may modify;
+    anything else (figures, indexes, tuples of frames) is shared and read-only.
+    """
+    key = (name, version, params)
+    hit, result = _cached(key)
+    if not hit:
+        with _aggregates_guard:
+            lock = _aggregate_locks.setdefault(key, threading.Lock())
+        with lock:
+            hit, result = _cached(key)
+            if not hit:
+                result = build()
+                with _aggregates_guard:
+                    _aggregates[key] = result
+                    while len(_aggregates) > AGGREGATE_CACHE_ENTRIES:
+                        _aggregates.popitem(last=False)
+                    _aggregate_locks.pop(key, None)
+    return _detach(result)
+
+
+def _rgba(hex_color, alpha):
+    h = hex_color.lstrip("#")
+    return f"rgba({int(h[0:2], 16)}, {int(h[2:4], 16)}, {int(h[4:6], 16)}, {alpha})"
+
+
+# ============================================
+# V1 -> V2 TRANSITIONS
+# ============================================
+# Projected columns, the same for Fase 1 and Fase 3
+TRANSITION_COLUMNS = ("usuario", "grupo", "empresa_nombre", "competencia_codigo")
+
+
+def _coded(df, catalog):
+    """usuario, grupo, empresa, categoria, codigo for rows with a catalog code."""
+    if df.empty or any(c not in df.columns for c in TRANSITION_COLUMNS):
+        return pd.DataFrame(columns=["usuario", "grupo", "empresa", "categoria", "codigo"])
+    out = pd.DataFrame({
+        "usuario": df["usuario"].astype(str).str.strip().str.lower(),
+        "grupo": df["grupo"].astype(str).str.strip(),
+        "empresa": df["empresa_nombre"].astype(str).str.strip(),
+        "codigo": df["competencia_codigo"].astype(str).str.strip(),
+    })
+    out["categoria"] = out["codigo"].map(catalog.categories)
+    return out[out["categoria"].notna() & (out["empresa"] != "")].drop_duplicates()
+
+
+def transition_pairs(f1, f3, catalog):
+    """
+    One row per (usuario, empresa, categoria) revised in Fase 3: codigo_v1 -> codigo_v2.
+    A category with no code on one side gets NONE_CODE there.
+    """
+    v1, v2 = _coded(f1, catalog), _coded(f3, catalog)
+    revised = v2[["usuario", "empresa"]].drop_duplicates()
+    v1 = v1.merge(revised, on=["usuario", "empresa"])
+    pairs = v1.merge(v2, on=["usuario", "empresa", "categoria"], how="outer", suffixes=("_v1", "_v2"))
+    return pd.DataFrame({
+        "grupo": pairs["grupo_v1"].fillna(pairs["grupo_v2"]),
+        "categoria": pairs["categoria"],
+        "codigo_v1": pairs["codigo_v1"].fillna(NONE_CODE),
+        "codigo_v2": pairs["codigo_v2"].fillna(NONE_CODE),
+    })
+
+
+def _transition_inputs():
+    f1 = get_projection(SHEET_FASE1, TRANSITION_COLUMNS)
+    f3 = get_projection(SHEET_FASE3, TRANSITION_COLUMNS)
+    catalog = get_catalog()
+    return f1, f3, catalog, (f1.version, f3.version, catalog.version)
+
+
+def _pairs_of(inputs):
+    """Transition pairs for one read of the inputs (cached under that read's version)."""
+    f1, f3, catalog, version = inputs
+    return cached_aggregate(
+        "transition_pairs", version, (), lambda: transition_pairs(f1.frame, f3.frame, catalog)
+    )
+
+
+def _matrix_of(inputs, grupo):
+    def build():
+        pairs = _pairs_of(inputs)
+        if grupo:
+            pairs = pairs[pairs["grupo"] == grupo]
+        return pd.crosstab(pairs["codigo_v1"], pairs["codigo_v2"])
+
+    return cached_aggregate("transition_matrix", inputs[3], (grupo,), build)
+
+
+def get_transition_pairs():
+    return _pairs_of(_transition_inputs())
+
+
+def get_transition_matrix(grupo=None):
+    """Crosstab codigo_v1 (rows) x codigo_v2 (columns) for the cohort or one grupo."""
+    return _matrix_of(_transition_inputs(), grupo)
+
+
+def abandoned_hypotheses(matrix):
+    """Per Fase 1 code: times chosen, kept, and the most common replacement."""
+    rows = []
+    for code, row in matrix.drop(index=NONE_CODE, errors="ignore").iterrows():
+        total = int(row.sum())
+        kept = int(row.get(code, 0))
+        others = row.drop(labels=[code], errors="ignore")
+        others = others[others > 0].sort_values(ascending=False)
+        rows.append({
+            "codigo": code, "elegida": total, "mantenida": kept,
+            "abandono": round(1 - kept / total, 3) if total else 0.0,
+            "sustituida_por": others.index[0] if len(others) else "",
+            "veces": int(others.iloc[0]) if len(others) else 0,
+        })
+    out = pd.DataFrame(rows, columns=["codigo", "elegida", "mantenida", "abandono", "sustituida_por", "veces"])
+    return out.sort_values(["abandono", "elegida"], ascending=False, kind="stable").reset_index(drop=True)
+
+
+def transition_sankey(matrix, catalog):
+    """Sankey of a transition matrix: Fase 1 codes on the left, Fase 3 codes on the right."""
+    flows = matrix.stack()
+    flows = flows[flows > 0].sort_values(ascending=False).head(SANKEY_MAX_LINKS)
+    sources = sorted({s for s, _ in flows.index})
+    targets = sorted({t for _, t in flows.index})
+    labels = [f"{c} (F1)" for c in sources] + [f"{c} (F3)" for c in targets]
+    codes = sources + targets
+    hover = [catalog.descriptions.get(c, "Sin competencia en esa categoría") for c in codes]
+    src_idx = {c: i for i, c in enumerate(sources)}
+    tgt_idx = {c: len(sources) + i for i, c in enumerate(targets)}
+    kept_color = "rgba(46, 204, 113, 0.45)"
+    fig = go.Figure(go.Sankey(
+        arrangement="snap",
+        node=dict(
+            label=labels, customdata=hover, pad=12, thickness=14,
+            color=[catalog.color(c) for c in codes],
+            hovertemplate="%{label}<br>%{customdata}<extra></extra>",
+        ),
+        link=dict(
+            source=[src_idx[s] for s, _ in flows.index],
+            target=[tgt_idx[t] for _, t in flows.index],
+            value=flows.tolist(),
+            color=[kept_color if s == t else _rgba(catalog.color(s), 0.3) for s, t in flows.index],
+        ),
+    ))
+    fig.update_layout(height=max(400, 22 * max(len(sources), len(targets))), margin=dict(t=20, b=20, l=10, r=10))
+    return fig
+
+
+def get_transition_sankey(grupo=None):
+    inputs = _transition_inputs()
+    return cached_aggregate(
+        "transition_sankey", inputs[3], (grupo,),
+        lambda: transition_sankey(_matrix_of(inputs, grupo), inputs[2]),
+    )
+
+
+# ============================================
+# COMPANY x CODE HEATMAP
+# ============================================
+HEATMAP_PHASES = ("Fase 1", "Fase 3", "Demanda (Fase 2)")
+HEATMAP_NORMS = ("Recuento", "% por empresa", "% por competencia")
+HEATMAP_COLUMNS = ("empresa_nombre", "competencia_codigo")
+
+
+def _heatmap_source(phase):
+    """(version, frame with empresa_nombre and competencia_codigo, catalog) of one read for a heatmap phase."""
+    catalog = get_catalog()
+    if phase == "Demanda (Fase 2)":
+        version, evidence = get_versioned_evidence()
+        return version + (catalog.version,), evidence, catalog
+    snap = get_projection(SHEET_FASE1 if phase == "Fase 1" else SHEET_FASE3, HEATMAP_COLUMNS)
+    return (snap.version, catalog.version), snap.frame, catalog
+
+
+def company_code_crosstab(frame, catalog):
+    """Rows per empresa x codigo; companies by total (desc), codes in catalog order."""
+    if frame.empty or any(c not in frame.columns for c in HEATMAP_COLUMNS):
+        return pd.DataFrame()
+    empresa = frame["empresa_nombre"].astype(str).str.strip()
+    codigo = frame["competencia_codigo"].astype(str).str.strip()
+    keep = (empresa != "") & (empresa != "REFLEXION_GENERAL") & (codigo != "")
+    ct = pd.crosstab(empresa[keep], codigo[keep])
+    order = [c for codes in catalog.codes_by_category.values() for c in codes if c in ct.columns]
+    order += sorted(c for c in ct.columns if c not in set(order))
+    ct = ct[order]
+    return ct.loc[ct.sum(axis=1).sort_values(ascending=False, kind="stable").index]
+
+
+def _crosstab_of(source, phase):
+    version, frame, catalog = source
+    return cached_aggregate("company_code", version, (phase,), lambda: company_code_crosstab(frame, catalog))
+
+
+def get_company_code_crosstab(phase):
+    return _crosstab_of(_heatmap_source(phase), phase)
+
+
+def normalize_crosstab(ct, norm):
+    if norm == "% por empresa":
+        return (ct.div(ct.sum(axis=1).replace(0, 1), axis=0) * 100).round(1)
+    if norm == "% por competencia":
+        return (ct.div(ct.sum(axis=0).replace(0, 1), axis=1) * 100).round(1)
+    return ct
+
+
+def company_code_heatmap(ct, norm, catalog):
+    z = normalize_crosstab(ct, norm)
+    labels = [catalog.short_labels.get(c, c) for c in z.columns]
+    unit = "" if norm == "Recuento" else " %"
+    fig = go.Figure(go.Heatmap(
+        z=z.to_numpy(), x=list(z.columns), y=list(z.index),
+        customdata=[labels] * len(z.index),
+        colorscale="Blues", hoverongaps=False,
+        hovertemplate="%{y}<br>%{customdata}<br>%{z}" + unit + "<extra></extra>",
+        colorbar=dict(title=norm),
+    ))
+    fig.update_layout(
+        height=max(400, 120 + 18 * len(z.index)),
+        xaxis=dict(side="top", tickangle=-60), yaxis=dict(autorange="reversed"),
+        margin=dict(t=80, b=20, l=10, r=10),
+    )
+    return fig
+
+
+def get_company_code_heatmap(phase, norm):
+    source = _heatmap_source(phase)
+    return cached_aggregate(
+        "company_code_heatmap", source[0], (phase, norm),
+        lambda: company_code_heatmap(_crosstab_of(source, phase), norm, source[2]),
+    )
+
+
+# ============================================
+# GRUPO PROFILES
+# ============================================
+# Pseudo-grupo holding the whole cohort in the profile matrix
+COHORT = "Todos"
+PROFILE_PHASES = {"v1": "Fase 1", "v2": "Fase 3", "total": "Fase 1 + Fase 3"}
+PROFILE_VALUES = ("Media por estudiante", "% de menciones")
+
+
+def grupo_profiles(f1, f3, catalog):
+    """
+    Mentions per student of each code, by grupo and phase.
+    Index (grupo, fase) with fase in PROFILE_PHASES and grupo COHORT for everyone;
+    columns are codes in catalog order. Students per grupo are those with Fase 1 answers.
+    """
+    mentions = pd.concat([
+        _coded(f1, catalog).assign(fase="v1"),
+        _coded(f3, catalog).assign(fase="v2"),
+    ], ignore_index=True)
+    mentions = mentions[mentions["empresa"] != "REFLEXION_GENERAL"]
+    codes = [c for group in catalog.codes_by_category.values() for c in group]
+    if mentions.empty:
+        return pd.DataFrame(columns=codes, index=pd.MultiIndex.from_tuples([], names=["grupo", "fase"]))
+    counts = pd.crosstab([mentions["grupo"], mentions["fase"]], mentions["codigo"])
+    grupos = counts.index.get_level_values("grupo").unique()
+    counts = counts.reindex(pd.MultiIndex.from_product([grupos, ["v1", "v2"]], names=["grupo", "fase"]), fill_value=0)
+    total = counts.groupby(level="grupo").sum().assign(fase="total").set_index("fase", append=True)
+    counts = pd.concat([counts, total])
+    cohort = counts.groupby(level="fase").sum()
+    cohort.index = pd.MultiIndex.from_product([[COHORT], cohort.index], names=["grupo", "fase"])
+    counts = pd.concat([counts, cohort]).reindex(columns=codes, fill_value=0).sort_index()
+
+    if {"grupo", "usuario"} <= set(f1.columns):
+        users = pd.DataFrame({
+            "grupo": f1["grupo"].astype(str).str.strip(),
+            "usuario": f1["usuario"].astype(str).str.strip().str.lower(),
+        })
+    else:
+        users = pd.DataFrame(columns=["grupo", "usuario"])
+    students = users.groupby("grupo")["usuario"].nunique()
+    students[COHORT] = users["usuario"].nunique()
+    per_row = students.reindex(counts.index.get_level_values("grupo")).fillna(0).clip(lower=1).to_numpy()
+    return counts.div(per_row, axis=0)
+
+
+def _profiles_of(inputs):
+    f1, f3, catalog, version = inputs
+    return cached_aggregate("grupo_profiles", version, (), lambda: grupo_profiles(f1.frame, f3.frame, catalog))
+
+
+def get_grupo_profiles():
+    return _profiles_of(_transition_inputs())
+
+
+def grupo_profile(grupo, fase="total"):
+    """{codigo: mentions per student} for one grupo (or COHORT), {} if it has no data."""
+    profiles = get_grupo_profiles()
+    key = (str(grupo).strip(), fase)
+    return profiles.loc[key].to_dict() if key in profiles.index else {}
+
+
+def category_profiles(profiles, catalog):
+    """Share (%) of mentions per category for each (grupo, fase) row of grupo_profiles()."""
+    by_cat = profiles.T.groupby(lambda c: catalog.category(c) or "?").sum().T
+    return (by_cat.div(by_cat.sum(axis=1).replace(0, 1), axis=0) * 100).round(1)
+
+
+def get_category_profiles():
+    inputs = _transition_inputs()
+    return cached_aggregate(
+        "category_profiles", inputs[3], (), lambda: category_profiles(_profiles_of(inputs), inputs[2])
+    )
+
+
+def grupo_heatmap(profiles, fase, values):
+    z = profiles.xs(fase, level="fase")
+    z = z.loc[:, (z > 0).any()]
+    if values == "% de menciones":
+        z = (z.div(z.sum(axis=1).replace(0, 1), axis=0) * 100).round(1)
+    else:
+        z = z.round(2)
+    fig = go.Figure(go.Heatmap(
+        z=z.to_numpy(), x=list(z.columns), y=list(z.index),
+        colorscale="Greens", hoverongaps=False,
+        hovertemplate="Grupo %{y} · %{x}<br>%{z}<extra></extra>",
+        colorbar=dict(title=values),
+    ))
+    fig.update_layout(
+        height=max(300, 120 + 28 * len(z.index)),
+        xaxis=dict(side="top", tickangle=-60), yaxis=dict(autorange="reversed", type="category"),
+        margin=dict(t=80, b=20, l=10, r=10),
+    )
+    return fig
+
+
+def get_grupo_heatmap(fase, values):
+    inputs = _transition_inputs()
+    return cached_aggregate(
+        "grupo_heatmap", inputs[3], (fase, values), lambda: grupo_heatmap(_profiles_of(inputs), fase, values)
+    )
+
+
+# ============================================
+# SIMILAR STUDENTS
+# ============================================
+PEER_COLUMNS = ("usuario", "nombre", "grupo", "empresa_nombre", "competencia_codigo")
+SIMILAR_PEERS = 5       # peers shown, and whose companies are suggested
+SIMILARITY_METRICS = ("jaccard", "coseno")
+
+
+class PeerIndex:
+    """
+    One row per student: a 0/1 vector over (phase, code) columns (Fase 1 and Fase 3
+    codes are separate features) and a 0/1 vector over the companies analyzed.
+    Built once per data version; a query is one matrix-vector product.
+    """
+
+    def __init__(self, f1, f3, catalog):
+        coded = pd.concat([
+            _coded(f1, catalog).assign(feature=lambda d: "v1:" + d["codigo"]),
+            _coded(f3, catalog).assign(feature=lambda d: "v2:" + d["codigo"]),
+        ], ignore_index=True)
+        coded = coded[coded["empresa"] != "REFLEXION_GENERAL"]
+        self.users = pd.Index(sorted(coded["usuario"].unique()))
+        self.features = pd.Index(sorted(coded["feature"].unique()))
+        self.empresas = pd.Index(sorted(coded["empresa"].unique()))
+        rows = self.users.get_indexer(coded["usuario"])
+        self.vectors = np.zeros((len(self.users), len(self.features)), dtype=np.float32)
+        self.vectors[rows, self.features.get_indexer(coded["feature"])] = 1
+        self.analyzed = np.zeros((len(self.users), len(self.empresas)), dtype=np.float32)
+        self.analyzed[rows, self.empresas.get_indexer(coded["empresa"])] = 1
+        self.sizes = self.vectors.sum(axis=1)
+        self.grupos = coded.groupby("usuario")["grupo"].first().reindex(self.users).fillna("")
+        names = (
+            pd.Series(f1["nombre"].astype(str).str.strip().to_numpy(),
+                      index=f1["usuario"].astype(str).str.strip().str.lower())
+            if {"usuario", "nombre"} <= set(f1.columns) else pd.Series(dtype=str)
+        )
+        self.names = names[~names.index.duplicated()].reindex(self.users).fillna("")
+
+    def __contains__(self, usuario):
+        return str(usuario).strip().lower() in self.users
+
+    def similarities(self, usuario, metric="jaccard"):
+        """(similarity to every student, shared features); the student itself gets -1."""
+        i = self.users.get_loc(str(usuario).strip().lower())
+        shared = self.vectors @ self.vectors[i]
+        if metric == "coseno":
+            denom = np.sqrt(self.sizes * self.sizes[i])
+        else:
+            denom = self.sizes + self.sizes[i] - shared
+        sims = np.divide(shared, denom, out=np.zeros_like(shared), where=denom > 0)
+        sims[i] = -1
+        return sims, shared
+
+    def _top(self, sims, k):
+        k = min(k, len(sims))
+        top = np.argpartition(-sims, k - 1)[:k] if k else np.array([], dtype=int)
+        top = top[np.argsort(-sims[top], kind="stable")]
+        return top[sims[top] > 0]
+
+    def similar(self, usuario, k=SIMILAR_PEERS, metric="jaccard"):
+        """Most similar students: usuario, nombre, grupo, similitud, en_comun."""
+        columns = ["usuario", "nombre", "grupo", "similitud", "en_comun"]
+        if usuario not in self:
+            return pd.DataFrame(columns=columns)
+        sims, shared = self.similarities(usuario, metric)
+        top = self._top(sims, k)
+        return pd.DataFrame({
+            "usuario": self.users[top], "nombre": self.names.to_numpy()[top],
+            "grupo": self.grupos.to_numpy()[top],
+            "similitud": sims[top].round(3), "en_comun": shared[top].astype(int),
+        }, columns=columns)
+
+    def most_similar_pairs(self, limit=20, metric="jaccard"):
+        """The most similar pairs of students in the whole cohort (one matrix product)."""
+        columns = ["usuario_a", "usuario_b", "similitud", "en_comun"]
+        if len(self.users) < 2:
+            return pd.DataFrame(columns=columns)
+        shared = self.vectors @ self.vectors.T
+        if metric == "coseno":
+            denom = np.sqrt(np.outer(self.sizes, self.sizes))
+        else:
+            denom = self.sizes[:, None] + self.sizes[None, :] - shared
+        sims = np.divide(shared, denom, out=np.zeros_like(shared), where=denom > 0)
+        a, b = np.triu_indices(len(self.users), k=1)
+        flat = sims[a, b]
+        top = np.argsort(-flat, kind="stable")[:limit]
+        top = top[flat[top] > 0]
+        return pd.DataFrame({
+            "usuario_a": self.users[a[top]], "usuario_b": self.users[b[top]],
+            "similitud": flat[top].round(3), "en_comun": shared[a[top], b[top]].astype(int),
+        }, columns=columns)
+
+    def peer_companies(self, usuario, k=SIMILAR_PEERS, metric="jaccard", limit=5):
+        """Companies the most similar students analyzed and this one has not, by summed similarity."""
+        columns = ["empresa_nombre", "companeros", "puntuacion"]
+        if usuario not in self:
+            return pd.DataFrame(columns=columns)
+        sims, _ = self.similarities(usuario, metric)
+        top = self._top(sims, k)
+        i = self.users.get_loc(str(usuario).strip().lower())
+        scores = sims[top] @ self.analyzed[top]
+        peers = self.analyzed[top].sum(axis=0)
+        candidates = np.flatnonzero((scores > 0) & (self.analyzed[i] == 0))
+        out = pd.DataFrame({
+            "empresa_nombre": self.empresas[candidates], "companeros": peers[candidates].astype(int),
+            "puntuacion": scores[candidates].round(3),
+        }, columns=columns)
+        return out.sort_values(["puntuacion", "empresa_nombre"], ascending=[False, True]).head(limit).reset_index(drop=True)
+
+
+def get_peer_index():
+    f1 = get_projection(SHEET_FASE1, PEER_COLUMNS)
+    f3 = get_projection(SHEET_FASE3, TRANSITION_COLUMNS)
+    catalog = get_catalog()
+    return cached_aggregate(
+        "peer_index", (f1.version, f3.version, catalog.version), (),
+        lambda: PeerIndex(f1.frame, f3.frame, catalog),
+    )
+
+
+# ============================================
+# COMPANY RECOMMENDATIONS
+# ============================================
+RECOMMEND_WEIGHTS = {"afinidad": 0.5, "cobertura": 0.5}
+RECOMMENDED_COMPANIES = 5
+
+
+class CompanyProfiles:
+    """
+    Cohort Fase 1 profile of each company: unit-length vector of how often each
+    code was mapped to it, and how many students analyzed it. Built once per version.
+    """
+
+    def __init__(self, f1, catalog):
+        coded = _coded(f1, catalog)
+        coded = coded[coded["empresa"] != "REFLEXION_GENERAL"]
+        counts = pd.crosstab(coded["empresa"], coded["codigo"])
+        self.empresas = counts.index
+        self.codes = counts.columns
+        m = counts.to_numpy(dtype=np.float32)
+        norms = np.sqrt((m * m).sum(axis=1, keepdims=True))
+        self.profiles = np.divide(m, norms, out=np.zeros_like(m), where=norms > 0)
+        self.counts = counts
+        self.analysts = coded.groupby("empresa")["usuario"].nunique().reindex(self.empresas).fillna(0)
+
+    def recommend(self, empresas, codes, exclude=(), limit=RECOMMENDED_COMPANIES):
+        """
+        Companies to research next, best first: empresa_nombre, afinidad (cosine between
+        the student's codes and the company profile), estudiantes, cobertura (1 = nobody
+        analyzed it yet), puntuacion, en_comun (shared codes, most mapped first).
+        """
+        columns = ["empresa_nombre", "afinidad", "estudiantes", "cobertura", "puntuacion", "en_comun"]
+        excluded = {str(e).strip().lower() for e in exclude}
+        candidates = pd.Index([e for e in dict.fromkeys(str(e).strip() for e in empresas)
+                               if e and e.lower() not in excluded])
+        if candidates.empty:
+            return pd.DataFrame(columns=columns)
+        afinidad = np.zeros(len(candidates))
+        estudiantes = np.zeros(len(candidates), dtype=int)
+        most = 0
+        if not self.empresas.empty:
+            student = np.isin(self.codes, list(codes)).astype(np.float32)
+            size = np.sqrt(student.sum())
+            rows = self.empresas.get_indexer(candidates)
+            known = rows >= 0
+            if size:
+                afinidad[known] = (self.profiles @ (student / size))[rows[known]]
+            estudiantes[known] = self.analysts.to_numpy()[rows[known]]
+            most = self.analysts.max()
+        cobertura = 1 - estudiantes / most if most else np.ones(len(candidates))
+        out = pd.DataFrame({
+            "empresa_nombre": candidates, "afinidad": afinidad.round(3), "estudiantes": estudiantes.astype(int),
+            "cobertura": cobertura.round(3),
+            "puntuacion": (RECOMMEND_WEIGHTS["afinidad"] * afinidad
+                           + RECOMMEND_WEIGHTS["cobertura"] * cobertura).round(3),
+        })
+        out = out.sort_values(["puntuacion", "empresa_nombre"], ascending=[False, True]).head(limit)
+        out["en_comun"] = [self._shared(e, codes) for e in out["empresa_nombre"]]
+        return out.reset_index(drop=True)[columns]
+
+    def _shared(self, empresa, codes):
+        if empresa not in self.counts.index:
+            return []
+        row = self.counts.loc[empresa]
+        row = row[row.index.isin(list(codes)) & (row > 0)]
+        return row.sort_values(ascending=False, kind="stable").index.tolist()
+
+
+def get_company_profiles():
+    f1 = get_projection(SHEET_FASE1, TRANSITION_COLUMNS)
+    catalog = get_catalog()
+    return cached_aggregate(
+        "company_profiles", (f1.version, catalog.version), (), lambda: CompanyProfiles(f1.frame, catalog)
+    )
@@ -4,20 +4,20 @@ DIGICOM Lab · Grado en Comunicación Digital · Universidad Rey Juan Carlos
 """
 
 import base64
-import io
 import pathlib
 import streamlit as st
-from competencias import (
-    CATEGORIAS, NIVELES, CANALES_DIGITALES,
-    get_competencia_type, get_competencia_category
-)
+from analytics import COHORT, get_company_profiles, get_peer_index, grupo_profile
+from competencias import NIVELES, CANALES_DIGITALES
+from competency_matcher import demand_by_code
+from hypothesis_scoring import student_accuracy
 from sheets_backend import (
-    authenticate_student, get_empresas, save_fase1, save_fase2,
-    save_fase3_competencias, save_fase3_reflexion, get_fase1_data,
-    get_fase2_data, get_fase3_data,
-    get_competencias_flat, get_competencias_by_category
+    authenticate_student, save_fase1, save_fase2,
+    save_fase3_competencias, save_fase3_reflexion, get_stale_sheets, get_pending_writes, submit_save,
+    get_event_label, start_background_jobs
 )
+from data_context import DataContext
 from dashboard import render_dashboard
+from report import competencia_counts, generate_full_pdf
 
 
 # ============================================
@@ -41,26 +41,58 @@ def logo_html(width=200, center=True, margin_bottom="1rem"):
 
 
 # ============================================
-# HELPER: filter data for current student
+# STALE DATA BANNER (Sheets unavailable, serving disk copy)
+# ============================================
+def render_stale_banner():
+    pending = get_pending_writes()
+    if pending:
+        st.info(
+            f"Hay {pending} guardado(s) pendiente(s) de enviar a Google Sheets. "
+            "Están a salvo y se enviarán automáticamente cuando vuelva la conexión."
+        )
+    stale = get_stale_sheets()
+    if not stale:
+        return
+    oldest = min(stale.values())[:16].replace("T", " ")
+    st.warning(
+        f"No hay conexión con Google Sheets. Se muestran los datos guardados el {oldest}; "
+        "puede que no incluyan los últimos cambios."
+    )
+
+
+# ============================================
+# BACKGROUND SAVES (dispatched, then polled)
 # ============================================
-def filter_my_data(df):
-    if df is None or df.empty:
-        return df
-    user = st.session_state.student_user
-    name = st.session_state.student_name
-    if "usuario" in df.columns and user:
-        result = df[df["usuario"].astype(str).str.strip().str.lower() == user.strip().lower()]
-        if not result.empty:
-            return result
-    if "nombre" in df.columns and name:
-        result = df[df["nombre"].astype(str).str.strip().str.lower() == name.strip().lower()]
-        if not result.empty:
-            return result
-    if "estudiante" in df.columns and name:
-        result = df[df["estudiante"].astype(str).str.strip().str.lower() == name.strip().lower()]
-        if not result.empty:
-            return result
-    return df.iloc[0:0]
+def start_save(label, done_msg, save_fn, *args):
+    """Send a save to the background pool; render_save_status reports how it went."""
+    st.session_state.saves = st.session_state.saves + [(label, done_msg, submit_save(save_fn, *args))]
+
+
+@st.fragment(run_every=1)
+def _poll_saves():
+    pending = [label for label, _, fut in st.session_state.saves if not fut.done()]
+    if not pending:
+        st.rerun()  # full rerun: fresh data and the outcome messages
+    for label in pending:
+        st.info(f"Guardando {label}…")
+
+
+def render_save_status():
+    saves = st.session_state.saves
+    if not saves:
+        return
+    if not all(fut.done() for _, _, fut in saves):
+        _poll_saves()
+        return
+    for label, done_msg, fut in saves:
+        error = fut.exception()
+        if error is not None:
+            st.error(f"No se pudo guardar {label}: {error}")
+        elif fut.result():
+            st.success(done_msg)
+        else:
+            st.info(f"Sin conexión: {label} queda guardado en local y se enviará automáticamente.")
+    st.session_state.saves = []
 
 
 # ============================================
@@ -95,7 +127,7 @@ def render_phase_nav():
 # PAGE CONFIG
 # ============================================
 st.set_page_config(
-    page_title="Tech Connect 2026 — Skills Map",
+    page_title=f"{get_event_label()} — Skills Map",
     page_icon=LOGO_FILE,
     layout="wide",
     initial_sidebar_state="expanded",
@@ -168,7 +200,8 @@ st.markdown("""
 # SESSION STATE
 # ============================================
 for key, default in [("user_type", None), ("student_user", ""), ("student_name", ""),
-                      ("student_group", ""), ("current_phase", None), ("edit_empresa", None)]:
+                      ("student_group", ""), ("current_phase", None), ("edit_empresa", None),
+                      ("saves", [])]:
     if key not in st.session_state:
         st.session_state[key] = default
 
@@ -181,7 +214,7 @@ def render_login():
     st.markdown(f"""
     <div class="login-hero">
         {logo_tag}
-        <h1>TECH CONNECT 2026</h1>
+        <h1>{get_event_label().upper()}</h1>
         <p>Skills Map — Networking profesional y análisis de competencias</p>
     </div>
     """, unsafe_allow_html=True)
@@ -249,13 +282,13 @@ def render_student_nav():
 # ============================================
 # MY RESPONSES (with edit buttons)
 # ============================================
-def render_my_responses():
+def render_my_responses(ctx):
     st.title("Mis respuestas guardadas")
-    all_comps = get_competencias_flat()
+    all_comps = ctx.catalog().descriptions
     tab_f1, tab_f2, tab_f3 = st.tabs(["Fase 1", "Fase 2", "Fase 3"])
 
     with tab_f1:
-        my_f1 = filter_my_data(get_fase1_data())
+        my_f1 = ctx.my_fase1
         if my_f1 is not None and not my_f1.empty and "empresa_nombre" in my_f1.columns:
             for emp in my_f1["empresa_nombre"].unique():
                 col_t, col_b = st.columns([4, 1])
@@ -284,7 +317,7 @@ def render_my_responses():
             st.info("Aún no has guardado nada en la Fase 1.")
 
     with tab_f2:
-        my_f2 = filter_my_data(get_fase2_data())
+        my_f2 = ctx.my_fase2
         if my_f2 is not None and not my_f2.empty:
             for idx_f2, (_, row) in enumerate(my_f2.iterrows()):
                 emp = row.get("empresa_nombre", "")
@@ -308,7 +341,7 @@ def render_my_responses():
             st.info("Aún no has guardado nada en la Fase 2.")
 
     with tab_f3:
-        my_f3 = filter_my_data(get_fase3_data())
+        my_f3 = ctx.my_fase3
         if my_f3 is not None and not my_f3.empty and "empresa_nombre" in my_f3.columns:
             comp_rows = my_f3[my_f3["empresa_nombre"] != "REFLEXION_GENERAL"]
             if not comp_rows.empty:
@@ -341,7 +374,35 @@ def render_my_responses():
 # ============================================
 # FASE 1
 # ============================================
-def render_fase1():
+def render_company_recommendations(ctx, empresa_options):
+    """Companies to research next: close to the student's competencias and analyzed by few classmates."""
+    my_f1 = ctx.my_fase1
+    codes, done = set(), set()
+    if my_f1 is not None and not my_f1.empty and "empresa_nombre" in my_f1.columns:
+        done = set(my_f1["empresa_nombre"].astype(str))
+        if "competencia_codigo" in my_f1.columns:
+            codes = set(my_f1["competencia_codigo"].astype(str)) - {""}
+    recommended = get_company_profiles().recommend(empresa_options, codes, exclude=done)
+    if recommended.empty:
+        return
+    with st.expander("Empresas recomendadas para investigar", expanded=not done):
+        st.caption("Se priorizan las empresas que menos compañeros han analizado y, si ya has elegido "
+                   "competencias, las que encajan con ellas.")
+        for i, r in enumerate(recommended.itertuples()):
+            col_t, col_b = st.columns([4, 1])
+            with col_t:
+                reason = f"{r.estudiantes} compañero/s la han analizado"
+                if r.en_comun:
+                    reason += f" · competencias en común: {', '.join(r.en_comun[:3])}"
+                st.markdown(f"**{r.empresa_nombre}**")
+                st.caption(reason)
+            with col_b:
+                if st.button("Analizar", key=f"f1_recommend_{i}", use_container_width=True):
+                    st.session_state.edit_empresa = r.empresa_nombre
+                    st.rerun()
+
+
+def render_fase1(ctx):
     render_phase_nav()
     st.markdown('<span class="phase-tag phase-pre">Fase 1 · Pre-evento</span>', unsafe_allow_html=True)
     st.title("Análisis de empresas y mapeo de competencias")
@@ -350,8 +411,8 @@ def render_fase1():
         "qué presencia digital tienen y qué competencias del Grado serían relevantes para trabajar con ellas."
     )
 
-    # Saved summary with edit buttons (fresh read)
-    my_f1 = filter_my_data(get_fase1_data())
+    # Saved summary with edit buttons
+    my_f1 = ctx.my_fase1
     if my_f1 is not None and not my_f1.empty and "empresa_nombre" in my_f1.columns:
         saved_empresas = my_f1["empresa_nombre"].unique().tolist()
         if saved_empresas:
@@ -368,8 +429,8 @@ def render_fase1():
 
     st.divider()
 
-    empresas = get_empresas()
-    empresa_options = [e["nombre"] for e in empresas] if empresas else []
+    empresa_options = ctx.empresa_nombres()
+    render_company_recommendations(ctx, empresa_options)
 
     if not empresa_options:
         st.warning("Aún no hay empresas cargadas.")
@@ -389,6 +450,7 @@ def render_fase1():
     st.subheader(f"Análisis de: {empresa_nombre}")
 
     # Load previous data for pre-population
+    catalog = ctx.catalog()
     prev_act, prev_pres, prev_canales, prev_perf = "", "", [], ""
     prev_comps_by_cat = {}
     if my_f1 is not None and not my_f1.empty and "empresa_nombre" in my_f1.columns:
@@ -408,7 +470,7 @@ def render_fase1():
             if "competencia_codigo" in emp_prev.columns:
                 for _, row in emp_prev.iterrows():
                     code = str(row.get("competencia_codigo", ""))
-                    ck = get_competencia_category(code)
+                    ck = catalog.category(code)
                     if ck:
                         prev_comps_by_cat[ck] = {
                             "codigo": code,
@@ -432,27 +494,16 @@ def render_fase1():
         st.markdown("### Mapeo de competencias v1 (tu hipótesis)")
         st.markdown("Selecciona la competencia **más relevante** de cada categoría y justifica tu elección.")
 
-        all_comps = get_competencias_flat()
-        comps_by_cat = get_competencias_by_category()
-
         comp_details = []
-        for cat_key, cat in comps_by_cat.items():
+        for cat_key, cat in catalog.by_category.items():
             st.markdown(f"**{cat['label']}**")
-            opts = list(cat["items"].keys())
+            opts = list(catalog.codes_by_category[cat_key])
             prev = prev_comps_by_cat.get(cat_key)
             didx = (opts.index(prev["codigo"]) + 1) if prev and prev["codigo"] in opts else 0
 
             # Short labels for dropdown: "C19 — Web y apps interactivas"
-            def _short_label(code, c=cat):
-                if code == "(Ninguna)":
-                    return "(Ninguna)"
-                desc = c["items"].get(code, "")
-                # Truncate at ~45 chars for dropdown readability
-                short = desc if len(desc) <= 50 else desc[:47] + "…"
-                return f"{code} — {short}"
-
             selected = st.selectbox("Selecciona la más relevante:", ["(Ninguna)"] + opts, index=didx,
-                format_func=_short_label,
+                format_func=catalog.label,
                 key=f"comp_{empresa_id}_{cat_key}")
             if selected != "(Ninguna)":
                 # Show full description below the selectbox
@@ -466,7 +517,7 @@ def render_fase1():
                                            key=f"just_{empresa_id}_{selected}")
                 with c2:
                     nivel = st.selectbox("Nivel", NIVELES, index=pn, key=f"nivel_{empresa_id}_{selected}")
-                comp_details.append({"codigo": selected, "tipo": get_competencia_type(selected),
+                comp_details.append({"codigo": selected, "tipo": catalog.tipo(selected),
                                      "justificacion": justif, "nivel": nivel})
 
         if st.form_submit_button("Guardar análisis", type="primary", use_container_width=True):
@@ -478,30 +529,26 @@ def render_fase1():
                 analisis = {"actividad_principal": actividad,
                             "presencia_digital": f"Canales: {', '.join(canales)}. {presencia_notas}",
                             "perfiles_necesitan": perfiles}
-                try:
-                    save_fase1(st.session_state.student_user, st.session_state.student_name,
-                               st.session_state.student_group, empresa_id, empresa_nombre, analisis, comp_details)
-                    st.success(f"Análisis de {empresa_nombre} guardado.")
-                    get_fase1_data.clear()
-                    st.rerun()
-                except Exception as e:
-                    st.error(f"Error al guardar: {e}")
+                start_save(f"el análisis de {empresa_nombre}", f"Análisis de {empresa_nombre} guardado.",
+                           save_fase1, st.session_state.student_user, st.session_state.student_name,
+                           st.session_state.student_group, empresa_id, empresa_nombre, analisis, comp_details)
+                st.rerun()
 
 
 # ============================================
 # FASE 2
 # ============================================
-def render_fase2():
+def render_fase2(ctx):
     render_phase_nav()
     st.markdown('<span class="phase-tag phase-live">Fase 2 · Durante el evento</span>', unsafe_allow_html=True)
     st.title("Registro durante el evento")
 
-    my_f1 = filter_my_data(get_fase1_data())
+    my_f1 = ctx.my_fase1
     if my_f1 is None or my_f1.empty:
         st.warning("Aún no has completado la **Fase 1**. Te recomendamos investigar las empresas antes.")
 
     # Saved conversations with edit buttons
-    my_f2 = filter_my_data(get_fase2_data())
+    my_f2 = ctx.my_fase2
     if my_f2 is not None and not my_f2.empty:
         n = len(my_f2)
         with st.expander(f"Ya has registrado {n} conversación(es) — ver / editar"):
@@ -545,8 +592,7 @@ def render_fase2():
     st.divider()
     st.subheader("Registrar o editar una conversación")
 
-    empresas = get_empresas()
-    empresa_options = [e["nombre"] for e in empresas] if empresas else []
+    empresa_options = ctx.empresa_nombres()
 
     # Empresa selection (outside form for pre-population)
     if empresa_options:
@@ -601,28 +647,24 @@ def render_fase2():
                             "habilidades_tecnicas": hab_tec, "competencias_blandas": hab_bla,
                             "gap_universidad": gap, "oportunidades_practicas": "",
                             "consejo": consejo, "sorpresa": "", "elevator_pitch_usado": ""}
-                try:
-                    save_fase2(st.session_state.student_user, st.session_state.student_name,
-                               st.session_state.student_group, registro)
-                    st.success(f"Registro de {empresa_nombre} guardado.")
-                    get_fase2_data.clear()
-                    st.rerun()
-                except Exception as e:
-                    st.error(f"Error: {e}")
+                start_save(f"el registro de {empresa_nombre}", f"Registro de {empresa_nombre} guardado.",
+                           save_fase2, st.session_state.student_user, st.session_state.student_name,
+                           st.session_state.student_group, registro)
+                st.rerun()
 
 
 # ============================================
 # FASE 3
 # ============================================
-def render_fase3():
+def render_fase3(ctx):
     render_phase_nav()
     st.markdown('<span class="phase-tag phase-post">Fase 3 · Post-evento</span>', unsafe_allow_html=True)
     st.title("Mapa de competencias revisado y reflexión")
 
-    my_f1_check = filter_my_data(get_fase1_data())
-    my_f2_check = filter_my_data(get_fase2_data())
-    f1_done = my_f1_check is not None and not my_f1_check.empty
-    f2_done = my_f2_check is not None and not my_f2_check.empty
+    my_f1 = ctx.my_fase1
+    my_f2 = ctx.my_fase2
+    f1_done = my_f1 is not None and not my_f1.empty
+    f2_done = my_f2 is not None and not my_f2.empty
     if not f1_done and not f2_done:
         st.warning("No has completado la Fase 1 ni la Fase 2. Te recomendamos completarlas primero.")
     elif not f1_done:
@@ -632,9 +674,8 @@ def render_fase3():
 
     st.markdown("Revisa tu análisis inicial. ¿Se confirmaron tus hipótesis? ¿Descubriste algo nuevo?")
 
-    all_comps = get_competencias_flat()
-    my_f1 = filter_my_data(get_fase1_data())
-    my_f2 = filter_my_data(get_fase2_data())
+    catalog = ctx.catalog()
+    all_comps = catalog.descriptions
 
     if my_f1 is not None and not my_f1.empty:
         with st.expander("Consultar tu análisis de Fase 1"):
@@ -663,13 +704,12 @@ def render_fase3():
     with tab_comp:
         st.subheader("Mapa de competencias revisado")
         emp_analyzed = my_f1["empresa_nombre"].unique().tolist() if my_f1 is not None and not my_f1.empty and "empresa_nombre" in my_f1.columns else []
-        emp_all = [e["nombre"] for e in get_empresas()] if get_empresas() else []
+        emp_all = ctx.empresa_nombres()
         all_opts = list(set(emp_analyzed + emp_all))
 
         empresa = st.selectbox("Selecciona la empresa:", all_opts) if all_opts else st.text_input("Empresa:")
 
         if empresa:
-            comps_by_cat = get_competencias_by_category()
             CAMBIOS = ["Confirmada", "Cambiada", "Nivel ajustado"]
             v1_by_cat = {}
             if my_f1 is not None and not my_f1.empty and "empresa_nombre" in my_f1.columns:
@@ -677,7 +717,7 @@ def render_fase3():
                 if not v1_data.empty and "competencia_codigo" in v1_data.columns:
                     for _, row in v1_data.iterrows():
                         code = str(row.get("competencia_codigo", ""))
-                        ck = get_competencia_category(code)
+                        ck = catalog.category(code)
                         if ck:
                             v1_by_cat[ck] = {"codigo": code, "nivel": row.get("competencia_nivel", ""),
                                              "justificacion": row.get("competencia_justificacion", "")}
@@ -689,23 +729,16 @@ def render_fase3():
 
             with st.form(f"fase3_comp_{empresa}"):
                 comp_v2 = []
-                for cat_key, cat in comps_by_cat.items():
+                for cat_key, cat in catalog.by_category.items():
                     st.markdown(f"**{cat['label']}**")
-                    opts = list(cat["items"].keys())
+                    opts = list(catalog.codes_by_category[cat_key])
                     v1 = v1_by_cat.get(cat_key)
                     didx = (opts.index(v1["codigo"]) + 1) if v1 and v1["codigo"] in opts else 0
                     if v1 and v1["codigo"] in opts:
                         st.caption(f"Fase 1: **{v1['codigo']}** ({v1['nivel']})")
 
-                    def _short_f3(code, c=cat):
-                        if code == "(Ninguna)":
-                            return "(Ninguna)"
-                        desc = c["items"].get(code, "")
-                        short = desc if len(desc) <= 50 else desc[:47] + "…"
-                        return f"{code} — {short}"
-
                     selected = st.selectbox("Competencia más relevante:", ["(Ninguna)"] + opts, index=didx,
-                        format_func=_short_f3,
+                        format_func=catalog.label,
                         key=f"f3sel_{empresa}_{cat_key}")
                     if selected != "(Ninguna)":
                         full_desc = cat["items"].get(selected, "")
@@ -720,25 +753,21 @@ def render_fase3():
                             niv = st.selectbox("Nivel", NIVELES, index=ni, key=f"f3n_{empresa}_{selected}")
                         with c3:
                             cambio = st.selectbox("¿Cambió?", CAMBIOS, index=dc, key=f"f3c_{empresa}_{selected}")
-                        comp_v2.append({"codigo": selected, "tipo": get_competencia_type(selected),
+                        comp_v2.append({"codigo": selected, "tipo": catalog.tipo(selected),
                                         "justificacion_v2": just, "nivel_v2": niv, "cambio_vs_v1": cambio})
                 if st.form_submit_button("Guardar competencias v2", type="primary", use_container_width=True):
                     if comp_v2:
-                        try:
-                            save_fase3_competencias(st.session_state.student_user, st.session_state.student_name,
-                                                    st.session_state.student_group, empresa, comp_v2)
-                            st.success("Competencias v2 guardadas.")
-                            get_fase3_data.clear()
-                            st.rerun()
-                        except Exception as e:
-                            st.error(f"Error: {e}")
+                        start_save(f"las competencias v2 de {empresa}", "Competencias v2 guardadas.",
+                                   save_fase3_competencias, st.session_state.student_user,
+                                   st.session_state.student_name, st.session_state.student_group, empresa, comp_v2)
+                        st.rerun()
                     else:
                         st.warning("Selecciona al menos una competencia.")
 
     with tab_ref:
         st.subheader("Reflexión final")
         prev_ref = {}
-        my_f3_ref = filter_my_data(get_fase3_data())
+        my_f3_ref = ctx.my_fase3
         if my_f3_ref is not None and not my_f3_ref.empty and "empresa_nombre" in my_f3_ref.columns:
             rr = my_f3_ref[my_f3_ref["empresa_nombre"] == "REFLEXION_GENERAL"]
             if not rr.empty:
@@ -765,59 +794,40 @@ def render_fase3():
                 reflexion = {"competencias_mas_demandadas": comp_dem, "competencias_sorpresa": "",
                              "gap_uni_empresa": gap_text, "posicionamiento_personal": posic,
                              "plan_accion": accion, "valoracion_experiencia": valor}
-                try:
-                    save_fase3_reflexion(st.session_state.student_user, st.session_state.student_name,
-                                        st.session_state.student_group, reflexion)
-                    st.success("Reflexión guardada.")
-                    get_fase3_data.clear()
-                    st.rerun()
-                except Exception as e:
-                    st.error(f"Error: {e}")
+                start_save("la reflexión final", "Reflexión guardada.",
+                           save_fase3_reflexion, st.session_state.student_user, st.session_state.student_name,
+                           st.session_state.student_group, reflexion)
+                st.rerun()
 
 
 # ============================================
 # MY CHART — competencia visualization
 # ============================================
-def render_my_chart():
+def render_my_chart(ctx):
     render_phase_nav()
     st.title("Mi mapa de competencias")
     st.markdown("Comparativa de las competencias que seleccionaste antes y después del evento.")
 
-    all_comps = get_competencias_flat()
-    comps_by_cat = get_competencias_by_category()
-    my_f1 = filter_my_data(get_fase1_data())
-    my_f2 = filter_my_data(get_fase2_data())
-    my_f3 = filter_my_data(get_fase3_data())
+    catalog = ctx.catalog()
+    all_comps = catalog.descriptions
+    my_f1 = ctx.my_fase1
+    my_f2 = ctx.my_fase2
+    my_f3 = ctx.my_fase3
 
     # Gather competencia data
-    comp_data = {}
-    if my_f1 is not None and not my_f1.empty and "competencia_codigo" in my_f1.columns:
-        for _, row in my_f1.iterrows():
-            code = str(row.get("competencia_codigo", ""))
-            if code and code in all_comps:
-                if code not in comp_data:
-                    comp_data[code] = {"v1": 0, "v2": 0, "empresas_v1": [], "empresas_v2": []}
-                comp_data[code]["v1"] += 1
-                emp = row.get("empresa_nombre", "")
-                if emp:
-                    comp_data[code]["empresas_v1"].append(emp)
-
-    if my_f3 is not None and not my_f3.empty and "competencia_codigo" in my_f3.columns:
-        f3_comps = my_f3[my_f3["empresa_nombre"] != "REFLEXION_GENERAL"] if "empresa_nombre" in my_f3.columns else my_f3
-        for _, row in f3_comps.iterrows():
-            code = str(row.get("competencia_codigo", ""))
-            if code and code in all_comps:
-                if code not in comp_data:
-                    comp_data[code] = {"v1": 0, "v2": 0, "empresas_v1": [], "empresas_v2": []}
-                comp_data[code]["v2"] += 1
-                emp = row.get("empresa_nombre", "")
-                if emp:
-                    comp_data[code]["empresas_v2"].append(emp)
+    comp_data = competencia_counts(catalog, my_f1, my_f3)
 
     if not comp_data:
         st.info("Aún no has seleccionado competencias. Completa la Fase 1 para ver tu mapa.")
         return
 
+    # Demand seen in the cohort's Fase 2 notes for the companies this student worked on
+    my_empresas = {
+        str(e).strip() for df in (my_f1, my_f2, my_f3)
+        if df is not None and "empresa_nombre" in df.columns for e in df["empresa_nombre"]
+    } - {"", "REFLEXION_GENERAL"}
+    demand = demand_by_code(my_empresas) if my_empresas else {}
+
     # ---- RADAR CHART with group average ----
     import plotly.graph_objects as go
 
@@ -826,25 +836,11 @@ def render_my_chart():
     v1_values = [comp_data[c]["v1"] for c in codes]
     v2_values = [comp_data[c]["v2"] for c in codes]
 
-    # Calculate group average for the same competencias
-    avg_values = []
-    all_f1 = get_fase1_data()  # ALL students
-    all_f3 = get_fase3_data()
-    if all_f1 is not None and not all_f1.empty and "competencia_codigo" in all_f1.columns:
-        # Count unique users
-        user_col = "usuario" if "usuario" in all_f1.columns else "estudiante"
-        n_users = all_f1[user_col].nunique() if user_col in all_f1.columns else 1
-        n_users = max(n_users, 1)
-        for code in codes:
-            # Count how many times this competencia was selected across ALL students (f1+f3)
-            count_f1 = len(all_f1[all_f1["competencia_codigo"].astype(str) == code]) if "competencia_codigo" in all_f1.columns else 0
-            count_f3 = 0
-            if all_f3 is not None and not all_f3.empty and "competencia_codigo" in all_f3.columns:
-                f3_comp = all_f3[all_f3["empresa_nombre"] != "REFLEXION_GENERAL"] if "empresa_nombre" in all_f3.columns else all_f3
-                count_f3 = len(f3_comp[f3_comp["competencia_codigo"].astype(str) == code])
-            avg_values.append(round((count_f1 + count_f3) / n_users, 1))
-    else:
-        avg_values = [0] * len(codes)
+    # Cohort and own-grupo averages (mentions per student), from the per-version profile matrix
+    cohort_profile = grupo_profile(COHORT)
+    group_profile = grupo_profile(st.session_state.get("student_group", ""))
+    avg_values = [round(cohort_profile.get(c, 0), 1) for c in codes]
+    group_values = [round(group_profile.get(c, 0), 1) for c in codes]
 
     fig = go.Figure()
     fig.add_trace(go.Scatterpolar(
@@ -860,22 +856,29 @@ def render_my_chart():
     if any(v > 0 for v in avg_values):
         fig.add_trace(go.Scatterpolar(
             r=avg_values + [avg_values[0]], theta=labels + [labels[0]],
-            fill="toself", name="Media del grupo",
+            fill="toself", name="Media de todos",
             fillcolor="rgba(46,204,113,0.08)", line=dict(color="#2ecc71", width=2, dash="dot")
         ))
-    max_val = max(max(v1_values, default=1), max(v2_values, default=1), max(avg_values, default=1))
+    if any(v > 0 for v in group_values):
+        fig.add_trace(go.Scatterpolar(
+            r=group_values + [group_values[0]], theta=labels + [labels[0]],
+            fill="toself", name="Media de tu grupo",
+            fillcolor="rgba(243,156,18,0.08)", line=dict(color="#f39c12", width=2, dash="dash")
+        ))
+    max_val = max(max(v1_values, default=1), max(v2_values, default=1),
+                  max(avg_values, default=1), max(group_values, default=1))
     fig.update_layout(
         polar=dict(radialaxis=dict(visible=True, range=[0, max_val + 1])),
         showlegend=True, legend=dict(orientation="h", y=-0.1),
-        title="Tus competencias vs media del grupo",
+        title="Tus competencias vs la media",
         height=550, margin=dict(t=60, b=60, l=80, r=80)
     )
     st.plotly_chart(fig, use_container_width=True)
 
     # Detail table
     st.markdown("### Detalle por competencia")
-    for cat_key, cat in comps_by_cat.items():
-        cat_codes = [c for c in comp_data if c.startswith(cat_key)]
+    for cat_key, cat in catalog.by_category.items():
+        cat_codes = [c for c in comp_data if catalog.category(c) == cat_key]
         if cat_codes:
             st.markdown(f"**{cat['label']}**")
             for code in cat_codes:
@@ -883,16 +886,41 @@ def render_my_chart():
                 desc = all_comps.get(code, "")
                 emps = list(set(d["empresas_v1"] + d["empresas_v2"]))
                 st.markdown(f"- **{code}** — {desc}")
-                st.caption(f"  Fase 1: {d['v1']}x · Fase 3: {d['v2']}x · Empresas: {', '.join(emps)}")
+                st.caption(f"  Fase 1: {d['v1']}x · Fase 3: {d['v2']}x · Demanda (Fase 2): {demand.get(code, 0)}x"
+                           f" · Empresas: {', '.join(emps)}")
             st.divider()
 
+    missed = sorted((c for c in demand if c not in comp_data and c in all_comps), key=lambda c: -demand[c])
+    if missed:
+        st.markdown("### Lo que pidieron tus empresas y no seleccionaste")
+        st.caption("Según las notas de las conversaciones de todo el grupo con tus empresas (asignación automática).")
+        for code in missed[:5]:
+            st.markdown(f"- **{code}** — {all_comps[code]} ({demand[code]} conversación/es)")
+
+    peers = get_peer_index()
+    similar = peers.similar(st.session_state.student_user)
+    if not similar.empty:
+        st.markdown("### Compañeros con un mapa parecido al tuyo")
+        st.caption("Según las competencias elegidas en Fase 1 y Fase 3 (coincidencia de Jaccard).")
+        for p in similar.itertuples():
+            st.markdown(f"- **{p.nombre or p.usuario}** (grupo {p.grupo}) — {round(p.similitud * 100)} % de coincidencia, "
+                        f"{p.en_comun} competencia/s en común")
+        companies = peers.peer_companies(st.session_state.student_user)
+        if not companies.empty:
+            st.markdown("**Empresas que analizaron y tú no**")
+            for c in companies.itertuples():
+                st.markdown(f"- {c.empresa_nombre} ({c.companeros} de ellos)")
+
     # PDF download
     st.markdown("### Descargar informe completo en PDF")
     st.markdown("Incluye: análisis de empresas, conversaciones, competencias, reflexión y resumen comparativo.")
 
     if st.button("Generar y descargar PDF", type="primary", use_container_width=True):
         try:
-            pdf_bytes = generate_full_pdf(all_comps, comp_data, comps_by_cat, my_f1, my_f2, my_f3)
+            student = {"usuario": st.session_state.student_user, "nombre": st.session_state.student_name,
+                       "grupo": st.session_state.student_group}
+            pdf_bytes = generate_full_pdf(catalog, comp_data, my_f1, my_f2, my_f3, student,
+                                          student_accuracy(student["usuario"]))
             st.download_button(
                 label="Descargar PDF",
                 data=pdf_bytes,
@@ -905,413 +933,15 @@ def render_my_chart():
 
 
 # ============================================
-# PDF GENERATION — Full report, DIGICOM Lab style
+# STUDENT HOME
 # ============================================
-DARK_BLUE = (26, 26, 46)
-ACCENT_RED = (231, 76, 60)
-MEDIUM_BLUE = (44, 44, 84)
-LIGHT_BG = (248, 249, 250)
-WHITE = (255, 255, 255)
-
-
-class SkillsMapPDF:
-    def __init__(self):
-        from fpdf import FPDF
-
-        logo_dir = pathlib.Path(__file__).parent
-
-        # Find URJC logo - search in multiple possible locations
-        def _find_logo(name):
-            candidates = [
-                logo_dir / name,
-                pathlib.Path(name),
-                pathlib.Path(".") / name,
-                pathlib.Path("/mount/src") / name,
-            ]
-            # Also search common Streamlit Cloud paths
-            import glob
-            found = glob.glob(f"/mount/src/**/{name}", recursive=True)
-            candidates.extend([pathlib.Path(f) for f in found])
-            for p in candidates:
-                if p.exists() and p.stat().st_size > 100:
-                    return p
-            return None
-        _font = ["Helvetica"]  # mutable default, updated after font registration
-
-        # Pre-process URJC logo for header (resize if too large, ensure compatibility)
-        _urjc_path = None
-        urjc_src = _find_logo("logo-urjc.png")
-        if urjc_src:
-            try:
-                from PIL import Image
-                import tempfile
-                im = Image.open(str(urjc_src))
-                # Resize if very large (fpdf2 can struggle with huge images at small display size)
-                if im.width > 500:
-                    ratio = 500 / im.width
-                    im = im.resize((500, int(im.height * ratio)), Image.LANCZOS)
-                # Ensure RGBA for transparency support
-                im = im.convert("RGBA")
-                tmp = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
-                im.save(tmp.name, "PNG")
-                tmp.close()
-                _urjc_path = tmp.name
-            except Exception:
-                _urjc_path = str(urjc_src)  # fallback to original
-
-        class PDF(FPDF):
-            def header(self):
-                self.set_fill_color(*DARK_BLUE)
-                self.rect(0, 0, 210, 22, "F")
-                if _urjc_path:
-                    try:
-                        self.image(_urjc_path, 10, 3, 18)
-                    except Exception:
-                        pass
-                digicom = _find_logo("logo-DIGICOM-Lab-negativo-H.png")
-                if digicom:
-                    try:
-                        self.image(str(digicom), 150, 3, 50)
-                    except Exception:
-                        pass
-                self.set_y(5)
-                self.set_font(_font[0], "B", 10)
-                self.set_text_color(*WHITE)
-                self.cell(0, 5, "TECH CONNECT 2026 — Skills Map", align="C", ln=True)
-                self.set_font(_font[0], "", 7)
-                self.cell(0, 4, "DIGICOM Lab · Grado en Comunicación Digital · URJC", align="C", ln=True)
-                self.set_y(26)
-                self.set_text_color(0, 0, 0)
-
-            def footer(self):
-                self.set_y(-15)
-                self.set_draw_color(*DARK_BLUE)
-                self.line(10, self.get_y(), 200, self.get_y())
-                self.ln(2)
-                self.set_font(_font[0], "", 6.5)
-                self.set_text_color(120, 120, 120)
-                self.cell(0, 4,
-                    "2026 – Grado en Comunicación Digital (URJC) | Diseño y desarrollo: Grupo Ciberimaginario",
-                    align="C", ln=True)
-                self.set_font(_font[0], "", 6)
-                self.cell(0, 4, f"Página {self.page_no()}/{{nb}}", align="C")
-
-        self.pdf = PDF()
-        # Register Unicode font — look in app dir first, then system
-        try:
-            app_dir = pathlib.Path(__file__).parent
-            font_paths = {
-                "": None, "B": None, "I": None, "BI": None
-            }
-            font_files = {
-                "": "DejaVuSans.ttf", "B": "DejaVuSans-Bold.ttf",
-                "I": "DejaVuSans-Oblique.ttf", "BI": "DejaVuSans-BoldOblique.ttf"
-            }
-            for style, filename in font_files.items():
-                local = app_dir / filename
-                system = pathlib.Path(f"/usr/share/fonts/truetype/dejavu/{filename}")
-                if local.exists() and local.stat().st_size > 100:
-                    font_paths[style] = str(local)
-                elif system.exists() and system.stat().st_size > 100:
-                    font_paths[style] = str(system)
-
-            if font_paths[""]:
-                for style, path in font_paths.items():
-                    if path:
-                        self.pdf.add_font("DejaVu", style, path)
-                _font[0] = "DejaVu"
-                self.F = "DejaVu"
-            else:
-                self.F = "Helvetica"
-        except Exception:
-            self.F = "Helvetica"
-        self.pdf.alias_nb_pages()
-        self.pdf.set_auto_page_break(auto=True, margin=20)
-
-    def add_cover(self, name, user, group):
-        self.pdf.add_page()
-        self.pdf.ln(20)
-        self.pdf.set_font(self.F, "B", 28)
-        self.pdf.set_text_color(*DARK_BLUE)
-        self.pdf.cell(0, 15, "Skills Map", ln=True, align="C")
-        self.pdf.set_font(self.F, "", 14)
-        self.pdf.set_text_color(*MEDIUM_BLUE)
-        self.pdf.cell(0, 8, "Informe personal de competencias", ln=True, align="C")
-        self.pdf.ln(15)
-        self.pdf.set_fill_color(*LIGHT_BG)
-        self.pdf.set_draw_color(*DARK_BLUE)
-        x = 50
-        self.pdf.rect(x, self.pdf.get_y(), 110, 30, "FD")
-        self.pdf.set_xy(x + 5, self.pdf.get_y() + 5)
-        self.pdf.set_font(self.F, "B", 14)
-        self.pdf.set_text_color(*DARK_BLUE)
-        self.pdf.cell(100, 7, name, align="C", ln=True)
-        self.pdf.set_x(x + 5)
-        self.pdf.set_font(self.F, "", 10)
-        self.pdf.set_text_color(100, 100, 100)
-        self.pdf.cell(100, 6, f"@{user} · Grupo {group}", align="C", ln=True)
-        self.pdf.ln(25)
-        self.pdf.set_font(self.F, "", 10)
-        self.pdf.set_text_color(80, 80, 80)
-        self.pdf.cell(0, 6, "Tech Connect 2026 · Lunes 2 de marzo · Campus de Fuenlabrada · URJC", align="C", ln=True)
-
-        # Intro text
-        self.pdf.ln(15)
-        self.pdf.set_font(self.F, "", 9)
-        self.pdf.set_text_color(80, 80, 80)
-        intro = (
-            "Este informe recoge el resultado de tu proceso de evaluación de competencias "
-            "durante el Tech Connect 2026, la actividad de networking profesional del Grado "
-            "en Comunicación Digital de la URJC. A lo largo de tres fases (antes, durante y "
-            "después del evento) has investigado empresas del sector, conversado con profesionales "
-            "y reflexionado sobre las competencias que el mercado demanda. "
-            "Lo que tienes entre manos es tu mapa personal de competencias: una fotografía "
-            "de dónde estás y hacia dónde quieres ir profesionalmente."
-        )
-        self.pdf.multi_cell(190, 5, intro)
-
-    def section_title(self, title, phase_tag=None):
-        self.pdf.ln(5)
-        self.pdf.set_fill_color(*DARK_BLUE)
-        self.pdf.rect(10, self.pdf.get_y(), 190, 8, "F")
-        self.pdf.set_font(self.F, "B", 11)
-        self.pdf.set_text_color(*WHITE)
-        label = f"  {phase_tag} — {title}" if phase_tag else f"  {title}"
-        self.pdf.multi_cell(190, 8, label)
-        self.pdf.set_text_color(0, 0, 0)
-        self.pdf.ln(3)
-
-    def empresa_title(self, name):
-        self.pdf.set_x(10)
-        self.pdf.set_font(self.F, "B", 11)
-        self.pdf.set_text_color(*DARK_BLUE)
-        self.pdf.multi_cell(190, 7, name)
-        self.pdf.ln(1)
-
-    def field(self, label, value):
-        if not value:
-            return
-        self.pdf.set_x(10)
-        self.pdf.set_font(self.F, "B", 9)
-        self.pdf.set_text_color(*DARK_BLUE)
-        self.pdf.multi_cell(190, 5, label + ":")
-        self.pdf.set_x(12)
-        self.pdf.set_font(self.F, "", 8.5)
-        self.pdf.set_text_color(60, 60, 60)
-        self.pdf.multi_cell(188, 4.5, str(value))
-        self.pdf.ln(1.5)
-
-    def competencia(self, code, desc, extra=""):
-        self.pdf.set_x(10)
-        self.pdf.set_font(self.F, "B", 8.5)
-        self.pdf.set_text_color(*MEDIUM_BLUE)
-        self.pdf.multi_cell(190, 5, f"  {code}")
-        if desc:
-            self.pdf.set_x(14)
-            self.pdf.set_font(self.F, "", 8)
-            self.pdf.set_text_color(80, 80, 80)
-            self.pdf.multi_cell(186, 4, desc)
-        if extra:
-            self.pdf.set_x(14)
-            self.pdf.set_font(self.F, "I", 7.5)
-            self.pdf.set_text_color(120, 120, 120)
-            self.pdf.multi_cell(186, 4, extra)
-        self.pdf.ln(1.5)
-
-    def separator(self):
-        self.pdf.set_draw_color(200, 200, 200)
-        self.pdf.line(10, self.pdf.get_y(), 200, self.pdf.get_y())
-        self.pdf.ln(3)
-
-    def add_chart_image(self, img_bytes):
-        """Insert a PNG chart image centered on a new page."""
-        import tempfile, os
-        tmp = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
-        tmp.write(img_bytes)
-        tmp.close()
-        try:
-            self.pdf.add_page()
-            self.section_title("Mapa de competencias — Gráfico comparativo", "ANÁLISIS")
-            # Center the image (190mm wide, keep aspect)
-            self.pdf.image(tmp.name, x=10, y=self.pdf.get_y(), w=190)
-        except Exception:
-            pass
-        finally:
-            os.unlink(tmp.name)
-
-    def output(self):
-        return bytes(self.pdf.output())
-
-
-def _generate_radar_png(all_comps, comp_data):
-    """Generate radar chart as PNG bytes using matplotlib (reliable on all platforms)."""
-    try:
-        import matplotlib
-        matplotlib.use("Agg")
-        import matplotlib.pyplot as plt
-        import numpy as np
-
-        codes = list(comp_data.keys())
-        if not codes:
-            return None
-
-        labels = [f"{c}\n{all_comps.get(c, '')[:22]}..." for c in codes]
-        v1 = [comp_data[c]["v1"] for c in codes]
-        v2 = [comp_data[c]["v2"] for c in codes]
-
-        N = len(codes)
-        angles = np.linspace(0, 2 * np.pi, N, endpoint=False).tolist()
-        angles += angles[:1]
-        v1_c = v1 + [v1[0]]
-        v2_c = v2 + [v2[0]]
-
-        fig, ax = plt.subplots(figsize=(8, 6), subplot_kw=dict(polar=True))
-        ax.fill(angles, v1_c, color="#1a1a2e", alpha=0.15)
-        ax.plot(angles, v1_c, color="#1a1a2e", linewidth=2, label="Fase 1 (pre-evento)")
-        ax.fill(angles, v2_c, color="#e74c3c", alpha=0.15)
-        ax.plot(angles, v2_c, color="#e74c3c", linewidth=2, label="Fase 3 (post-evento)")
-
-        ax.set_xticks(angles[:-1])
-        ax.set_xticklabels(labels, size=7)
-        mx = max(max(v1, default=1), max(v2, default=1))
-        ax.set_ylim(0, mx + 1)
-        ax.set_title("Competencias: antes vs después del evento", size=12, fontweight="bold", pad=20)
-        ax.legend(loc="lower center", bbox_to_anchor=(0.5, -0.15), ncol=2, fontsize=9)
-
-        buf = io.BytesIO()
-        fig.savefig(buf, format="png", dpi=150, bbox_inches="tight")
-        plt.close(fig)
-        buf.seek(0)
-        return buf.read()
-    except Exception:
-        return None
-
-
-def generate_full_pdf(all_comps, comp_data, comps_by_cat, my_f1, my_f2, my_f3):
-    doc = SkillsMapPDF()
-
-    # COVER
-    doc.add_cover(st.session_state.student_name, st.session_state.student_user,
-                  st.session_state.student_group)
-
-    # FASE 1
-    if my_f1 is not None and not my_f1.empty and "empresa_nombre" in my_f1.columns:
-        doc.pdf.add_page()
-        doc.section_title("Análisis de empresas y mapeo de competencias", "FASE 1")
-        for emp in my_f1["empresa_nombre"].unique():
-            emp_data = my_f1[my_f1["empresa_nombre"] == emp]
-            first = emp_data.iloc[0]
-            doc.empresa_title(emp)
-            doc.field("Actividad principal", first.get("actividad_principal", ""))
-            doc.field("Presencia digital", first.get("presencia_digital", ""))
-            doc.field("Perfiles que necesitan", first.get("perfiles_necesitan", ""))
-            if "competencia_codigo" in emp_data.columns:
-                doc.pdf.set_font(doc.F, "B", 9)
-                doc.pdf.set_text_color(*DARK_BLUE)
-                doc.pdf.set_x(10)
-                doc.pdf.multi_cell(190, 5, "Competencias mapeadas (v1):")
-                for _, row in emp_data.iterrows():
-                    code = str(row.get("competencia_codigo", ""))
-                    desc = all_comps.get(code, "")
-                    nivel = row.get("competencia_nivel", "")
-                    justif = row.get("competencia_justificacion", "")
-                    extra = f"Nivel: {nivel}" + (f" · {justif}" if justif else "")
-                    doc.competencia(code, desc, extra)
-            doc.pdf.ln(2)
-            doc.separator()
-
-    # FASE 2
-    if my_f2 is not None and not my_f2.empty:
-        doc.pdf.add_page()
-        doc.section_title("Registros de conversaciones", "FASE 2")
-        for _, row in my_f2.iterrows():
-            doc.empresa_title(row.get("empresa_nombre", ""))
-            persona = row.get("persona_contacto", "")
-            cargo = row.get("cargo_contacto", "")
-            if persona:
-                doc.field("Contacto", f"{persona}" + (f" ({cargo})" if cargo else ""))
-            for label, key in [("Qué hacen en digital", "que_hacen_digital"),
-                               ("Perfiles que buscan", "perfiles_buscan"),
-                               ("Habilidades técnicas", "habilidades_tecnicas"),
-                               ("Competencias blandas", "competencias_blandas"),
-                               ("Gap universidad", "gap_universidad"),
-                               ("Consejo", "consejo")]:
-                doc.field(label, row.get(key, ""))
-            doc.pdf.ln(2)
-            doc.separator()
-
-    # FASE 3 — Competencias v2
-    if my_f3 is not None and not my_f3.empty and "empresa_nombre" in my_f3.columns:
-        comp_rows = my_f3[my_f3["empresa_nombre"] != "REFLEXION_GENERAL"]
-        if not comp_rows.empty:
-            doc.pdf.add_page()
-            doc.section_title("Competencias revisadas (post-evento)", "FASE 3")
-            for emp in comp_rows["empresa_nombre"].unique():
-                doc.empresa_title(emp)
-                for _, row in comp_rows[comp_rows["empresa_nombre"] == emp].iterrows():
-                    code = str(row.get("competencia_codigo", ""))
-                    desc = all_comps.get(code, "")
-                    nivel = row.get("competencia_nivel_v2", "")
-                    justif = row.get("competencia_justificacion_v2", "")
-                    cambio = row.get("cambio_vs_v1", "")
-                    extra = f"Nivel: {nivel} · {cambio}" + (f" · {justif}" if justif else "")
-                    doc.competencia(code, desc, extra)
-                doc.pdf.ln(2)
-                doc.separator()
-
-    # RADAR CHART IMAGE
-    if comp_data:
-        try:
-            chart_bytes = _generate_radar_png(all_comps, comp_data)
-            if chart_bytes:
-                doc.add_chart_image(chart_bytes)
-        except Exception:
-            pass
-
-    # RESUMEN COMPARATIVO
-    if comp_data:
-        doc.pdf.add_page()
-        doc.section_title("Mapa de competencias — Resumen comparativo", "ANÁLISIS")
-        for cat_key, cat in comps_by_cat.items():
-            cat_codes = [c for c in comp_data if c.startswith(cat_key)]
-            if cat_codes:
-                doc.pdf.set_font(doc.F, "B", 10)
-                doc.pdf.set_text_color(*MEDIUM_BLUE)
-                doc.pdf.set_x(10)
-                doc.pdf.multi_cell(190, 6, cat["label"])
-                doc.pdf.ln(1)
-                for code in cat_codes:
-                    d = comp_data[code]
-                    desc = all_comps.get(code, "")
-                    emps = list(set(d["empresas_v1"] + d["empresas_v2"]))
-                    extra = f"Fase 1: {d['v1']}x | Fase 3: {d['v2']}x | Empresas: {', '.join(emps)}"
-                    doc.competencia(code, desc, extra)
-                doc.pdf.ln(2)
-
-    # REFLEXIÓN FINAL
-    if my_f3 is not None and not my_f3.empty and "empresa_nombre" in my_f3.columns:
-        ref = my_f3[my_f3["empresa_nombre"] == "REFLEXION_GENERAL"]
-        if not ref.empty:
-            doc.pdf.add_page()
-            doc.section_title("Reflexión final", "CONCLUSIONES")
-            last = ref.iloc[-1]
-            for label, key in [("Competencias más demandadas", "competencias_mas_demandadas"),
-                               ("Gap universidad-empresa", "gap_uni_empresa"),
-                               ("Posicionamiento profesional", "posicionamiento_personal"),
-                               ("Acción principal", "plan_accion"),
-                               ("Valoración de la experiencia", "valoracion_experiencia")]:
-                doc.field(label, last.get(key, ""))
-
-    return doc.output()
-
-
 def render_student_home():
     st.markdown(logo_html(width=180, center=False, margin_bottom="0.5rem"), unsafe_allow_html=True)
     st.markdown(f"### Hola, {st.session_state.student_name}")
     st.caption(f"@{st.session_state.student_user} · Grupo {st.session_state.student_group}")
 
-    st.markdown("""
-    Bienvenido/a a **Skills Map**, la herramienta del **Tech Connect 2026**.
+    st.markdown(f"""
+    Bienvenido/a a **Skills Map**, la herramienta del **{get_event_label()}**.
 
     El Tech Connect es una actividad de networking profesional del Grado en Comunicación Digital 
     donde vas a hablar directamente con empresas del sector. Skills Map te acompaña en tres fases: 
@@ -1349,9 +979,9 @@ def render_student_home():
             st.rerun()
 
     st.divider()
-    st.markdown("""
+    st.markdown(f"""
     <div class="tc-card" style="text-align:center; color: #666;">
-        <strong>Tech Connect 2026</strong> · Lunes 2 de marzo · 11:00–13:00h<br>
+        <strong>{get_event_label()}</strong> · Lunes 2 de marzo · 11:00–13:00h<br>
         Sala de las Palmeras, Biblioteca · Campus de Fuenlabrada · URJC
     </div>
     """, unsafe_allow_html=True)
@@ -1363,8 +993,8 @@ def render_student_home():
 def render_help():
     st.markdown(logo_html(width=150, center=False, margin_bottom="0.5rem"), unsafe_allow_html=True)
     st.title("Ayuda — Cómo funciona Skills Map")
-    st.markdown("""
-    Skills Map te guía en tres fases a lo largo del Tech Connect 2026.
+    st.markdown(f"""
+    Skills Map te guía en tres fases a lo largo del {get_event_label()}.
     """)
     st.divider()
     st.markdown("### Fase 1 — Pre-evento")
@@ -1425,6 +1055,7 @@ def render_help():
 # MAIN
 # ============================================
 def main():
+    start_background_jobs()
     st.markdown(
         '<div class="custom-footer">'
         '<a href="https://ciberimaginario.es" target="_blank">Ciberimaginario</a>'
@@ -1434,6 +1065,9 @@ def main():
         render_login()
         return
 
+    render_stale_banner()
+    render_save_status()
+
     if st.session_state.user_type == "teacher":
         with st.sidebar:
             st.markdown(logo_html(width=160, center=False, margin_bottom="0.5rem"), unsafe_allow_html=True)
@@ -1441,14 +1075,18 @@ def main():
             if st.button("Cerrar sesión", use_container_width=True):
                 st.session_state.user_type = None
                 st.rerun()
-        render_dashboard()
+        render_dashboard(DataContext())
         return
 
     render_student_nav()
     phase = st.session_state.current_phase
-    {"fase1": render_fase1, "fase2": render_fase2, "fase3": render_fase3,
-     "my_responses": render_my_responses, "my_chart": render_my_chart,
-     "help": render_help}.get(phase, render_student_home)()
+    data_pages = {"fase1": render_fase1, "fase2": render_fase2, "fase3": render_fase3,
+                  "my_responses": render_my_responses, "my_chart": render_my_chart}
+    if phase in data_pages:
+        ctx = DataContext(st.session_state.student_user, st.session_state.student_name)
+        data_pages[phase](ctx)
+    else:
+        {"help": render_help}.get(phase, render_student_home)()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,115 @@
+"""
+Data export for TechConnect Skills Map.
+Encodes sheet frames as CSV, Parquet or XLSX (or a ZIP with every sheet) on
+demand, writing them chunk by chunk into a binary stream instead of building
+one large string per file.
+"""
+
+import csv
+import io
+import zipfile
+
+import pandas as pd
+
+from schemas import SCHEMAS
+from sheets_backend import get_snapshots_together
+
+
+# Rows encoded per CSV chunk / written per Parquet row group
+CHUNK_ROWS = 5000
+
+FORMATS = {
+    "csv": ("CSV", "text/csv"),
+    "parquet": ("Parquet", "application/vnd.apache.parquet"),
+    "xlsx": ("Excel", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+# Excel caps sheet names at 31 characters
+XLSX_SHEET_NAME = 31
+
+
+def take_snapshots(sheets=None):
+    """
+    Snapshot of each given sheet (default: all), read live with one request per
+    spreadsheet so the sheets of a spreadsheet are a consistent cut (see
+    get_snapshots_together for shards). versiones.csv records each sheet's version.
+    """
+    return get_snapshots_together(sheets or SCHEMAS)
+
+
+def _write_csv(frame, out):
+    out.write("\ufeff".encode("utf-8"))  # BOM, so Excel reads the accents
+    if frame.empty:
+        out.write(frame.to_csv(index=False).encode("utf-8"))
+        return
+    for start in range(0, len(frame), CHUNK_ROWS):
+        chunk = frame.iloc[start:start + CHUNK_ROWS].to_csv(index=False, header=start == 0)
+        out.write(chunk.encode("utf-8"))
+
+
+def _write_parquet(frame, out):
+    # Extra columns read from Sheets can mix numbers and text, which Arrow rejects
+    mixed = {c: str for c in frame.columns if frame[c].dtype == object}
+    try:
+        frame.astype(mixed).to_parquet(out, index=False, row_group_size=CHUNK_ROWS)
+    except ImportError:
+        raise ImportError("Exportar a Parquet necesita pyarrow (pip install pyarrow).") from None
+
+
+def _write_xlsx(frames, out):
+    try:
+        with pd.ExcelWriter(out, engine="openpyxl") as writer:
+            for sheet_name, frame in frames.items():
+                frame.to_excel(writer, sheet_name=sheet_name[:XLSX_SHEET_NAME], index=False)
+    except ImportError:
+        raise ImportError("Exportar a Excel necesita openpyxl (pip install openpyxl).") from None
+
+
+def write_frame(frame, fmt, out, sheet_name="Datos"):
+    """Write one frame to a binary stream in the given format."""
+    if fmt == "csv":
+        _write_csv(frame, out)
+    elif fmt == "parquet":
+        _write_parquet(frame, out)
+    elif fmt == "xlsx":
+        _write_xlsx({sheet_name: frame}, out)
+    else:
+        raise ValueError(f"Formato desconocido: {fmt}")
+
+
+def export_frame(frame, fmt, sheet_name="Datos"):
+    """Bytes of one frame in the given format."""
+    buf = io.BytesIO()
+    write_frame(frame, fmt, buf, sheet_name)
+    return buf.getvalue()
+
+
+def write_zip(snapshots, fmt, out):
+    """
+    ZIP with one file per sheet plus versiones.csv (rows and snapshot version of
+    each sheet). CSV members are streamed into the archive; Parquet and XLSX
+    writers need a seekable file, so those are encoded first.
+    """
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for sheet_name, snap in snapshots.items():
+            name = f"{sheet_name}.{fmt}"
+            if fmt == "csv":
+                with zf.open(name, "w") as member:
+                    write_frame(snap.frame, fmt, member, sheet_name)
+            else:
+                zf.writestr(name, export_frame(snap.frame, fmt, sheet_name))
+        with zf.open("versiones.csv", "w") as member:
+            text = io.TextIOWrapper(member, encoding="utf-8", newline="")
+            writer = csv.writer(text)
+            writer.writerow(["hoja", "filas", "version"])
+            for sheet_name, snap in snapshots.items():
+                writer.writerow([sheet_name, len(snap.frame), snap.version])
+            text.flush()
+            text.detach()
+
+
+def export_zip(snapshots, fmt):
+    """Bytes of write_zip()."""
+    buf = io.BytesIO()
+    write_zip(snapshots, fmt, buf)
+    return buf.getvalue()
@@ -0,0 +1,175 @@
+"""
+Bulk import of students and companies for TechConnect Skills Map.
+Parses a CSV or XLSX file row by row, normalizes and dedupes it against the
+rows already in the sheet, fills in missing access codes and writes the
+result in chunks, so 400 students can be loaded with a single upload.
+"""
+
+import csv
+import io
+import secrets
+import unicodedata
+from collections import namedtuple
+
+from schemas import SHEET_USUARIOS, SHEET_EMPRESAS, get_schema
+
+
+# Rows per append_rows call: one API write (and one journal event) per chunk
+CHUNK_ROWS = 200
+
+# Access codes: no 0/O, 1/I/L so they can be read out or copied by hand
+CODE_ALPHABET = "ABCDEFGHJKMNPQRSTUVWXYZ23456789"
+CODE_LENGTH = 6
+
+# Accepted header spellings (after _norm_header) for each column
+ALIASES = {
+    SHEET_USUARIOS: {
+        "usuario": ("usuario", "user", "login", "email", "correo"),
+        "password": ("password", "contrasena", "clave", "codigo", "codigo_acceso"),
+        "nombre": ("nombre", "name", "nombre_completo", "alumno", "estudiante"),
+        "grupo": ("grupo", "group", "clase"),
+    },
+    SHEET_EMPRESAS: {
+        "id": ("id",),
+        "nombre": ("nombre", "empresa", "name"),
+        "sector": ("sector",),
+        "web": ("web", "url", "website"),
+        "descripcion": ("descripcion", "description"),
+    },
+}
+
+Skipped = namedtuple("Skipped", ["line", "reason"])
+
+
+def _norm_header(name):
+    """'Contraseña ' -> 'contrasena', 'Nombre completo' -> 'nombre_completo'."""
+    name = unicodedata.normalize("NFKD", str(name or "")).encode("ascii", "ignore").decode()
+    return "_".join(name.strip().lower().split())
+
+
+def _norm_value(value):
+    return " ".join(str(value).split()) if value is not None else ""
+
+
+def empresa_id(nombre):
+    """Short id of a company, derived from its name."""
+    return nombre.lower().replace(" ", "_")[:20]
+
+
+def new_access_code():
+    return "".join(secrets.choice(CODE_ALPHABET) for _ in range(CODE_LENGTH))
+
+
+# ============================================
+# PARSING
+# ============================================
+def _csv_rows(binary):
+    text = io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+    sample = text.read(4096)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    yield from csv.reader(text, dialect)
+
+
+def _xlsx_rows(binary):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportError("Importar XLSX necesita openpyxl (pip install openpyxl).") from None
+    wb = load_workbook(binary, read_only=True, data_only=True)
+    try:
+        for row in wb.worksheets[0].iter_rows(values_only=True):
+            yield ["" if v is None else v for v in row]
+    finally:
+        wb.close()
+
+
+def read_records(binary, filename, sheet_name):
+    """
+    Yield (line, record) for each data row of a CSV/XLSX file opened in binary mode.
+    Headers are matched through ALIASES; unknown columns are ignored.
+    """
+    aliases = ALIASES[sheet_name]
+    lookup = {alias: col for col, names in aliases.items() for alias in names}
+    parse = _xlsx_rows if filename.lower().endswith((".xlsx", ".xlsm")) else _csv_rows
+    columns = None
+    for line, row in enumerate(parse(binary), 1):
+        if columns is None:
+            columns = [lookup.get(_norm_header(h)) for h in row]
+            continue
+        record = {col: _norm_value(v) for col, v in zip(columns, row) if col}
+        if any(record.values()):
+            yield line, record
+
+
+# ============================================
+# PLANNING
+# ============================================
+class ImportJob:
+    """
+    Rows to append to one sheet, written CHUNK_ROWS at a time with step().
+    `done` counts written rows, so an interrupted job resumes where it stopped;
+    a new upload of the same file skips whatever already reached the sheet.
+    """
+
+    def __init__(self, sheet_name, rows, skipped, generated, total):
+        self.sheet_name = sheet_name
+        self.rows = rows
+        self.skipped = skipped
+        self.generated = generated
+        self.total = total
+        self.done = 0
+        self.held = 0
+
+    @property
+    def finished(self):
+        return self.done >= len(self.rows)
+
+    def step(self, add_bulk):
+        """Write the next chunk. Returns the number of rows written."""
+        chunk = self.rows[self.done:self.done + CHUNK_ROWS]
+        if not chunk:
+            return 0
+        if not add_bulk(chunk):
+            self.held += 1
+        self.done += len(chunk)
+        return len(chunk)
+
+    def run(self, add_bulk, on_progress=None):
+        while not self.finished:
+            self.step(add_bulk)
+            if on_progress:
+                on_progress(self.done, len(self.rows))
+        return self
+
+
+def plan_import(sheet_name, records, existing):
+    """
+    Build an ImportJob from (line, record) pairs, skipping rows without a key and
+    keys already in `existing` or earlier in the file. Students without a password
+    get a new access code (listed in job.generated as (usuario, code) pairs).
+    """
+    schema = get_schema(sheet_name)
+    seen = {schema.key_of(r) for r in existing}
+    rows, skipped, generated = [], [], []
+    total = 0
+    for line, record in records:
+        total += 1
+        if sheet_name == SHEET_EMPRESAS and record.get("nombre") and not record.get("id"):
+            record["id"] = empresa_id(record["nombre"])
+        key = schema.key_of(record)
+        if "" in key:
+            skipped.append(Skipped(line, f"falta {', '.join(schema.key)}"))
+            continue
+        if key in seen:
+            skipped.append(Skipped(line, "duplicado"))
+            continue
+        seen.add(key)
+        if sheet_name == SHEET_USUARIOS and not record.get("password"):
+            record["password"] = new_access_code()
+            generated.append((record["usuario"], record["password"]))
+        rows.append(schema.row(record))
+    return ImportJob(sheet_name, rows, skipped, generated, total)
@@ -0,0 +1,202 @@
+"""
+Admin command line for TechConnect Skills Map.
+Runs the same sheets_backend operations as the teacher dashboard, without a browser:
+
+    python cli.py init
+    python cli.py import-usuarios alumnos.xlsx [--codes-out codigos.csv]
+    python cli.py import-empresas empresas.csv
+    python cli.py export --format parquet --out export/ [--zip]
+    python cli.py pdf --out informes/ [--usuario ana --usuario bea]
+    python cli.py restore [--sheet Fase1_PreEvento] [--at 2026-03-02T13:00] [--from-snapshot]
+
+Run it from the app folder: credentials are read from .streamlit/secrets.toml, as in the app.
+"""
+
+import argparse
+import csv
+import pathlib
+import sys
+
+import streamlit.logger
+
+# Streamlit caches work without a running app, but warn about it at import and on every call
+streamlit.logger.set_log_level("error")
+
+import bulk_export
+import bulk_import
+import sheets_backend as sb
+from data_context import DataContext
+from hypothesis_scoring import student_accuracy
+from report import competencia_counts, generate_full_pdf
+from schemas import SCHEMAS, SHEET_USUARIOS, SHEET_EMPRESAS
+
+
+def progress(done, total, label):
+    end = "\n" if done >= total else ""
+    print(f"\r{label}: {done}/{total}", end=end, file=sys.stderr, flush=True)
+
+
+def warn_stale():
+    stale = sb.get_stale_sheets()
+    if stale:
+        oldest = min(stale.values())[:16].replace("T", " ")
+        print(f"Aviso: sin conexión con Google Sheets; {', '.join(sorted(stale))} "
+              f"se leyeron de la copia local del {oldest} y puede que no incluyan los últimos cambios.",
+              file=sys.stderr)
+
+
+# ============================================
+# COMMANDS
+# ============================================
+def cmd_init(args):
+    sb.init_spreadsheet()
+    print("Hojas inicializadas.")
+
+
+def _import(sheet_name, args, existing, add_bulk):
+    try:
+        with open(args.file, "rb") as f:
+            job = bulk_import.plan_import(
+                sheet_name, bulk_import.read_records(f, args.file, sheet_name), existing
+            )
+    except ImportError as e:
+        sys.exit(str(e))
+    job.run(add_bulk, lambda done, total: progress(done, total, sheet_name))
+    print(f"{sheet_name}: {len(job.rows)} añadidos, {len(job.skipped)} omitidos de {job.total} filas.")
+    for line, reason in job.skipped:
+        print(f"  fila {line}: {reason}")
+    if job.held:
+        print(f"Sin conexión: {job.held} lote(s) quedan en el registro local y se enviarán más tarde.")
+    if job.generated:
+        codes = pathlib.Path(args.codes_out)
+        with open(codes, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f)
+            writer.writerow(["usuario", "password"])
+            writer.writerows(job.generated)
+        print(f"{len(job.generated)} códigos de acceso nuevos en {codes}")
+
+
+def cmd_import_usuarios(args):
+    _import(SHEET_USUARIOS, args, sb.get_usuarios(), sb.add_usuarios_bulk)
+
+
+def cmd_import_empresas(args):
+    _import(SHEET_EMPRESAS, args, sb.get_empresas(), sb.add_empresas_bulk)
+
+
+def cmd_export(args):
+    out = pathlib.Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    snapshots = bulk_export.take_snapshots(args.sheet)
+    try:
+        if args.zip:
+            path = out / f"techconnect_{sb.get_edition()}_{args.format}.zip"
+            with open(path, "wb") as f:
+                bulk_export.write_zip(snapshots, args.format, f)
+            print(f"{len(snapshots)} hoja(s) exportadas a {path}")
+            return
+        for i, (sheet_name, snap) in enumerate(snapshots.items(), 1):
+            with open(out / f"{sheet_name}.{args.format}", "wb") as f:
+                bulk_export.write_frame(snap.frame, args.format, f, sheet_name)
+            progress(i, len(snapshots), "Exportando")
+    except ImportError as e:
+        sys.exit(str(e))
+    print(f"{len(snapshots)} hoja(s) exportadas a {out}/")
+
+
+def cmd_pdf(args):
+    out = pathlib.Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    wanted = {u.strip().lower() for u in args.usuario or []}
+    usuarios = [
+        u for u in sb.get_usuarios()
+        if not wanted or str(u.get("usuario", "")).strip().lower() in wanted
+    ]
+    catalog = sb.get_catalog()
+    written = 0
+    for i, u in enumerate(usuarios, 1):
+        student = {k: str(u.get(k, "")).strip() for k in ("usuario", "nombre", "grupo")}
+        ctx = DataContext(student["usuario"], student["nombre"])
+        my_f1, my_f2, my_f3 = ctx.my_fase1, ctx.my_fase2, ctx.my_fase3
+        if not any(df is not None and not df.empty for df in (my_f1, my_f2, my_f3)):
+            progress(i, len(usuarios), "Informes")
+            continue
+        comp_data = competencia_counts(catalog, my_f1, my_f3)
+        pdf_bytes = generate_full_pdf(catalog, comp_data, my_f1, my_f2, my_f3, student,
+                                      student_accuracy(student["usuario"]))
+        (out / f"SkillsMap_{student['usuario']}.pdf").write_bytes(pdf_bytes)
+        written += 1
+        progress(i, len(usuarios), "Informes")
+    print(f"{written} informe(s) en {out}/ ({len(usuarios) - written} estudiantes sin datos).")
+
+
+def cmd_restore(args):
+    if args.from_snapshot:
+        for sheet_name in args.sheet or list(SCHEMAS):
+            written = sb.restore_sheet_from_snapshot(sheet_name)
+            if written is None:
+                print(f"{sheet_name}: no hay copia local.")
+            else:
+                print(f"{sheet_name}: {written} filas restauradas.")
+        return
+    if args.sheet:
+        restored = {sheet_name: sb.restore_sheet(sheet_name, args.at) for sheet_name in args.sheet}
+    else:
+        restored = sb.restore_spreadsheet(args.at)
+    for sheet_name, written in restored.items():
+        print(f"{sheet_name}: {written} filas restauradas.")
+
+
+# ============================================
+# ENTRY POINT
+# ============================================
+def build_parser():
+    parser = argparse.ArgumentParser(description="Administración de TechConnect Skills Map.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("init", help="Crea las hojas que falten y actualiza cabeceras.").set_defaults(func=cmd_init)
+
+    p = sub.add_parser("import-usuarios", help="Importa estudiantes (CSV/XLSX: usuario,password,nombre,grupo).")
+    p.add_argument("file")
+    p.add_argument("--codes-out", default="codigos_acceso.csv",
+                   help="CSV con los códigos generados para quien no trae password.")
+    p.set_defaults(func=cmd_import_usuarios)
+
+    p = sub.add_parser("import-empresas", help="Importa empresas (CSV/XLSX: nombre,sector,web,descripcion).")
+    p.add_argument("file")
+    p.set_defaults(func=cmd_import_empresas)
+
+    p = sub.add_parser("export", help="Exporta las hojas a CSV, Parquet o Excel.")
+    p.add_argument("--format", choices=list(bulk_export.FORMATS), default="csv")
+    p.add_argument("--zip", action="store_true", help="Un único ZIP con todas las hojas.")
+    p.add_argument("--out", default="export")
+    p.add_argument("--sheet", action="append", choices=list(SCHEMAS))
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("pdf", help="Genera el informe PDF de cada estudiante.")
+    p.add_argument("--out", default="informes")
+    p.add_argument("--usuario", action="append")
+    p.set_defaults(func=cmd_pdf)
+
+    p = sub.add_parser("restore", help="Reescribe hojas desde el registro local (o la última copia).")
+    p.add_argument("--sheet", action="append", choices=list(SCHEMAS))
+    p.add_argument("--at", help="Estado en una fecha ISO (p. ej. 2026-03-02T13:00).")
+    p.add_argument("--from-snapshot", action="store_true", help="Usa la última lectura guardada en disco.")
+    p.set_defaults(func=cmd_restore)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # Read from the API, not the disk copy: this process ends before a background refresh would
+    sb.prefer_live_reads()
+    try:
+        args.func(args)
+    except sb.SHEETS_ERRORS as e:
+        sys.exit(f"Error de Google Sheets: {e}")
+    finally:
+        warn_stale()
+
+
+if __name__ == "__main__":
+    main()
@@ -7,9 +7,12 @@ la autoevaluación del estudiante. Los códigos originales se mantienen
 para trazabilidad con las guías docentes.
 
 Las competencias por defecto se usan para inicializar Google Sheets.
-Una vez inicializadas, se leen y gestionan desde la hoja de cálculo.
+Una vez inicializadas, se leen y gestionan desde la hoja de cálculo
+y se exponen a la app como un Catalog inmutable.
 """
 
+from types import MappingProxyType
+
 # Competencias por defecto (para inicialización)
 # (código, categoría, descripción simplificada "Soy capaz de...")
 DEFAULT_COMPETENCIAS = [
@@ -102,17 +105,22 @@ CATEGORIAS = {
     "CP": {
         "label": "Competencias — Cómo me desenvuelvo",
         "color": "#6C63FF",
+        "tipo": "Blanda (transversal)",
     },
     "C": {
         "label": "Contenidos — Lo que sé",
         "color": "#2ECC71",
+        "tipo": "Dura (técnica)",
     },
     "H": {
         "label": "Habilidades — Lo que sé hacer",
         "color": "#E67E22",
+        "tipo": "Dura (técnica)",
     },
 }
 
+DEFAULT_CATEGORY_COLOR = "#95A5A6"
+
 NIVELES = ["Básico", "Intermedio", "Avanzado"]
 
 TIPOS_COMPETENCIA = ["Dura (técnica)", "Blanda (transversal)"]
@@ -138,3 +146,72 @@ def get_competencia_type(code):
     if cat == "CP":
         return "Blanda (transversal)"
     return "Dura (técnica)"
+
+
+def short_label(code, desc, max_len=50):
+    """Dropdown label: 'C19 — Sé cómo funciona la web y las aplica…'."""
+    short = desc if len(desc) <= max_len else desc[:max_len - 3] + "…"
+    return f"{code} — {short}"
+
+
+class Catalog:
+    """
+    Immutable competencias catalog built once per Competencias snapshot.
+    Categories come from the sheet's `categoria` column (no code-prefix rules);
+    CATEGORIAS only supplies labels, colors and ordering for known categories.
+    """
+
+    def __init__(self, records, version=""):
+        self.version = version
+        descriptions, categories, grouped = {}, {}, {}
+        for r in records:
+            code = str(r.get("codigo", "")).strip()
+            if not code:
+                continue
+            cat = str(r.get("categoria", "")).strip()
+            descriptions[code] = str(r.get("descripcion", ""))
+            categories[code] = cat
+            grouped.setdefault(cat, []).append(code)
+
+        # Known categories first (CATEGORIAS order), then any others from the sheet
+        order = [c for c in CATEGORIAS if c in grouped] + [c for c in grouped if c not in CATEGORIAS]
+        self.descriptions = MappingProxyType(descriptions)
+        self.categories = MappingProxyType(categories)
+        self.codes_by_category = MappingProxyType({c: tuple(grouped[c]) for c in order})
+        self.short_labels = MappingProxyType({c: short_label(c, d) for c, d in descriptions.items()})
+        self.by_category = MappingProxyType({
+            c: MappingProxyType({
+                "label": CATEGORIAS.get(c, {}).get("label", c),
+                "color": CATEGORIAS.get(c, {}).get("color", DEFAULT_CATEGORY_COLOR),
+                "items": MappingProxyType({code: descriptions[code] for code in grouped[c]}),
+            })
+            for c in order
+        })
+
+    def __contains__(self, code):
+        return code in self.descriptions
+
+    def __len__(self):
+        return len(self.descriptions)
+
+    def description(self, code):
+        return self.descriptions.get(code, "")
+
+    def category(self, code):
+        return self.categories.get(code)
+
+    def color(self, code):
+        return CATEGORIAS.get(self.category(code), {}).get("color", DEFAULT_CATEGORY_COLOR)
+
+    def tipo(self, code):
+        """'Blanda (transversal)' or 'Dura (técnica)' according to the code's category."""
+        return CATEGORIAS.get(self.category(code), {}).get("tipo", "Dura (técnica)")
+
+    def label(self, code):
+        """Dropdown label for a code ('(Ninguna)' passes through)."""
+        return self.short_labels.get(code, code)
+
+
+DEFAULT_CATALOG = Catalog(
+    [{"codigo": c[0], "categoria": c[1], "descripcion": c[2]} for c in DEFAULT_COMPETENCIAS], "default"
+)
@@ -0,0 +1,147 @@
+"""
+Mapping of Fase 2 notes to catalog competencias for TechConnect Skills Map.
+Each conversation's notes on what the company asked for are scored against
+the Competencias descriptions with TF-IDF (same folding and stemming as the
+text search), giving per-company, per-code "demand" counts.
+"""
+
+import math
+import threading
+
+import pandas as pd
+
+from sheets_backend import SHEET_FASE2, get_snapshot, get_catalog
+from text_search import stem, terms
+
+
+# Fase 2 columns describing what the company looks for
+DEMAND_FIELDS = ("habilidades_tecnicas", "competencias_blandas", "perfiles_buscan")
+
+MIN_SCORE = 0.2     # cosine similarity needed to count a code as mentioned
+MAX_CODES = 3       # codes kept per conversation, best first
+
+# First-person phrasing shared by the catalog descriptions, not content
+CATALOG_STOPWORDS = frozenset(stem(w) for w in (
+    "soy capaz conozco entiendo comprendo manejo mi me como cómo forma buenas"
+).split())
+
+EVIDENCE_COLUMNS = ["usuario", "empresa_nombre", "competencia_codigo", "score"]
+
+
+class CatalogMatcher:
+    """TF-IDF vectors of the catalog descriptions, with an inverted index term -> codes."""
+
+    def __init__(self, catalog):
+        self.version = catalog.version
+        docs = {
+            code: [t for t in terms(desc) if t not in CATALOG_STOPWORDS]
+            for code, desc in catalog.descriptions.items()
+        }
+        df = {}
+        for words in docs.values():
+            for t in set(words):
+                df[t] = df.get(t, 0) + 1
+        n = len(docs)
+        self.idf = {t: math.log((1 + n) / (1 + k)) + 1 for t, k in df.items()}
+        self.index = {}     # term -> {code: normalized weight}
+        for code, words in docs.items():
+            vec = self._weigh(words)
+            for t, w in vec.items():
+                self.index.setdefault(t, {})[code] = w
+
+    def _weigh(self, words):
+        """Unit-length TF-IDF vector of a list of terms (terms outside the catalog are dropped)."""
+        tf = {}
+        for t in words:
+            if t in self.idf:
+                tf[t] = tf.get(t, 0) + 1
+        vec = {t: n * self.idf[t] for t, n in tf.items()}
+        norm = math.sqrt(sum(w * w for w in vec.values()))
+        return {t: w / norm for t, w in vec.items()} if norm else {}
+
+    def match(self, text):
+        """[(code, score)] of the best matching codes for a text, best first."""
+        scores = {}
+        for t, w in self._weigh(terms(text)).items():
+            for code, cw in self.index.get(t, {}).items():
+                scores[code] = scores.get(code, 0.0) + w * cw
+        best = sorted(((c, s) for c, s in scores.items() if s >= MIN_SCORE), key=lambda x: -x[1])
+        return [(c, round(s, 3)) for c, s in best[:MAX_CODES]]
+
+
+def _note(row):
+    return " ".join(str(row.get(c, "")) for c in DEMAND_FIELDS)
+
+
+class DemandIndex:
+    """
+    Matches of every Fase 2 row, kept per row identity so a new snapshot only
+    scores rows whose notes are new; rebuilt from scratch when the catalog changes.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.matcher = None
+        self.matches = {}       # (usuario, empresa, note) -> [(code, score)]
+        self.evidence = pd.DataFrame(columns=EVIDENCE_COLUMNS)
+        self._lock = threading.Lock()
+
+    def update(self, frame, fase2_version, catalog):
+        with self._lock:
+            if self.matcher is None or self.matcher.version != catalog.version:
+                self.matcher, self.matches = CatalogMatcher(catalog), {}
+            rows, current = [], {}
+            for r in frame.to_dict("records"):
+                note = _note(r)
+                key = (str(r.get("usuario", "")), str(r.get("empresa_nombre", "")), note)
+                if key not in current:
+                    current[key] = self.matches.get(key)
+                    if current[key] is None:
+                        current[key] = self.matcher.match(note)
+                rows += [key[:2] + (code, score) for code, score in current[key]]
+            self.matches = current
+            self.evidence = pd.DataFrame(rows, columns=EVIDENCE_COLUMNS)
+            self.version = (fase2_version, catalog.version)
+            return self.evidence
+
+
+_demand = DemandIndex()
+
+
+def get_versioned_evidence():
+    """
+    (version, evidence) from the same read: version is (Fase 2 snapshot version,
+    catalog version) and evidence has one row per (Fase 2 conversation, matched code):
+    usuario, empresa_nombre, competencia_codigo, score. Recomputed only for new notes.
+    """
+    snap = get_snapshot(SHEET_FASE2)
+    catalog = get_catalog()
+    version = (snap.version, catalog.version)
+    with _demand._lock:
+        if _demand.version == version:
+            return version, _demand.evidence
+    return version, _demand.update(snap.frame, snap.version, catalog)
+
+
+def get_demand_evidence():
+    """Evidence part of get_versioned_evidence()."""
+    return get_versioned_evidence()[1]
+
+
+def get_demand(empresas=None):
+    """Conversations per (empresa_nombre, competencia_codigo) whose notes match the code."""
+    evidence = get_demand_evidence()
+    if empresas is not None:
+        wanted = {str(e).strip().lower() for e in empresas}
+        evidence = evidence[evidence["empresa_nombre"].str.strip().str.lower().isin(wanted)]
+    return (
+        evidence.groupby(["empresa_nombre", "competencia_codigo"]).size()
+        .rename("menciones").reset_index()
+        .sort_values("menciones", ascending=False, kind="stable").reset_index(drop=True)
+    )
+
+
+def demand_by_code(empresas=None):
+    """{codigo: conversations mentioning it}, optionally only for some companies."""
+    demand = get_demand(empresas)
+    return demand.groupby("competencia_codigo")["menciones"].sum().to_dict()
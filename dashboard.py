@@ -7,43 +7,60 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from competencias import CATEGORIAS, get_competencia_category
+from analytics import (
+    COHORT, HEATMAP_NORMS, HEATMAP_PHASES, PROFILE_PHASES, PROFILE_VALUES, SIMILARITY_METRICS,
+    abandoned_hypotheses, get_category_profiles, get_company_code_crosstab, get_company_code_heatmap,
+    get_grupo_heatmap, get_grupo_profiles, get_peer_index, get_transition_matrix, get_transition_pairs, get_transition_sankey,
+)
+from bulk_export import FORMATS, export_frame, export_zip, take_snapshots
+from bulk_import import plan_import, read_records, empresa_id
+from competencias import CATEGORIAS
+from competency_matcher import get_demand
+from hypothesis_scoring import get_accuracy
+from sheet_index import get_sheet_index
+from text_search import SEARCH_FIELDS, search_fase2
 from sheets_backend import (
-    get_fase1_data, get_fase2_data, get_fase3_data,
-    get_usuarios as get_students, get_empresas, init_spreadsheet, add_empresa,
-    get_competencias, get_competencias_flat, add_competencia, delete_competencia
+    SHEET_FASE1, SHEET_FASE2, SHEET_FASE3, SHEET_USUARIOS, SHEET_EMPRESAS, init_spreadsheet,
+    add_empresa, add_empresas_bulk, add_usuarios_bulk, SHEETS_ERRORS, WriteRejected,
+    get_competencias, add_competencia, delete_competencia,
+    get_write_mode, compact_phase_sheets, get_failed_writes, retry_failed_writes,
+    get_edition, get_editions, get_edition_frame, archive_edition, get_event_label
 )
 
+# Columns needed by the aggregate-only views (projected reads, no free text)
+PROGRESS_COLUMNS = ("usuario", "nombre", "grupo")
+COMPETENCIA_COLUMNS = ("usuario", "empresa_nombre", "competencia_codigo", "cambio_vs_v1")
+
 
-def render_dashboard():
-    """Main dashboard view for professors."""
+def render_dashboard(ctx):
+    """Main dashboard view for professors. ctx is the run's DataContext."""
 
     st.title("Dashboard del Profesor")
-    st.caption("Tech Connect 2026 — Skills Map — Panel de seguimiento")
+    st.caption(f"{get_event_label()} — Skills Map — Panel de seguimiento")
 
     tab_progreso, tab_competencias, tab_datos, tab_config = st.tabs([
         "Progreso", "Análisis de Competencias", "Datos brutos", "Configuración"
     ])
 
     with tab_progreso:
-        render_progress_tab()
+        render_progress_tab(ctx)
 
     with tab_competencias:
-        render_competencias_tab()
+        render_competencias_tab(ctx)
 
     with tab_datos:
-        render_datos_tab()
+        render_datos_tab(ctx)
 
     with tab_config:
-        render_config_tab()
+        render_config_tab(ctx)
 
 
-def render_progress_tab():
+def render_progress_tab(ctx):
     """Progress overview."""
-    students = get_students()
-    df_f1 = get_fase1_data()
-    df_f2 = get_fase2_data()
-    df_f3 = get_fase3_data()
+    students = ctx.usuarios()
+    df_f1 = ctx.projection(SHEET_FASE1, PROGRESS_COLUMNS)
+    df_f2 = ctx.projection(SHEET_FASE2, PROGRESS_COLUMNS + ("empresa_nombre",))
+    df_f3 = ctx.projection(SHEET_FASE3, PROGRESS_COLUMNS)
 
     total_students = len(students)
 
@@ -88,6 +105,8 @@ def render_progress_tab():
             df_groups = pd.DataFrame(group_data)
             st.dataframe(df_groups, use_container_width=True, hide_index=True)
 
+    render_grupo_profiles(ctx)
+
     if not df_f2.empty and "empresa_nombre" in df_f2.columns:
         st.subheader("Empresas más visitadas durante el evento")
         empresa_counts = df_f2["empresa_nombre"].value_counts().head(10)
@@ -99,31 +118,86 @@ def render_progress_tab():
         fig.update_layout(yaxis=dict(autorange="reversed"), height=400)
         st.plotly_chart(fig, use_container_width=True)
 
+    if len(get_editions()) > 1:
+        st.subheader("Comparativa entre ediciones")
+        st.dataframe(edition_summary(), use_container_width=True, hide_index=True)
+
+
+def render_grupo_profiles(ctx):
+    """Competencias per grupo: code heatmap and category shares, Fase 1 vs Fase 3."""
+    profiles = get_grupo_profiles()
+    if profiles.empty:
+        return
+    st.subheader("Perfil de competencias por grupo")
+    col1, col2 = st.columns(2)
+    fase = col1.radio("Fase", list(PROFILE_PHASES), format_func=PROFILE_PHASES.get,
+                      horizontal=True, key="profile_fase")
+    values = col2.selectbox("Valores", PROFILE_VALUES, key="profile_values",
+                            help="Media por estudiante: menciones de cada competencia por estudiante del grupo. "
+                                 "% de menciones: cada fila suma 100.")
+    st.plotly_chart(get_grupo_heatmap(fase, values), use_container_width=True)
+
+    by_cat = get_category_profiles()
+    by_cat = by_cat[by_cat.index.get_level_values("fase") != "total"].unstack("fase")
+    labels = {k: v["label"] for k, v in ctx.catalog().by_category.items()}
+    by_cat.columns = [f"{labels.get(cat, cat)} — {PROFILE_PHASES[fase]} (%)" for cat, fase in by_cat.columns]
+    st.markdown("**Reparto por categoría (Fase 1 vs Fase 3)**")
+    st.dataframe(by_cat.rename(index={COHORT: "Todos los grupos"}).rename_axis("Grupo").reset_index(),
+                 use_container_width=True, hide_index=True)
+
+
+def _nunique(df, col):
+    return df[col].nunique() if col in df.columns else 0
+
+
+def edition_summary():
+    """One row per edition (archived ones from the local archive): participation per phase."""
+    rows = []
+    for edition in get_editions():
+        f1, f2, f3 = (get_edition_frame(sheet, edition) for sheet in (SHEET_FASE1, SHEET_FASE2, SHEET_FASE3))
+        users = set()
+        for df in (f1, f2, f3):
+            if "usuario" in df.columns:
+                users.update(df["usuario"].astype(str))
+        f3_comp = f3[f3["empresa_nombre"] != "REFLEXION_GENERAL"] if "empresa_nombre" in f3.columns else f3
+        rows.append({
+            "Edición": edition,
+            "Estudiantes": len(users - {""}),
+            "Fase 1": _nunique(f1, "usuario"),
+            "Fase 2": _nunique(f2, "usuario"),
+            "Fase 3": _nunique(f3, "usuario"),
+            "Empresas analizadas": _nunique(f1, "empresa_nombre"),
+            "Conversaciones": len(f2),
+            "Competencias v2": len(f3_comp),
+        })
+    return pd.DataFrame(rows)
+
 
-def render_competencias_tab():
+def render_competencias_tab(ctx):
     """Analysis of competencias mentioned across phases."""
-    df_f1 = get_fase1_data()
-    df_f3 = get_fase3_data()
+    df_f1 = ctx.projection(SHEET_FASE1, COMPETENCIA_COLUMNS)
+    df_f3 = ctx.projection(SHEET_FASE3, COMPETENCIA_COLUMNS)
 
     st.subheader("Competencias más seleccionadas")
 
-    all_comps = get_competencias_flat()
+    catalog = ctx.catalog()
 
     if not df_f1.empty and "competencia_codigo" in df_f1.columns:
         st.markdown("**Fase 1 — Hipótesis pre-evento**")
         comp_counts_f1 = df_f1["competencia_codigo"].value_counts()
+        comp_counts_f1 = comp_counts_f1[comp_counts_f1 > 0]  # categorical: drop unused codes
 
         comp_df = pd.DataFrame({
             "Código": comp_counts_f1.index,
             "Menciones": comp_counts_f1.values,
-            "Descripción": [all_comps.get(c, c) for c in comp_counts_f1.index],
-            "Categoría": [get_competencia_category(c) or "?" for c in comp_counts_f1.index],
+            "Descripción": [catalog.descriptions.get(c, c) for c in comp_counts_f1.index],
+            "Categoría": [catalog.category(c) or "?" for c in comp_counts_f1.index],
         })
 
         fig = px.bar(
             comp_df.head(15), x="Menciones", y="Código",
             color="Categoría", orientation="h",
-            color_discrete_map={"COM": "#6C63FF", "CON": "#2ECC71", "HAB": "#E67E22"},
+            color_discrete_map={k: v["color"] for k, v in CATEGORIAS.items()},
             hover_data=["Descripción"],
         )
         fig.update_layout(yaxis=dict(autorange="reversed"), height=500)
@@ -138,6 +212,7 @@ def render_competencias_tab():
         df_changes = df_f3[df_f3["cambio_vs_v1"] != ""]
         if not df_changes.empty:
             change_counts = df_changes["cambio_vs_v1"].value_counts()
+            change_counts = change_counts[change_counts > 0]
             fig = px.pie(
                 values=change_counts.values, names=change_counts.index,
                 color_discrete_sequence=["#2ECC71", "#6C63FF", "#E74C3C", "#F39C12"],
@@ -146,10 +221,16 @@ def render_competencias_tab():
             st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("Aún no hay datos de cambios v1 → v2.")
+        render_transitions_section(catalog)
     else:
         st.info("Aún no hay datos de Fase 3.")
 
-    df_f2 = get_fase2_data()
+    render_demand_section(ctx)
+    render_heatmap_section()
+    render_accuracy_section()
+    render_similarity_section()
+
+    df_f2 = ctx.projection(SHEET_FASE2, ("gap_universidad",))
     if not df_f2.empty and "gap_universidad" in df_f2.columns:
         st.divider()
         st.subheader("Lo que las empresas echan en falta (respuestas textuales)")
@@ -160,42 +241,317 @@ def render_competencias_tab():
         else:
             st.info("Aún no hay respuestas sobre el gap universidad-empresa.")
 
+    if not ctx.projection(SHEET_FASE2, ("usuario",)).empty:
+        st.divider()
+        render_fase2_search()
+
+
+def render_transitions_section(catalog):
+    """Which Fase 1 codes students replaced in Fase 3, and by what."""
+    pairs = get_transition_pairs()
+    if pairs.empty:
+        return
+    st.markdown("**Transiciones v1 → v2**")
+    st.caption("Para cada estudiante, empresa y categoría revisadas en Fase 3: competencia de Fase 1 → competencia de Fase 3. "
+               "En verde, las que se mantuvieron.")
+    grupos = sorted(g for g in pairs["grupo"].dropna().unique() if g not in ("", "nan"))
+    grupo = st.selectbox("Grupo", ["Todos"] + grupos, key="transitions_grupo")
+    grupo = None if grupo == "Todos" else grupo
+    matrix = get_transition_matrix(grupo)
+    if matrix.empty:
+        st.info("No hay transiciones para ese grupo.")
+        return
+    st.plotly_chart(get_transition_sankey(grupo), use_container_width=True)
+    abandoned = abandoned_hypotheses(matrix)
+    abandoned = abandoned[abandoned["abandono"] > 0]
+    if not abandoned.empty:
+        st.markdown("**Hipótesis más abandonadas**")
+        abandoned = abandoned.assign(
+            abandono=(abandoned["abandono"] * 100).round().astype(int).astype(str) + " %",
+            descripcion=abandoned["codigo"].map(catalog.descriptions),
+        )
+        st.dataframe(
+            abandoned.rename(columns={
+                "codigo": "Código", "descripcion": "Descripción", "elegida": "Elegida (F1)",
+                "mantenida": "Mantenida", "abandono": "Abandono",
+                "sustituida_por": "Sustituida sobre todo por", "veces": "Veces",
+            })[["Código", "Descripción", "Elegida (F1)", "Mantenida", "Abandono", "Sustituida sobre todo por", "Veces"]],
+            use_container_width=True, hide_index=True,
+        )
+
 
-def render_datos_tab():
-    """Raw data export."""
-    st.subheader("Exportar datos")
+def render_demand_section(ctx):
+    """Competencias the companies asked for, matched from the Fase 2 notes."""
+    demand = get_demand()
+    if demand.empty:
+        return
+    catalog = ctx.catalog()
+    st.divider()
+    st.subheader("Demanda observada en las conversaciones (Fase 2)")
+    st.caption("Competencias del catálogo que coinciden con lo que las empresas dijeron buscar "
+               "(habilidades técnicas, competencias blandas y perfiles). Asignación automática por texto.")
+    by_code = demand.groupby("competencia_codigo")["menciones"].sum().sort_values(ascending=False)
+    demand_df = pd.DataFrame({
+        "Código": by_code.index,
+        "Conversaciones": by_code.values,
+        "Descripción": [catalog.descriptions.get(c, c) for c in by_code.index],
+        "Categoría": [catalog.category(c) or "?" for c in by_code.index],
+    })
+    fig = px.bar(
+        demand_df.head(15), x="Conversaciones", y="Código",
+        color="Categoría", orientation="h",
+        color_discrete_map={k: v["color"] for k, v in CATEGORIAS.items()},
+        hover_data=["Descripción"],
+    )
+    fig.update_layout(yaxis=dict(autorange="reversed"), height=450)
+    st.plotly_chart(fig, use_container_width=True)
+    with st.expander("Demanda por empresa"):
+        st.dataframe(
+            demand.rename(columns={
+                "empresa_nombre": "Empresa", "competencia_codigo": "Código", "menciones": "Conversaciones",
+            }),
+            use_container_width=True, hide_index=True,
+        )
 
-    option = st.selectbox("Selecciona la fase:", [
-        "Estudiantes", "Fase 1 - Pre-evento", "Fase 2 - Durante evento", "Fase 3 - Post-evento"
-    ])
 
-    if option == "Estudiantes":
-        data = get_students()
-    elif option == "Fase 1 - Pre-evento":
-        data = get_fase1_data()
-    elif option == "Fase 2 - Durante evento":
-        data = get_fase2_data()
+def render_heatmap_section():
+    """Empresa x competencia heatmap for one phase."""
+    st.divider()
+    st.subheader("Mapa empresa × competencia")
+    col1, col2 = st.columns(2)
+    phase = col1.radio("Fase", HEATMAP_PHASES, horizontal=True, key="heatmap_phase")
+    norm = col2.selectbox("Normalización", HEATMAP_NORMS, key="heatmap_norm",
+                          help="% por empresa: cada fila suma 100. % por competencia: cada columna suma 100.")
+    if get_company_code_crosstab(phase).empty:
+        st.info("Aún no hay datos para esa fase.")
+        return
+    st.plotly_chart(get_company_code_heatmap(phase, norm), use_container_width=True)
+
+
+def render_similarity_section():
+    """Students with the most similar Fase 1 / Fase 3 selections."""
+    peers = get_peer_index()
+    if len(peers.users) < 2:
+        return
+    st.divider()
+    st.subheader("Estudiantes parecidos")
+    col1, col2 = st.columns([3, 1])
+    labels = dict(zip(peers.users, peers.names))
+    usuario = col1.selectbox("Estudiante", list(peers.users), key="similar_user",
+                             format_func=lambda u: f"{labels[u]} ({u})" if labels[u] else u)
+    metric = col2.radio("Medida", SIMILARITY_METRICS, format_func=str.capitalize, key="similar_metric")
+    similar = peers.similar(usuario, metric=metric)
+    if similar.empty:
+        st.info("Ningún estudiante comparte competencias con este.")
     else:
-        data = get_fase3_data()
+        st.dataframe(
+            similar.assign(similitud=(similar["similitud"] * 100).round().astype(int).astype(str) + " %").rename(columns={
+                "usuario": "Usuario", "nombre": "Nombre", "grupo": "Grupo",
+                "similitud": "Similitud", "en_comun": "Competencias en común",
+            }),
+            use_container_width=True, hide_index=True,
+        )
+        companies = peers.peer_companies(usuario, metric=metric)
+        if not companies.empty:
+            st.markdown("**Empresas que analizaron sus compañeros más parecidos y este estudiante no**")
+            st.dataframe(
+                companies.rename(columns={
+                    "empresa_nombre": "Empresa", "companeros": "Compañeros", "puntuacion": "Puntuación",
+                }),
+                use_container_width=True, hide_index=True,
+            )
+    with st.expander("Pares más parecidos de todo el grupo"):
+        pairs = peers.most_similar_pairs(metric=metric)
+        st.dataframe(
+            pairs.assign(similitud=(pairs["similitud"] * 100).round().astype(int).astype(str) + " %").rename(columns={
+                "usuario_a": "Estudiante A", "usuario_b": "Estudiante B",
+                "similitud": "Similitud", "en_comun": "Competencias en común",
+            }),
+            use_container_width=True, hide_index=True,
+        )
+
+
+ACCURACY_COLUMNS = {
+    "pares": "Empresas analizadas", "hipotesis": "Hipótesis (F1)", "observadas": "Observadas",
+    "aciertos": "Aciertos", "precision": "Precisión", "recall": "Cobertura", "f1": "F1",
+}
 
-    if isinstance(data, list):
-        df = pd.DataFrame(data)
+
+def _accuracy_table(df, keys):
+    """Accuracy counts with Spanish headers and rates as percentages."""
+    table = df[keys + list(ACCURACY_COLUMNS)].copy()
+    for col in ("precision", "recall", "f1"):
+        table[col] = (table[col] * 100).round().astype(int).astype(str) + " %"
+    return table.rename(columns={**ACCURACY_COLUMNS, "usuario": "Usuario", "grupo": "Grupo", "empresa": "Empresa"})
+
+
+def render_accuracy_section():
+    """How well the Fase 1 hypotheses matched what was observed for each company."""
+    accuracy = get_accuracy()
+    if accuracy.pairs.empty:
+        return
+    st.divider()
+    st.subheader("Precisión de las hipótesis de Fase 1")
+    st.caption("Para cada estudiante y empresa se comparan las competencias de Fase 1 con las observadas después: "
+               "las que otros compañeros mantuvieron en Fase 3 para esa empresa y las que aparecen en las notas de Fase 2. "
+               "Precisión = hipótesis acertadas / hipótesis; cobertura = acertadas / observadas.")
+    st.markdown("**Por grupo**")
+    st.dataframe(_accuracy_table(accuracy.grupos, ["grupo"]), use_container_width=True, hide_index=True)
+    st.markdown("**Por empresa**")
+    by_emp = _accuracy_table(accuracy.empresas, ["empresa"]).rename(columns={"Empresas analizadas": "Estudiantes"})
+    st.dataframe(by_emp, use_container_width=True, hide_index=True)
+    with st.expander(f"Por estudiante ({len(accuracy.students)})"):
+        st.dataframe(_accuracy_table(accuracy.students, ["usuario", "grupo"]), use_container_width=True, hide_index=True)
+
+
+SEARCH_LIMIT = 50
+
+
+def render_fase2_search():
+    """Full-text search across the Fase 2 conversation notes."""
+    st.subheader("Buscar en las conversaciones (Fase 2)")
+    query = st.text_input("Palabras a buscar", placeholder="SEO, Figma, portfolio…", key="fase2_query")
+    if not query.strip():
+        return
+    hits = search_fase2(query, limit=SEARCH_LIMIT + 1)
+    if not hits:
+        st.info("Ninguna conversación contiene todas esas palabras.")
+        return
+    if len(hits) > SEARCH_LIMIT:
+        st.caption(f"Más de {SEARCH_LIMIT} conversaciones; se muestran las {SEARCH_LIMIT} más relevantes.")
     else:
-        df = data
+        st.caption(f"{len(hits)} conversación(es).")
+    for hit in hits[:SEARCH_LIMIT]:
+        st.markdown(f"**{hit.row.get('nombre') or hit.row.get('usuario')}** · {hit.row.get('empresa_nombre') or '—'}")
+        for col, text in hit.fields:
+            st.markdown(f"> *{SEARCH_FIELDS[col]}:* {text}")
+
+
+DATOS_SHEETS = {
+    "Estudiantes": SHEET_USUARIOS,
+    "Fase 1 - Pre-evento": SHEET_FASE1,
+    "Fase 2 - Durante evento": SHEET_FASE2,
+    "Fase 3 - Post-evento": SHEET_FASE3,
+}
+BROWSE_FILTERS = {
+    "grupo": "Grupo",
+    "usuario": "Usuario",
+    "empresa_nombre": "Empresa",
+    "competencia_codigo": "Competencia",
+}
+PAGE_SIZES = (25, 50, 100, 200)
+
+
+def render_datos_tab(ctx):
+    """Raw data browser (filtered and paged server-side) and on-demand exports."""
+    st.subheader("Datos brutos")
+
+    option = st.selectbox("Selecciona la fase:", list(DATOS_SHEETS))
+    sheet_name = DATOS_SHEETS[option]
+    index = get_sheet_index(sheet_name)
+    df = index.frame
+
+    if df.empty:
+        st.info(f"No hay datos en {option} todavía.")
+    else:
+        render_data_browser(index, sheet_name)
+
+    st.markdown("**Exportar**")
+    fmt = st.radio("Formato", list(FORMATS), format_func=lambda f: FORMATS[f][0], horizontal=True)
+    label, mime = FORMATS[fmt]
+    col1, col2 = st.columns(2)
+    with col1:
+        if not df.empty:
+            _prepared_download(
+                ("sheet", sheet_name, fmt, index.version),
+                f"Preparar {label} — {option}",
+                lambda: export_frame(df, fmt, sheet_name),
+                f"techconnect_{option.lower().replace(' ', '_')}.{fmt}", mime,
+            )
+    with col2:
+        st.caption("Las hojas de cada hoja de cálculo se leen a la vez, en el mismo instante; versiones.csv indica la versión de cada una.")
+        _prepared_download(
+            ("zip", fmt),
+            f"Preparar ZIP con todas las hojas ({label})",
+            lambda: export_zip(take_snapshots(), fmt),
+            f"techconnect_{get_edition()}_{fmt}.zip", "application/zip",
+        )
 
-    if not df.empty:
-        st.dataframe(df, use_container_width=True, hide_index=True)
-        csv = df.to_csv(index=False).encode("utf-8")
+
+def render_data_browser(index, sheet_name):
+    """Only the rows of the current page are sent to the browser."""
+    filter_cols = index.filter_columns
+    filters = {}
+    for col, slot in zip(filter_cols, st.columns(len(filter_cols)) if filter_cols else []):
+        labels = index.labels[col]
+        with slot:
+            filters[col] = st.multiselect(
+                BROWSE_FILTERS[col], index.options(col),
+                format_func=lambda v, labels=labels: labels[v], key=f"browse_{sheet_name}_{col}",
+            )
+
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        sort_col = st.selectbox("Ordenar por", [""] + list(index.frame.columns),
+                                format_func=lambda c: c or "(orden de la hoja)", key=f"browse_{sheet_name}_sort")
+    with col2:
+        descending = st.toggle("Descendente", key=f"browse_{sheet_name}_desc")
+    with col3:
+        page_size = st.selectbox("Filas por página", PAGE_SIZES, key="browse_page_size")
+
+    positions = index.sort(index.select(filters), sort_col, ascending=not descending)
+    total = len(positions)
+    if not total:
+        st.info("Ninguna fila coincide con los filtros.")
+        return
+    n_pages = -(-total // page_size)
+    state = (sheet_name, tuple((c, tuple(v)) for c, v in filters.items()), page_size)
+    page = st.number_input(f"Página (de {n_pages})", 1, n_pages, 1, key=f"browse_page_{hash(state)}")
+    first = (page - 1) * page_size
+    st.caption(f"Filas {first + 1}–{min(first + page_size, total)} de {total} (de {len(index)} en la hoja)")
+    st.dataframe(index.page(positions, page, page_size), use_container_width=True, hide_index=True)
+
+
+def _prepared_download(key, label, build, file_name, mime):
+    """
+    Build an export only when its button is clicked; the download stays offered
+    while the selection (and, for one sheet, the data version) is unchanged.
+    One prepared file per session.
+    """
+    prepared = st.session_state.get("export")
+    if st.button(label, key=f"prepare_{key[0]}"):
+        try:
+            with st.spinner("Preparando archivo…"):
+                prepared = {"key": key, "data": build(), "file_name": file_name, "mime": mime}
+        except Exception as e:
+            st.error(f"Error: {e}")
+            return
+        st.session_state.export = prepared
+    if prepared and prepared["key"] == key:
         st.download_button(
-            f"Descargar CSV — {option}",
-            csv, f"techconnect_{option.lower().replace(' ', '_')}.csv",
-            "text/csv"
+            f"Descargar {prepared['file_name']}", prepared["data"],
+            prepared["file_name"], prepared["mime"], key=f"download_{key[0]}",
         )
-    else:
-        st.info(f"No hay datos en {option} todavía.")
 
 
-def render_config_tab():
+def render_failed_writes():
+    """Saves Google Sheets rejected for good (not outages), with a retry button."""
+    failed = get_failed_writes()
+    if not failed:
+        return
+    st.markdown("**Guardados rechazados por Google Sheets**")
+    st.caption("No se reintentan solos. Corrige la causa (por ejemplo, inicializa las hojas si falta una pestaña) "
+               "y pulsa Reintentar.")
+    st.dataframe(pd.DataFrame([{
+        "Hoja": ev.sheet, "Operación": ev.op, "Clave": " / ".join(map(str, ev.key)),
+        "Filas": len(ev.rows), "Guardado": ev.ts[:16].replace("T", " "),
+        "Rechazado": failed_at[:16].replace("T", " "), "Error": error,
+    } for ev, failed_at, error in failed]), use_container_width=True, hide_index=True)
+    if st.button("Reintentar"):
+        st.success(f"{retry_failed_writes()} guardado(s) en cola de nuevo.")
+
+
+def render_config_tab(ctx):
     """Configuration: manage empresas, competencias and initialize sheets."""
     st.subheader("Configuración")
 
@@ -209,6 +565,34 @@ def render_config_tab():
         except Exception as e:
             st.error(f"Error: {e}")
 
+    if get_write_mode() == "append":
+        st.markdown("**Compactar hojas de fases**")
+        st.caption("Elimina las versiones antiguas de respuestas editadas. Se hace también automáticamente cada cierto tiempo.")
+        if st.button("Compactar ahora"):
+            try:
+                removed = compact_phase_sheets()
+                st.success(f"Filas eliminadas: {sum(removed.values())}.")
+            except Exception as e:
+                st.error(f"Error: {e}")
+
+    render_failed_writes()
+
+    st.markdown(f"**Archivar ediciones anteriores** · edición activa: {get_edition()}")
+    st.caption("Guarda en local las hojas de fases de una edición pasada para compararla con la actual. "
+               "La edición activa se cambia con `edition` en secrets.toml.")
+    with st.form("archive_edition"):
+        edition = st.text_input("Edición", placeholder="2026")
+        drop = st.checkbox("Eliminar después sus pestañas de Google Sheets")
+        if st.form_submit_button("Archivar edición") and edition.strip():
+            try:
+                archived = archive_edition(edition, drop=drop)
+                if archived:
+                    st.success(f"Edición {edition.strip()} archivada ({sum(archived.values())} filas).")
+                else:
+                    st.warning(f"No hay hojas de la edición {edition.strip()}.")
+            except Exception as e:
+                st.error(f"Error: {e}")
+
     st.divider()
 
     # ---- COMPETENCIAS MANAGEMENT ----
@@ -265,7 +649,7 @@ def render_config_tab():
     if competencias:
         with st.expander("Eliminar una competencia"):
             codes = [c["codigo"] for c in competencias]
-            flat = get_competencias_flat()
+            flat = ctx.catalog().descriptions
             del_code = st.selectbox(
                 "Selecciona la competencia a eliminar:",
                 codes,
@@ -273,9 +657,11 @@ def render_config_tab():
             )
             if st.button("Eliminar", type="secondary"):
                 try:
-                    delete_competencia(del_code)
-                    st.success(f"Competencia {del_code} eliminada.")
-                    st.rerun()
+                    if delete_competencia(del_code):
+                        st.success(f"Competencia {del_code} eliminada.")
+                        st.rerun()
+                    else:
+                        st.info(f"Sin conexión: la eliminación de {del_code} se enviará automáticamente.")
                 except Exception as e:
                     st.error(f"Error: {e}")
 
@@ -284,7 +670,7 @@ def render_config_tab():
     # ---- EMPRESAS MANAGEMENT ----
     st.markdown("**Gestionar empresas del Tech Connect**")
 
-    empresas = get_empresas()
+    empresas = ctx.empresas()
     if empresas:
         st.dataframe(pd.DataFrame(empresas), use_container_width=True, hide_index=True)
 
@@ -299,16 +685,91 @@ def render_config_tab():
             emp_desc = st.text_area("Descripción breve", height=80)
 
         if st.form_submit_button("Añadir empresa"):
-            if emp_nombre:
-                emp_id = emp_nombre.lower().replace(" ", "_")[:20]
-                add_empresa({
-                    "id": emp_id,
-                    "nombre": emp_nombre,
-                    "sector": emp_sector,
-                    "web": emp_web,
-                    "descripcion": emp_desc,
-                })
-                st.success(f"Empresa '{emp_nombre}' añadida.")
-                st.rerun()
-            else:
+            existing_names = {str(e.get("nombre", "")).strip().lower() for e in empresas}
+            if not emp_nombre:
                 st.warning("Introduce al menos el nombre de la empresa.")
+            elif emp_nombre.strip().lower() in existing_names:
+                st.warning(f"La empresa '{emp_nombre}' ya existe.")
+            else:
+                try:
+                    written = add_empresa({
+                        "id": empresa_id(emp_nombre),
+                        "nombre": emp_nombre,
+                        "sector": emp_sector,
+                        "web": emp_web,
+                        "descripcion": emp_desc,
+                    })
+                except (WriteRejected, *SHEETS_ERRORS) as e:
+                    st.error(f"No se pudo añadir la empresa: {e}")
+                else:
+                    if written:
+                        st.success(f"Empresa '{emp_nombre}' añadida.")
+                        st.rerun()
+                    else:
+                        st.warning(f"Sin conexión: la empresa '{emp_nombre}' queda en el registro local "
+                                   "y se enviará automáticamente.")
+
+    st.divider()
+    render_import_section(ctx)
+
+
+IMPORT_TARGETS = {
+    "Estudiantes": (SHEET_USUARIOS, add_usuarios_bulk),
+    "Empresas": (SHEET_EMPRESAS, add_empresas_bulk),
+}
+IMPORT_TARGETS_BY_SHEET = {sheet: add_bulk for sheet, add_bulk in IMPORT_TARGETS.values()}
+
+
+def render_import_section(ctx):
+    """Bulk CSV/XLSX import of students or companies, written in chunks."""
+    st.markdown("**Importar desde archivo (CSV o Excel)**")
+    st.caption("Estudiantes: columnas usuario, password, nombre, grupo (sin password se genera un código de acceso). "
+               "Empresas: nombre, sector, web, descripcion. Las filas que ya existen se omiten.")
+
+    target = st.radio("Importar", list(IMPORT_TARGETS), horizontal=True, key="import_target")
+    sheet_name, add_bulk = IMPORT_TARGETS[target]
+    upload = st.file_uploader("Archivo", type=["csv", "xlsx"], key="import_file")
+
+    job = st.session_state.get("import_job")
+    if upload is not None and st.button("Importar", type="primary"):
+        existing = ctx.usuarios() if sheet_name == SHEET_USUARIOS else ctx.empresas()
+        try:
+            job = plan_import(sheet_name, read_records(upload, upload.name, sheet_name), existing)
+        except Exception as e:
+            st.error(f"No se pudo leer el archivo: {e}")
+            return
+        st.session_state.import_job = job
+        _run_import(job, add_bulk)
+    elif job is not None and not job.finished:
+        st.warning(f"Importación interrumpida: {job.done}/{len(job.rows)} filas escritas.")
+        if st.button("Continuar importación"):
+            _run_import(job, IMPORT_TARGETS_BY_SHEET[job.sheet_name])
+
+    if job is not None and job.finished:
+        _render_import_result(job)
+
+
+def _run_import(job, add_bulk):
+    bar = st.progress(0.0, text="Importando…")
+    try:
+        while not job.finished:
+            job.step(add_bulk)
+            bar.progress(job.done / len(job.rows), text=f"Importando… {job.done}/{len(job.rows)}")
+    except Exception as e:
+        st.error(f"Error al escribir (se puede continuar): {e}")
+    bar.empty()
+
+
+def _render_import_result(job):
+    st.success(f"{job.sheet_name}: {len(job.rows)} añadidos, {len(job.skipped)} omitidos de {job.total} filas.")
+    if job.held:
+        st.info("Sin conexión con Google Sheets: las filas quedan guardadas y se enviarán automáticamente.")
+    if job.skipped:
+        with st.expander(f"Filas omitidas ({len(job.skipped)})"):
+            st.dataframe(pd.DataFrame(job.skipped, columns=["Fila", "Motivo"]), hide_index=True)
+    if job.generated:
+        codes = pd.DataFrame(job.generated, columns=["usuario", "password"])
+        st.download_button(
+            f"Descargar códigos de acceso generados ({len(codes)})",
+            codes.to_csv(index=False).encode("utf-8-sig"), "codigos_acceso.csv", "text/csv",
+        )
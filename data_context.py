@@ -0,0 +1,107 @@
+"""
+Per-run data context for TechConnect Skills Map.
+Built once at the top of each script run and passed to every renderer, so each
+snapshot and each per-user partition is resolved at most once per rerun.
+"""
+
+from sheets_backend import (
+    SHEET_FASE1, SHEET_FASE2, SHEET_FASE3,
+    get_snapshot, get_projection, get_usuarios, get_empresas, get_catalog,
+)
+
+
+def filter_user_rows(df, usuario, nombre):
+    """Rows of df belonging to a student (by usuario, falling back to nombre / legacy 'estudiante')."""
+    if df is None or df.empty:
+        return df
+    if "usuario" in df.columns and usuario:
+        result = df[df["usuario"].astype(str).str.strip().str.lower() == usuario.strip().lower()]
+        if not result.empty:
+            return result
+    if "nombre" in df.columns and nombre:
+        result = df[df["nombre"].astype(str).str.strip().str.lower() == nombre.strip().lower()]
+        if not result.empty:
+            return result
+    if "estudiante" in df.columns and nombre:
+        result = df[df["estudiante"].astype(str).str.strip().str.lower() == nombre.strip().lower()]
+        if not result.empty:
+            return result
+    return df.iloc[0:0]
+
+
+class DataContext:
+    """Memoized access to snapshots for one script run. Create a new one per rerun."""
+
+    def __init__(self, usuario="", nombre=""):
+        self.usuario = usuario or ""
+        self.nombre = nombre or ""
+        self._frames = {}
+        self._mine = {}
+        self._memo = {}
+
+    def _once(self, key, loader):
+        if key not in self._memo:
+            self._memo[key] = loader()
+        return self._memo[key]
+
+    # ---- cohort-level ----
+    def frame(self, sheet_name):
+        """Whole-cohort frame of a phase sheet (shared read-only view)."""
+        if sheet_name not in self._frames:
+            self._frames[sheet_name] = get_snapshot(sheet_name).view()
+        return self._frames[sheet_name]
+
+    def projection(self, sheet_name, columns):
+        """Whole-cohort frame with only the named columns, for aggregate-only views."""
+        key = (sheet_name, tuple(columns))
+        if key not in self._frames:
+            self._frames[key] = get_projection(sheet_name, columns).view()
+        return self._frames[key]
+
+    def version(self, sheet_name):
+        return get_snapshot(sheet_name).version
+
+    @property
+    def fase1(self):
+        return self.frame(SHEET_FASE1)
+
+    @property
+    def fase2(self):
+        return self.frame(SHEET_FASE2)
+
+    @property
+    def fase3(self):
+        return self.frame(SHEET_FASE3)
+
+    # ---- current student ----
+    def mine(self, sheet_name):
+        """Rows of a phase sheet belonging to the current student."""
+        if sheet_name not in self._mine:
+            self._mine[sheet_name] = filter_user_rows(self.frame(sheet_name), self.usuario, self.nombre)
+        return self._mine[sheet_name]
+
+    @property
+    def my_fase1(self):
+        return self.mine(SHEET_FASE1)
+
+    @property
+    def my_fase2(self):
+        return self.mine(SHEET_FASE2)
+
+    @property
+    def my_fase3(self):
+        return self.mine(SHEET_FASE3)
+
+    # ---- reference sheets ----
+    def usuarios(self):
+        return self._once("usuarios", get_usuarios)
+
+    def empresas(self):
+        return self._once("empresas", get_empresas)
+
+    def empresa_nombres(self):
+        return self._once("empresa_nombres", lambda: [e["nombre"] for e in self.empresas()])
+
+    def catalog(self):
+        """Competencias Catalog (code descriptions, categories, labels)."""
+        return self._once("catalog", get_catalog)
@@ -0,0 +1,108 @@
+"""
+Hypothesis accuracy for TechConnect Skills Map.
+Compares the competencias each student mapped to a company in Fase 1 with what
+was later observed for that company: codes other students kept in Fase 3 and
+codes matched in the Fase 2 notes. Scores the whole cohort at once with joins
+over (usuario, empresa, codigo) triples, cached per data version.
+"""
+
+from collections import namedtuple
+
+import pandas as pd
+
+from analytics import cached_aggregate
+from competency_matcher import get_versioned_evidence
+from sheets_backend import SHEET_FASE1, SHEET_FASE3, get_projection
+
+
+PAIR_KEYS = ["usuario", "empresa"]
+TRIPLE_KEYS = PAIR_KEYS + ["codigo"]
+
+# pairs: one row per (usuario, empresa) with evidence: grupo, hipotesis, observadas, aciertos
+# students / grupos / empresas: those counts summed (pares = pairs scored), with precision, recall and f1
+Accuracy = namedtuple("Accuracy", ["version", "pairs", "students", "grupos", "empresas"])
+
+
+def _triples(df, extra=()):
+    """Normalized, de-duplicated (usuario, empresa, codigo[, extra]) rows with a code."""
+    cols = ["usuario", "empresa_nombre", "competencia_codigo", *extra]
+    if df is None or df.empty or any(c not in df.columns for c in cols):
+        return pd.DataFrame(columns=TRIPLE_KEYS + list(extra))
+    out = pd.DataFrame({
+        "usuario": df["usuario"].astype(str).str.strip().str.lower(),
+        "empresa": df["empresa_nombre"].astype(str).str.strip(),
+        "codigo": df["competencia_codigo"].astype(str).str.strip(),
+        **{c: df[c].astype(str).str.strip() for c in extra},
+    })
+    out = out[(out["codigo"] != "") & (out["empresa"] != "") & (out["empresa"] != "REFLEXION_GENERAL")]
+    return out.drop_duplicates(TRIPLE_KEYS)
+
+
+def _rates(counts):
+    counts = counts.copy()
+    counts["precision"] = (counts["aciertos"] / counts["hipotesis"]).round(3)
+    counts["recall"] = (counts["aciertos"] / counts["observadas"]).round(3)
+    pr = counts["precision"] + counts["recall"]
+    counts["f1"] = (2 * counts["precision"] * counts["recall"] / pr.where(pr > 0)).fillna(0).round(3)
+    return counts
+
+
+def score(f1, f3, evidence):
+    """Accuracy tables from Fase 1 and Fase 3 frames and the Fase 2 demand evidence."""
+    hyp = _triples(f1, extra=("grupo",))
+    kept = _triples(f3)
+
+    # Observed for (usuario, empresa): codes kept in Fase 3 by anyone *else*, or matched in Fase 2
+    support = kept.groupby(["empresa", "codigo"]).size().rename("n_f3").reset_index()
+    if evidence is not None and not evidence.empty:
+        ev = pd.DataFrame({
+            "empresa": evidence["empresa_nombre"].astype(str).str.strip(),
+            "codigo": evidence["competencia_codigo"].astype(str).str.strip(),
+        }).drop_duplicates().assign(en_f2=True)
+    else:
+        ev = pd.DataFrame(columns=["empresa", "codigo", "en_f2"])
+    observed_by_emp = support.merge(ev, on=["empresa", "codigo"], how="outer")
+
+    pairs = hyp.groupby(PAIR_KEYS, as_index=False).agg(grupo=("grupo", "first"), hipotesis=("codigo", "size"))
+    obs = pairs[PAIR_KEYS].merge(observed_by_emp, on="empresa")
+    obs = obs.merge(kept.assign(propia=1), on=TRIPLE_KEYS, how="left")
+    others = obs["n_f3"].fillna(0) - obs["propia"].fillna(0)
+    obs = obs[(others > 0) | obs["en_f2"].eq(True)][TRIPLE_KEYS]
+
+    hits = hyp.merge(obs, on=TRIPLE_KEYS)
+    pairs = (
+        pairs
+        .merge(obs.groupby(PAIR_KEYS).size().rename("observadas").reset_index(), on=PAIR_KEYS, how="left")
+        .merge(hits.groupby(PAIR_KEYS).size().rename("aciertos").reset_index(), on=PAIR_KEYS, how="left")
+        .fillna({"observadas": 0, "aciertos": 0})
+    )
+    pairs = pairs[pairs["observadas"] > 0].astype({"observadas": int, "aciertos": int})
+
+    def by(keys):
+        return _rates(pairs.groupby(keys, as_index=False).agg(
+            pares=("hipotesis", "size"), hipotesis=("hipotesis", "sum"),
+            observadas=("observadas", "sum"), aciertos=("aciertos", "sum"),
+        ))
+
+    return pairs, by(["usuario", "grupo"]), by(["grupo"]), by(["empresa"])
+
+
+def get_accuracy():
+    """
+    Accuracy for the current Fase 1 / Fase 2 / Fase 3 data, computed once per version
+    and shared across sessions (read-only).
+    """
+    f1 = get_projection(SHEET_FASE1, ("usuario", "grupo", "empresa_nombre", "competencia_codigo"))
+    f3 = get_projection(SHEET_FASE3, ("usuario", "empresa_nombre", "competencia_codigo"))
+    demand_version, evidence = get_versioned_evidence()
+    version = (f1.version, f3.version) + demand_version
+    return cached_aggregate(
+        "accuracy", version, (), lambda: Accuracy(version, *score(f1.frame, f3.frame, evidence))
+    )
+
+
+def student_accuracy(usuario):
+    """Row of get_accuracy().students for one student as a dict, or None without evidence."""
+    students = get_accuracy().students
+    row = students[students["usuario"] == str(usuario).strip().lower()]
+    return row.iloc[0].to_dict() if not row.empty else None
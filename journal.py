@@ -0,0 +1,211 @@
+"""
+Local save journal for TechConnect Skills Map.
+Every write to the spreadsheet is first recorded here as an immutable event, so
+any sheet can be rebuilt (now or at a past timestamp) by replaying the log,
+and writes made while Google Sheets is down are kept until they can be sent.
+"""
+
+import json
+import sqlite3
+import threading
+from collections import namedtuple
+from contextlib import closing
+from datetime import datetime
+
+from snapshot_store import CACHE_DIR
+
+
+DB_FILE = "journal.sqlite3"
+
+# Event operations:
+#   "reset"   rows are the whole sheet body (baseline taken from the spreadsheet)
+#   "upsert"  rows replace every row with the event key
+#   "append"  rows are added at the end
+#   "delete"  every row with the event key is removed
+OP_RESET = "reset"
+OP_UPSERT = "upsert"
+OP_APPEND = "append"
+OP_DELETE = "delete"
+
+# Value of the flushed column: 0 pending, 1 written to the spreadsheet, FAILED rejected for good.
+# Failed events are kept (with their error, see failures()) but are neither sent nor replayed.
+FAILED = 2
+
+Event = namedtuple("Event", ["seq", "ts", "sheet", "op", "key", "rows", "request_id", "flushed"])
+
+_lock = threading.Lock()
+
+
+def _connect():
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(CACHE_DIR / DB_FILE), timeout=10)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS events ("
+        "seq INTEGER PRIMARY KEY AUTOINCREMENT, ts TEXT NOT NULL, sheet TEXT NOT NULL, "
+        "op TEXT NOT NULL, key TEXT NOT NULL, rows TEXT NOT NULL, "
+        "request_id TEXT NOT NULL, flushed INTEGER NOT NULL DEFAULT 0)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS events_sheet ON events (sheet, seq)")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS failures ("
+        "seq INTEGER PRIMARY KEY, ts TEXT NOT NULL, error TEXT NOT NULL)"
+    )
+    return conn
+
+
+def record(sheet_name, op, rows=(), key=(), request_id="", flushed=False):
+    """Append an event. Returns its sequence number (None if the disk write failed)."""
+    payload = json.dumps([list(r) for r in rows], ensure_ascii=False, default=str)
+    try:
+        with _lock, closing(_connect()) as conn, conn:
+            cur = conn.execute(
+                "INSERT INTO events (ts, sheet, op, key, rows, request_id, flushed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (datetime.now().isoformat(), sheet_name, op, json.dumps(list(key), ensure_ascii=False),
+                 payload, request_id or "", int(flushed)),
+            )
+            return cur.lastrowid
+    except (OSError, sqlite3.Error):
+        return None
+
+
+def mark_flushed(seq):
+    try:
+        with _lock, closing(_connect()) as conn, conn:
+            conn.execute("UPDATE events SET flushed = 1 WHERE seq = ?", (seq,))
+    except (OSError, sqlite3.Error):
+        pass
+
+
+def mark_failed(seq, error):
+    """Set an event aside: the spreadsheet rejected it and retrying would not help."""
+    try:
+        with _lock, closing(_connect()) as conn, conn:
+            conn.execute("UPDATE events SET flushed = ? WHERE seq = ?", (FAILED, seq))
+            conn.execute(
+                "INSERT OR REPLACE INTO failures (seq, ts, error) VALUES (?, ?, ?)",
+                (seq, datetime.now().isoformat(), str(error)),
+            )
+    except (OSError, sqlite3.Error):
+        pass
+
+
+def failure(seq):
+    """Error an event failed with, or None if it has not failed."""
+    try:
+        with _lock, closing(_connect()) as conn:
+            row = conn.execute(
+                "SELECT f.error FROM failures f JOIN events e ON e.seq = f.seq "
+                "WHERE f.seq = ? AND e.flushed = ?", (seq, FAILED),
+            ).fetchone()
+    except (OSError, sqlite3.Error):
+        return None
+    return row[0] if row else None
+
+
+def failures():
+    """Failed events, oldest first, as (Event, failed_at, error)."""
+    try:
+        with _lock, closing(_connect()) as conn:
+            found = conn.execute(
+                "SELECT e.seq, e.ts, e.sheet, e.op, e.key, e.rows, e.request_id, f.ts, f.error "
+                "FROM events e JOIN failures f ON f.seq = e.seq WHERE e.flushed = ? ORDER BY e.seq",
+                (FAILED,),
+            ).fetchall()
+    except (OSError, sqlite3.Error):
+        return []
+    return [
+        (Event(seq, ts, sheet, op, tuple(json.loads(key)), json.loads(rows), rid, False), failed_at, error)
+        for seq, ts, sheet, op, key, rows, rid, failed_at, error in found
+    ]
+
+
+def retry_failed(seqs=None):
+    """Put failed events (all, or the given seqs) back in the pending queue. Returns how many."""
+    try:
+        with _lock, closing(_connect()) as conn, conn:
+            sql, args = "UPDATE events SET flushed = 0 WHERE flushed = ?", [FAILED]
+            if seqs is not None:
+                seqs = list(seqs)
+                sql += f" AND seq IN ({','.join('?' * len(seqs))})"
+                args += seqs
+            return conn.execute(sql, args).rowcount
+    except (OSError, sqlite3.Error):
+        return 0
+
+
+def events(sheet_name=None, until=None, pending_only=False):
+    """
+    Events in log order, optionally for one sheet, up to a timestamp (ISO string or datetime).
+    Failed events are left out.
+    """
+    where, args = [f"flushed != {FAILED}"], []
+    if sheet_name is not None:
+        where.append("sheet = ?")
+        args.append(sheet_name)
+    if until is not None:
+        where.append("ts <= ?")
+        args.append(until.isoformat() if isinstance(until, datetime) else str(until))
+    if pending_only:
+        where.append("flushed = 0")
+    sql = "SELECT seq, ts, sheet, op, key, rows, request_id, flushed FROM events WHERE " + " AND ".join(where)
+    try:
+        with _lock, closing(_connect()) as conn:
+            found = conn.execute(sql + " ORDER BY seq", args).fetchall()
+    except (OSError, sqlite3.Error):
+        return []
+    return [
+        Event(seq, ts, sheet, op, tuple(json.loads(key)), json.loads(rows), rid, bool(flushed))
+        for seq, ts, sheet, op, key, rows, rid, flushed in found
+    ]
+
+
+def failed_count():
+    try:
+        with _lock, closing(_connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM events WHERE flushed = ?", (FAILED,)).fetchone()[0]
+    except (OSError, sqlite3.Error):
+        return 0
+
+
+def has_events(sheet_name):
+    try:
+        with _lock, closing(_connect()) as conn:
+            return conn.execute("SELECT 1 FROM events WHERE sheet = ? LIMIT 1", (sheet_name,)).fetchone() is not None
+    except (OSError, sqlite3.Error):
+        return False
+
+
+def pending_count(sheet_name=None):
+    """Number of events not yet written to the spreadsheet, optionally for one sheet."""
+    sql, args = "SELECT COUNT(*) FROM events WHERE flushed = 0", ()
+    if sheet_name is not None:
+        sql, args = sql + " AND sheet = ?", (sheet_name,)
+    try:
+        with _lock, closing(_connect()) as conn:
+            return conn.execute(sql, args).fetchone()[0]
+    except (OSError, sqlite3.Error):
+        return 0
+
+
+def replay(schema, evts, base=()):
+    """
+    Fold events over base rows (lists in column order) and return the resulting rows.
+    Keys are matched like the backend does (schema.key_of: stripped, case-insensitive).
+    """
+    rows = [list(r) for r in base]
+    for ev in evts:
+        if ev.op == OP_RESET:
+            rows = [list(r) for r in ev.rows]
+            continue
+        if ev.op in (OP_UPSERT, OP_DELETE):
+            key = tuple(str(v).strip().lower() for v in ev.key)
+            rows = [r for r in rows if schema.key_of(r) != key]
+        if ev.op in (OP_UPSERT, OP_APPEND):
+            rows.extend(list(r) for r in ev.rows)
+    return rows
+
+
+def rebuild(sheet_name, schema, at=None):
+    """Rows of a sheet as of `at` (default: now), replayed from the journal."""
+    return replay(schema, events(sheet_name, until=at))
@@ -0,0 +1,455 @@
+"""
+PDF report generation for TechConnect Skills Map (DIGICOM Lab style).
+Used by the student page (one report) and the admin CLI (one per student).
+"""
+
+import io
+import pathlib
+from sheets_backend import get_edition, get_event_label
+
+
+# ============================================
+# COMPETENCIA COUNTS (shared by the chart page and the PDF)
+# ============================================
+def competencia_counts(catalog, my_f1, my_f3):
+    """
+    {codigo: {v1, v2, empresas_v1, empresas_v2}} for one student's Fase 1 and Fase 3 rows,
+    counting only codes in the catalog.
+    """
+    all_comps = catalog.descriptions
+    comp_data = {}
+    if my_f1 is not None and not my_f1.empty and "competencia_codigo" in my_f1.columns:
+        for _, row in my_f1.iterrows():
+            code = str(row.get("competencia_codigo", ""))
+            if code and code in all_comps:
+                if code not in comp_data:
+                    comp_data[code] = {"v1": 0, "v2": 0, "empresas_v1": [], "empresas_v2": []}
+                comp_data[code]["v1"] += 1
+                emp = row.get("empresa_nombre", "")
+                if emp:
+                    comp_data[code]["empresas_v1"].append(emp)
+
+    if my_f3 is not None and not my_f3.empty and "competencia_codigo" in my_f3.columns:
+        f3_comps = my_f3[my_f3["empresa_nombre"] != "REFLEXION_GENERAL"] if "empresa_nombre" in my_f3.columns else my_f3
+        for _, row in f3_comps.iterrows():
+            code = str(row.get("competencia_codigo", ""))
+            if code and code in all_comps:
+                if code not in comp_data:
+                    comp_data[code] = {"v1": 0, "v2": 0, "empresas_v1": [], "empresas_v2": []}
+                comp_data[code]["v2"] += 1
+                emp = row.get("empresa_nombre", "")
+                if emp:
+                    comp_data[code]["empresas_v2"].append(emp)
+    return comp_data
+
+
+# ============================================
+# PDF GENERATION — Full report, DIGICOM Lab style
+# ============================================
+DARK_BLUE = (26, 26, 46)
+ACCENT_RED = (231, 76, 60)
+MEDIUM_BLUE = (44, 44, 84)
+LIGHT_BG = (248, 249, 250)
+WHITE = (255, 255, 255)
+
+
+class SkillsMapPDF:
+    def __init__(self):
+        from fpdf import FPDF
+
+        logo_dir = pathlib.Path(__file__).parent
+
+        # Find URJC logo - search in multiple possible locations
+        def _find_logo(name):
+            candidates = [
+                logo_dir / name,
+                pathlib.Path(name),
+                pathlib.Path(".") / name,
+                pathlib.Path("/mount/src") / name,
+            ]
+            # Also search common Streamlit Cloud paths
+            import glob
+            found = glob.glob(f"/mount/src/**/{name}", recursive=True)
+            candidates.extend([pathlib.Path(f) for f in found])
+            for p in candidates:
+                if p.exists() and p.stat().st_size > 100:
+                    return p
+            return None
+        _font = ["Helvetica"]  # mutable default, updated after font registration
+
+        # Pre-process URJC logo for header (resize if too large, ensure compatibility)
+        _urjc_path = None
+        urjc_src = _find_logo("logo-urjc.png")
+        if urjc_src:
+            try:
+                from PIL import Image
+                import tempfile
+                im = Image.open(str(urjc_src))
+                # Resize if very large (fpdf2 can struggle with huge images at small display size)
+                if im.width > 500:
+                    ratio = 500 / im.width
+                    im = im.resize((500, int(im.height * ratio)), Image.LANCZOS)
+                # Ensure RGBA for transparency support
+                im = im.convert("RGBA")
+                tmp = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
+                im.save(tmp.name, "PNG")
+                tmp.close()
+                _urjc_path = tmp.name
+            except Exception:
+                _urjc_path = str(urjc_src)  # fallback to original
+
+        class PDF(FPDF):
+            def header(self):
+                self.set_fill_color(*DARK_BLUE)
+                self.rect(0, 0, 210, 22, "F")
+                if _urjc_path:
+                    try:
+                        self.image(_urjc_path, 10, 3, 18)
+                    except Exception:
+                        pass
+                digicom = _find_logo("logo-DIGICOM-Lab-negativo-H.png")
+                if digicom:
+                    try:
+                        self.image(str(digicom), 150, 3, 50)
+                    except Exception:
+                        pass
+                self.set_y(5)
+                self.set_font(_font[0], "B", 10)
+                self.set_text_color(*WHITE)
+                self.cell(0, 5, f"{get_event_label().upper()} — Skills Map", align="C", ln=True)
+                self.set_font(_font[0], "", 7)
+                self.cell(0, 4, "DIGICOM Lab · Grado en Comunicación Digital · URJC", align="C", ln=True)
+                self.set_y(26)
+                self.set_text_color(0, 0, 0)
+
+            def footer(self):
+                self.set_y(-15)
+                self.set_draw_color(*DARK_BLUE)
+                self.line(10, self.get_y(), 200, self.get_y())
+                self.ln(2)
+                self.set_font(_font[0], "", 6.5)
+                self.set_text_color(120, 120, 120)
+                self.cell(0, 4,
+                    f"{get_edition()} – Grado en Comunicación Digital (URJC) | Diseño y desarrollo: Grupo Ciberimaginario",
+                    align="C", ln=True)
+                self.set_font(_font[0], "", 6)
+                self.cell(0, 4, f"Página {self.page_no()}/{{nb}}", align="C")
+
+        self.pdf = PDF()
+        # Register Unicode font — look in app dir first, then system
+        try:
+            app_dir = pathlib.Path(__file__).parent
+            font_paths = {
+                "": None, "B": None, "I": None, "BI": None
+            }
+            font_files = {
+                "": "DejaVuSans.ttf", "B": "DejaVuSans-Bold.ttf",
+                "I": "DejaVuSans-Oblique.ttf", "BI": "DejaVuSans-BoldOblique.ttf"
+            }
+            for style, filename in font_files.items():
+                local = app_dir / filename
+                system = pathlib.Path(f"/usr/share/fonts/truetype/dejavu/{filename}")
+                if local.exists() and local.stat().st_size > 100:
+                    font_paths[style] = str(local)
+                elif system.exists() and system.stat().st_size > 100:
+                    font_paths[style] = str(system)
+
+            if font_paths[""]:
+                for style, path in font_paths.items():
+                    if path:
+                        self.pdf.add_font("DejaVu", style, path)
+                _font[0] = "DejaVu"
+                self.F = "DejaVu"
+            else:
+                self.F = "Helvetica"
+        except Exception:
+            self.F = "Helvetica"
+        self.pdf.alias_nb_pages()
+        self.pdf.set_auto_page_break(auto=True, margin=20)
+
+    def add_cover(self, name, user, group):
+        self.pdf.add_page()
+        self.pdf.ln(20)
+        self.pdf.set_font(self.F, "B", 28)
+        self.pdf.set_text_color(*DARK_BLUE)
+        self.pdf.cell(0, 15, "Skills Map", ln=True, align="C")
+        self.pdf.set_font(self.F, "", 14)
+        self.pdf.set_text_color(*MEDIUM_BLUE)
+        self.pdf.cell(0, 8, "Informe personal de competencias", ln=True, align="C")
+        self.pdf.ln(15)
+        self.pdf.set_fill_color(*LIGHT_BG)
+        self.pdf.set_draw_color(*DARK_BLUE)
+        x = 50
+        self.pdf.rect(x, self.pdf.get_y(), 110, 30, "FD")
+        self.pdf.set_xy(x + 5, self.pdf.get_y() + 5)
+        self.pdf.set_font(self.F, "B", 14)
+        self.pdf.set_text_color(*DARK_BLUE)
+        self.pdf.cell(100, 7, name, align="C", ln=True)
+        self.pdf.set_x(x + 5)
+        self.pdf.set_font(self.F, "", 10)
+        self.pdf.set_text_color(100, 100, 100)
+        self.pdf.cell(100, 6, f"@{user} · Grupo {group}", align="C", ln=True)
+        self.pdf.ln(25)
+        self.pdf.set_font(self.F, "", 10)
+        self.pdf.set_text_color(80, 80, 80)
+        self.pdf.cell(0, 6, f"{get_event_label()} · Lunes 2 de marzo · Campus de Fuenlabrada · URJC", align="C", ln=True)
+
+        # Intro text
+        self.pdf.ln(15)
+        self.pdf.set_font(self.F, "", 9)
+        self.pdf.set_text_color(80, 80, 80)
+        intro = (
+            "Este informe recoge el resultado de tu proceso de evaluación de competencias "
+            f"durante el {get_event_label()}, la actividad de networking profesional del Grado "
+            "en Comunicación Digital de la URJC. A lo largo de tres fases (antes, durante y "
+            "después del evento) has investigado empresas del sector, conversado con profesionales "
+            "y reflexionado sobre las competencias que el mercado demanda. "
+            "Lo que tienes entre manos es tu mapa personal de competencias: una fotografía "
+            "de dónde estás y hacia dónde quieres ir profesionalmente."
+        )
+        self.pdf.multi_cell(190, 5, intro)
+
+    def section_title(self, title, phase_tag=None):
+        self.pdf.ln(5)
+        self.pdf.set_fill_color(*DARK_BLUE)
+        self.pdf.rect(10, self.pdf.get_y(), 190, 8, "F")
+        self.pdf.set_font(self.F, "B", 11)
+        self.pdf.set_text_color(*WHITE)
+        label = f"  {phase_tag} — {title}" if phase_tag else f"  {title}"
+        self.pdf.multi_cell(190, 8, label)
+        self.pdf.set_text_color(0, 0, 0)
+        self.pdf.ln(3)
+
+    def empresa_title(self, name):
+        self.pdf.set_x(10)
+        self.pdf.set_font(self.F, "B", 11)
+        self.pdf.set_text_color(*DARK_BLUE)
+        self.pdf.multi_cell(190, 7, name)
+        self.pdf.ln(1)
+
+    def field(self, label, value):
+        if not value:
+            return
+        self.pdf.set_x(10)
+        self.pdf.set_font(self.F, "B", 9)
+        self.pdf.set_text_color(*DARK_BLUE)
+        self.pdf.multi_cell(190, 5, label + ":")
+        self.pdf.set_x(12)
+        self.pdf.set_font(self.F, "", 8.5)
+        self.pdf.set_text_color(60, 60, 60)
+        self.pdf.multi_cell(188, 4.5, str(value))
+        self.pdf.ln(1.5)
+
+    def competencia(self, code, desc, extra=""):
+        self.pdf.set_x(10)
+        self.pdf.set_font(self.F, "B", 8.5)
+        self.pdf.set_text_color(*MEDIUM_BLUE)
+        self.pdf.multi_cell(190, 5, f"  {code}")
+        if desc:
+            self.pdf.set_x(14)
+            self.pdf.set_font(self.F, "", 8)
+            self.pdf.set_text_color(80, 80, 80)
+            self.pdf.multi_cell(186, 4, desc)
+        if extra:
+            self.pdf.set_x(14)
+            self.pdf.set_font(self.F, "I", 7.5)
+            self.pdf.set_text_color(120, 120, 120)
+            self.pdf.multi_cell(186, 4, extra)
+        self.pdf.ln(1.5)
+
+    def separator(self):
+        self.pdf.set_draw_color(200, 200, 200)
+        self.pdf.line(10, self.pdf.get_y(), 200, self.pdf.get_y())
+        self.pdf.ln(3)
+
+    def add_chart_image(self, img_bytes):
+        """Insert a PNG chart image centered on a new page."""
+        import tempfile, os
+        tmp = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
+        tmp.write(img_bytes)
+        tmp.close()
+        try:
+            self.pdf.add_page()
+            self.section_title("Mapa de competencias — Gráfico comparativo", "ANÁLISIS")
+            # Center the image (190mm wide, keep aspect)
+            self.pdf.image(tmp.name, x=10, y=self.pdf.get_y(), w=190)
+        except Exception:
+            pass
+        finally:
+            os.unlink(tmp.name)
+
+    def output(self):
+        return bytes(self.pdf.output())
+
+
+def _generate_radar_png(all_comps, comp_data):
+    """Generate radar chart as PNG bytes using matplotlib (reliable on all platforms)."""
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        import numpy as np
+
+        codes = list(comp_data.keys())
+        if not codes:
+            return None
+
+        labels = [f"{c}\n{all_comps.get(c, '')[:22]}..." for c in codes]
+        v1 = [comp_data[c]["v1"] for c in codes]
+        v2 = [comp_data[c]["v2"] for c in codes]
+
+        N = len(codes)
+        angles = np.linspace(0, 2 * np.pi, N, endpoint=False).tolist()
+        angles += angles[:1]
+        v1_c = v1 + [v1[0]]
+        v2_c = v2 + [v2[0]]
+
+        fig, ax = plt.subplots(figsize=(8, 6), subplot_kw=dict(polar=True))
+        ax.fill(angles, v1_c, color="#1a1a2e", alpha=0.15)
+        ax.plot(angles, v1_c, color="#1a1a2e", linewidth=2, label="Fase 1 (pre-evento)")
+        ax.fill(angles, v2_c, color="#e74c3c", alpha=0.15)
+        ax.plot(angles, v2_c, color="#e74c3c", linewidth=2, label="Fase 3 (post-evento)")
+
+        ax.set_xticks(angles[:-1])
+        ax.set_xticklabels(labels, size=7)
+        mx = max(max(v1, default=1), max(v2, default=1))
+        ax.set_ylim(0, mx + 1)
+        ax.set_title("Competencias: antes vs después del evento", size=12, fontweight="bold", pad=20)
+        ax.legend(loc="lower center", bbox_to_anchor=(0.5, -0.15), ncol=2, fontsize=9)
+
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png", dpi=150, bbox_inches="tight")
+        plt.close(fig)
+        buf.seek(0)
+        return buf.read()
+    except Exception:
+        return None
+
+
+def generate_full_pdf(catalog, comp_data, my_f1, my_f2, my_f3, student, accuracy=None):
+    """
+    Full PDF report of one student. student = {"usuario", "nombre", "grupo"};
+    accuracy is the student's row of hypothesis_scoring (None to leave it out).
+    """
+    doc = SkillsMapPDF()
+    all_comps = catalog.descriptions
+
+    # COVER
+    doc.add_cover(student["nombre"], student["usuario"], student["grupo"])
+
+    # FASE 1
+    if my_f1 is not None and not my_f1.empty and "empresa_nombre" in my_f1.columns:
+        doc.pdf.add_page()
+        doc.section_title("Análisis de empresas y mapeo de competencias", "FASE 1")
+        for emp in my_f1["empresa_nombre"].unique():
+            emp_data = my_f1[my_f1["empresa_nombre"] == emp]
+            first = emp_data.iloc[0]
+            doc.empresa_title(emp)
+            doc.field("Actividad principal", first.get("actividad_principal", ""))
+            doc.field("Presencia digital", first.get("presencia_digital", ""))
+            doc.field("Perfiles que necesitan", first.get("perfiles_necesitan", ""))
+            if "competencia_codigo" in emp_data.columns:
+                doc.pdf.set_font(doc.F, "B", 9)
+                doc.pdf.set_text_color(*DARK_BLUE)
+                doc.pdf.set_x(10)
+                doc.pdf.multi_cell(190, 5, "Competencias mapeadas (v1):")
+                for _, row in emp_data.iterrows():
+                    code = str(row.get("competencia_codigo", ""))
+                    desc = all_comps.get(code, "")
+                    nivel = row.get("competencia_nivel", "")
+                    justif = row.get("competencia_justificacion", "")
+                    extra = f"Nivel: {nivel}" + (f" · {justif}" if justif else "")
+                    doc.competencia(code, desc, extra)
+            doc.pdf.ln(2)
+            doc.separator()
+
+    # FASE 2
+    if my_f2 is not None and not my_f2.empty:
+        doc.pdf.add_page()
+        doc.section_title("Registros de conversaciones", "FASE 2")
+        for _, row in my_f2.iterrows():
+            doc.empresa_title(row.get("empresa_nombre", ""))
+            persona = row.get("persona_contacto", "")
+            cargo = row.get("cargo_contacto", "")
+            if persona:
+                doc.field("Contacto", f"{persona}" + (f" ({cargo})" if cargo else ""))
+            for label, key in [("Qué hacen en digital", "que_hacen_digital"),
+                               ("Perfiles que buscan", "perfiles_buscan"),
+                               ("Habilidades técnicas", "habilidades_tecnicas"),
+                               ("Competencias blandas", "competencias_blandas"),
+                               ("Gap universidad", "gap_universidad"),
+                               ("Consejo", "consejo")]:
+                doc.field(label, row.get(key, ""))
+            doc.pdf.ln(2)
+            doc.separator()
+
+    # FASE 3 — Competencias v2
+    if my_f3 is not None and not my_f3.empty and "empresa_nombre" in my_f3.columns:
+        comp_rows = my_f3[my_f3["empresa_nombre"] != "REFLEXION_GENERAL"]
+        if not comp_rows.empty:
+            doc.pdf.add_page()
+            doc.section_title("Competencias revisadas (post-evento)", "FASE 3")
+            for emp in comp_rows["empresa_nombre"].unique():
+                doc.empresa_title(emp)
+                for _, row in comp_rows[comp_rows["empresa_nombre"] == emp].iterrows():
+                    code = str(row.get("competencia_codigo", ""))
+                    desc = all_comps.get(code, "")
+                    nivel = row.get("competencia_nivel_v2", "")
+                    justif = row.get("competencia_justificacion_v2", "")
+                    cambio = row.get("cambio_vs_v1", "")
+                    extra = f"Nivel: {nivel} · {cambio}" + (f" · {justif}" if justif else "")
+                    doc.competencia(code, desc, extra)
+                doc.pdf.ln(2)
+                doc.separator()
+
+    # RADAR CHART IMAGE
+    if comp_data:
+        try:
+            chart_bytes = _generate_radar_png(all_comps, comp_data)
+            if chart_bytes:
+                doc.add_chart_image(chart_bytes)
+        except Exception:
+            pass
+
+    # RESUMEN COMPARATIVO
+    if comp_data:
+        doc.pdf.add_page()
+        doc.section_title("Mapa de competencias — Resumen comparativo", "ANÁLISIS")
+        if accuracy:
+            doc.field("Precisión de tus hipótesis",
+                      f"{accuracy['precision']:.0%}: {accuracy['aciertos']} de tus {accuracy['hipotesis']} competencias "
+                      f"de Fase 1 se observaron después en esas empresas (Fase 3 del grupo o notas de Fase 2)")
+            doc.field("Cobertura",
+                      f"{accuracy['recall']:.0%} de las {accuracy['observadas']} competencias observadas en tus empresas")
+            doc.pdf.ln(2)
+        for cat_key, cat in catalog.by_category.items():
+            cat_codes = [c for c in comp_data if catalog.category(c) == cat_key]
+            if cat_codes:
+                doc.pdf.set_font(doc.F, "B", 10)
+                doc.pdf.set_text_color(*MEDIUM_BLUE)
+                doc.pdf.set_x(10)
+                doc.pdf.multi_cell(190, 6, cat["label"])
+                doc.pdf.ln(1)
+                for code in cat_codes:
+                    d = comp_data[code]
+                    desc = all_comps.get(code, "")
+                    emps = list(set(d["empresas_v1"] + d["empresas_v2"]))
+                    extra = f"Fase 1: {d['v1']}x | Fase 3: {d['v2']}x | Empresas: {', '.join(emps)}"
+                    doc.competencia(code, desc, extra)
+                doc.pdf.ln(2)
+
+    # REFLEXIÓN FINAL
+    if my_f3 is not None and not my_f3.empty and "empresa_nombre" in my_f3.columns:
+        ref = my_f3[my_f3["empresa_nombre"] == "REFLEXION_GENERAL"]
+        if not ref.empty:
+            doc.pdf.add_page()
+            doc.section_title("Reflexión final", "CONCLUSIONES")
+            last = ref.iloc[-1]
+            for label, key in [("Competencias más demandadas", "competencias_mas_demandadas"),
+                               ("Gap universidad-empresa", "gap_uni_empresa"),
+                               ("Posicionamiento profesional", "posicionamiento_personal"),
+                               ("Acción principal", "plan_accion"),
+                               ("Valoración de la experiencia", "valoracion_experiencia")]:
+                doc.field(label, last.get(key, ""))
+
+    return doc.output()
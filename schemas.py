@@ -0,0 +1,215 @@
+"""
+Declarative sheet schemas for TechConnect Skills Map.
+One SheetSchema per worksheet: column order, dtypes and key columns.
+Drives headers, row builders, typed DataFrame parsing and A1 ranges.
+"""
+
+from collections import namedtuple
+
+import pandas as pd
+from gspread.utils import rowcol_to_a1
+
+
+# Sheet names
+SHEET_USUARIOS = "Usuarios"
+SHEET_FASE1 = "Fase1_PreEvento"
+SHEET_FASE2 = "Fase2_DuranteEvento"
+SHEET_FASE3 = "Fase3_PostEvento"
+SHEET_EMPRESAS = "Empresas"
+SHEET_COMPETENCIAS = "Competencias"
+
+PHASE_SHEETS = (SHEET_FASE1, SHEET_FASE2, SHEET_FASE3)
+
+# Phase sheets are partitioned per TechConnect edition: the first edition keeps
+# the plain tab names, later ones live in "<sheet>_<edition>" tabs.
+LEGACY_EDITION = "2026"
+
+
+def partition_title(sheet_name, edition):
+    """Worksheet title holding a sheet's rows for an edition."""
+    if sheet_name in PHASE_SHEETS and str(edition) != LEGACY_EDITION:
+        return f"{sheet_name}_{edition}"
+    return sheet_name
+
+
+def base_sheet(title):
+    """Sheet name of a worksheet title (inverse of partition_title)."""
+    base, _, _ = title.rpartition("_")
+    return base if title not in PHASE_SHEETS and base in PHASE_SHEETS else title
+
+# Column dtypes:
+#   "str"      short identifier, kept as string
+#   "text"     free text, kept as string
+#   "category" low-cardinality code, parsed as pandas categorical
+#   "datetime" ISO timestamp
+Column = namedtuple("Column", ["name", "dtype"])
+
+
+def _cols(spec):
+    """'usuario:str nombre:text ...' -> [Column, ...]"""
+    return [Column(*item.split(":")) for item in spec.split()]
+
+
+class SheetSchema:
+    """
+    key:    logical key of a saved entry (an edit replaces all rows with this key)
+    row_id: identity of one row within a save; with request_id it detects rows
+            written twice by a retried append
+    """
+
+    def __init__(self, name, columns, key=(), row_id=(), rows=1000):
+        self.name = name
+        self.columns = columns
+        self.key = tuple(key)
+        self.row_id = tuple(row_id)
+        self.rows = rows
+        self.headers = [c.name for c in columns]
+        self._index = {c.name: i for i, c in enumerate(columns)}
+
+    def col(self, name):
+        """1-based column index of a column."""
+        return self._index[name] + 1
+
+    def row(self, values):
+        """Build a sheet row (column order) from a dict; missing columns are left blank."""
+        return [values.get(name, "") for name in self.headers]
+
+    def key_of(self, row):
+        """Normalized key tuple of a row given as list (sheet order) or dict."""
+        if isinstance(row, dict):
+            vals = [row.get(k, "") for k in self.key]
+        else:
+            vals = [row[self._index[k]] if self._index[k] < len(row) else "" for k in self.key]
+        return tuple(str(v).strip().lower() for v in vals)
+
+    def a1_range(self, first_row, n_rows=1):
+        """A1 range covering full rows first_row..first_row+n_rows-1, e.g. 'A5:M7'."""
+        start = rowcol_to_a1(first_row, 1)
+        end = rowcol_to_a1(first_row + n_rows - 1, len(self.columns))
+        return f"{start}:{end}"
+
+    def dedupe(self, df):
+        """Drop duplicate rows left by a retried save (same request_id and row_id)."""
+        cols = [c for c in self.row_id if c in df.columns]
+        if "request_id" not in cols:
+            return df
+        dup = df.duplicated(subset=cols) & (df["request_id"] != "")
+        return df[~dup].reset_index(drop=True) if dup.any() else df
+
+    @property
+    def versioned(self):
+        """Rows carry a save timestamp, so several saves of one key can coexist."""
+        return bool(self.key) and "timestamp" in self._index
+
+    def resolution_columns(self):
+        """Columns needed by dedupe() and latest()."""
+        cols = list(self.row_id)
+        if self.versioned:
+            cols += list(self.key) + ["timestamp"]
+        return list(dict.fromkeys(cols))
+
+    def latest(self, df):
+        """
+        Latest-wins: for every key keep only the rows of its newest save
+        (all rows of one save share the timestamp). Rows with a blank key part are kept.
+        """
+        if not self.versioned or df.empty or any(k not in df.columns for k in self.key + ("timestamp",)):
+            return df
+        keys = pd.DataFrame({k: df[k].astype(str).str.strip().str.lower() for k in self.key})
+        ts = df["timestamp"]
+        if not pd.api.types.is_datetime64_any_dtype(ts):
+            ts = pd.to_datetime(ts, errors="coerce", format="ISO8601")
+        ts = ts.fillna(pd.Timestamp.min)
+        newest = ts.groupby([keys[k] for k in self.key]).transform("max")
+        blank_key = (keys == "").any(axis=1)
+        keep = (ts == newest) | blank_key
+        return df if keep.all() else df[keep].reset_index(drop=True)
+
+    def superseded(self, rows):
+        """Positions of raw sheet rows (lists in column order) that latest() would drop."""
+        if not self.versioned:
+            return []
+        ts_idx = self._index["timestamp"]
+        keys = [self.key_of(row) for row in rows]
+        stamps = [str(row[ts_idx]) if ts_idx < len(row) else "" for row in rows]
+        newest = {}
+        for key, ts in zip(keys, stamps):
+            if ts > newest.get(key, ""):
+                newest[key] = ts
+        return [
+            i for i, (key, ts) in enumerate(zip(keys, stamps))
+            if "" not in key and ts != newest[key]
+        ]
+
+    def parse(self, records):
+        """Typed DataFrame from get_all_records() output (unknown extra columns kept as-is)."""
+        df = pd.DataFrame(records)
+        for c in self.columns:
+            if c.name not in df.columns:
+                continue
+            if c.dtype == "category":
+                df[c.name] = df[c.name].astype(str).astype("category")
+            elif c.dtype == "datetime":
+                df[c.name] = pd.to_datetime(df[c.name], errors="coerce", format="ISO8601")
+            else:
+                df[c.name] = df[c.name].astype(str)
+        return df
+
+
+SCHEMAS = {
+    SHEET_USUARIOS: SheetSchema(
+        SHEET_USUARIOS,
+        _cols("usuario:str password:str nombre:str grupo:category"),
+        key=("usuario",), rows=200,
+    ),
+    SHEET_COMPETENCIAS: SheetSchema(
+        SHEET_COMPETENCIAS,
+        _cols("codigo:str categoria:category descripcion:text"),
+        key=("codigo",), rows=100,
+    ),
+    SHEET_EMPRESAS: SheetSchema(
+        SHEET_EMPRESAS,
+        _cols("id:str nombre:str sector:str web:str descripcion:text"),
+        key=("nombre",), rows=50,
+    ),
+    SHEET_FASE1: SheetSchema(
+        SHEET_FASE1,
+        _cols(
+            "timestamp:datetime usuario:str nombre:str grupo:category empresa_id:str empresa_nombre:str "
+            "actividad_principal:text presencia_digital:text perfiles_necesitan:text "
+            "competencia_codigo:category competencia_tipo:category competencia_justificacion:text "
+            "competencia_nivel:category request_id:str"
+        ),
+        key=("usuario", "empresa_nombre"),
+        row_id=("request_id", "competencia_codigo"),
+    ),
+    SHEET_FASE2: SheetSchema(
+        SHEET_FASE2,
+        _cols(
+            "timestamp:datetime usuario:str nombre:str grupo:category empresa_nombre:str "
+            "persona_contacto:str cargo_contacto:str contacto_linkedin:str "
+            "que_hacen_digital:text perfiles_buscan:text habilidades_tecnicas:text "
+            "competencias_blandas:text gap_universidad:text oportunidades_practicas:text "
+            "consejo:text sorpresa:text elevator_pitch_usado:text request_id:str"
+        ),
+        key=("usuario", "empresa_nombre"),
+        row_id=("request_id",),
+    ),
+    SHEET_FASE3: SheetSchema(
+        SHEET_FASE3,
+        _cols(
+            "timestamp:datetime usuario:str nombre:str grupo:category empresa_nombre:str "
+            "competencia_codigo:category competencia_tipo:category competencia_justificacion_v2:text "
+            "competencia_nivel_v2:category cambio_vs_v1:category "
+            "competencias_mas_demandadas:text competencias_sorpresa:text gap_uni_empresa:text "
+            "posicionamiento_personal:text plan_accion:text valoracion_experiencia:text request_id:str"
+        ),
+        key=("usuario", "empresa_nombre"),
+        row_id=("request_id", "competencia_codigo"),
+    ),
+}
+
+
+def get_schema(sheet_name):
+    """Schema of a sheet, also accepting an edition's worksheet title."""
+    return SCHEMAS[base_sheet(sheet_name)]
@@ -0,0 +1,107 @@
+"""
+Row indexes over sheet snapshots for TechConnect Skills Map.
+A SheetIndex is built once per snapshot version and answers filter, sort and
+page queries with position arrays, so the dashboard only materializes (and
+sends to the browser) the rows of the page being shown.
+"""
+
+import numpy as np
+import pandas as pd
+
+from sheets_backend import get_snapshot
+
+
+# Columns that can be filtered on, when the sheet has them
+FILTER_COLUMNS = ("grupo", "usuario", "empresa_nombre", "competencia_codigo")
+
+
+def _norm(series):
+    return series.astype(str).str.strip().str.lower()
+
+
+class SheetIndex:
+    """
+    Immutable per-version index of one sheet:
+      postings: {column: {normalized value: sorted row positions}}
+      labels:   {column: {normalized value: value as written in the sheet}}
+    Sort orders are computed on first use and kept for the life of the index.
+    """
+
+    def __init__(self, frame, version=""):
+        self.frame = frame
+        self.version = version
+        self.postings = {}
+        self.labels = {}
+        self._ranks = {}
+        positions = np.arange(len(frame))
+        for col in FILTER_COLUMNS:
+            if col not in frame.columns or frame.empty:
+                continue
+            norm = _norm(frame[col]).to_numpy()
+            kept = positions[norm != ""]
+            keys = norm[kept]
+            groups = pd.Series(kept).groupby(keys)
+            self.postings[col] = {k: kept[idx] for k, idx in groups.indices.items()}
+            shown = frame[col].astype(str).str.strip().to_numpy()[kept]
+            self.labels[col] = pd.Series(shown).groupby(keys).first().to_dict()
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def filter_columns(self):
+        return [c for c in FILTER_COLUMNS if c in self.postings]
+
+    def options(self, col):
+        """Normalized values of a filter column, sorted by how they are written."""
+        labels = self.labels.get(col, {})
+        return sorted(labels, key=lambda v: labels[v].lower())
+
+    def select(self, filters):
+        """
+        Positions of rows matching every filter ({column: [normalized values]});
+        a column with no values selected does not filter.
+        """
+        selected = None
+        for col, values in filters.items():
+            if not values or col not in self.postings:
+                continue
+            hits = [self.postings[col][v] for v in values if v in self.postings[col]]
+            matched = np.unique(np.concatenate(hits)) if hits else np.array([], dtype=int)
+            selected = matched if selected is None else np.intersect1d(selected, matched, assume_unique=True)
+        return np.arange(len(self.frame)) if selected is None else selected
+
+    def _rank(self, col):
+        if col not in self._ranks:
+            values = self.frame[col]
+            if not pd.api.types.is_datetime64_any_dtype(values):
+                values = values.astype(str).str.lower()
+            order = np.argsort(values.to_numpy(), kind="stable")
+            rank = np.empty(len(order), dtype=int)
+            rank[order] = np.arange(len(order))
+            self._ranks[col] = rank
+        return self._ranks[col]
+
+    def sort(self, positions, col=None, ascending=True):
+        if not col or col not in self.frame.columns or not len(positions):
+            return positions
+        ordered = positions[np.argsort(self._rank(col)[positions], kind="stable")]
+        return ordered if ascending else ordered[::-1]
+
+    def page(self, positions, page, page_size):
+        """Rows of one 1-based page of the given positions."""
+        start = (page - 1) * page_size
+        return self.frame.iloc[positions[start:start + page_size]]
+
+
+_indexes = {}   # sheet -> SheetIndex of its latest snapshot
+
+
+def get_sheet_index(sheet_name):
+    """SheetIndex for the current snapshot of a sheet, rebuilt only when its version changes."""
+    snap = get_snapshot(sheet_name)
+    index = _indexes.get(sheet_name)
+    if index is None or index.version != snap.version or index.frame is not snap.frame:
+        index = SheetIndex(snap.frame, snap.version)
+        _indexes[sheet_name] = index
+    return index
@@ -2,26 +2,50 @@
 Google Sheets backend for TechConnect Skills Map.
 Handles all read/write operations with Google Sheets.
 Includes retry logic, caching, user authentication, and edit support.
+Successful reads are persisted to disk (see snapshot_store) and served
+from there on restart or while the Sheets API is unavailable. Writes go
+through a local journal (see journal) and are held there during outages.
 """
 
 import json
+import threading
 import time
+import uuid
+import zlib
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
 import gspread
+from gspread.utils import absolute_range_name, fill_gaps, numericise, numericise_all, rowcol_to_a1, to_records
 from gspread.exceptions import APIError, WorksheetNotFound
+from google.auth.exceptions import TransportError
 from google.oauth2.service_account import Credentials
+from requests.exceptions import RequestException
 from datetime import datetime
 import pandas as pd
-from competencias import DEFAULT_COMPETENCIAS, CATEGORIAS
-
-
-# Sheet names
-SHEET_USUARIOS = "Usuarios"
-SHEET_FASE1 = "Fase1_PreEvento"
-SHEET_FASE2 = "Fase2_DuranteEvento"
-SHEET_FASE3 = "Fase3_PostEvento"
-SHEET_EMPRESAS = "Empresas"
-SHEET_COMPETENCIAS = "Competencias"
+import journal
+from competencias import DEFAULT_COMPETENCIAS, DEFAULT_CATALOG, Catalog
+from schemas import (
+    SHEET_USUARIOS, SHEET_FASE1, SHEET_FASE2, SHEET_FASE3, SHEET_EMPRESAS, SHEET_COMPETENCIAS,
+    PHASE_SHEETS, LEGACY_EDITION, SCHEMAS, get_schema, partition_title, base_sheet,
+)
+from snapshot_store import (
+    StoredSnapshot, load_snapshot, save_snapshot, snapshot_version,
+    save_archive, load_archive, archived_editions,
+)
+
+# Phase frames are shared across sessions and handed out as shallow views;
+# copy-on-write keeps a renderer's edits from leaking into the shared frame.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+# Errors that mean "Sheets is unreachable right now" rather than a bug
+SHEETS_ERRORS = (APIError, WorksheetNotFound, RequestException, TransportError)
+
+# Saves tagged with a request_id are safe to retry (a retry first checks whether the
+# previous attempt landed), so they retry harder and also on timeouts.
+WRITE_RETRIES = 5
+RETRYABLE_WRITE_ERRORS = (APIError, RequestException)
 
 SCOPES = [
     "https://www.googleapis.com/auth/spreadsheets",
@@ -34,8 +58,8 @@ SCOPES = [
 # ============================================
 
 @st.cache_resource(ttl=300)
-def get_gspread_client():
-    creds_dict = st.secrets["gcp_service_account"]
+def get_gspread_client(account="gcp_service_account"):
+    creds_dict = st.secrets[account]
     if isinstance(creds_dict, str):
         creds_dict = json.loads(creds_dict)
     else:
@@ -44,11 +68,9 @@ def get_gspread_client():
     return gspread.authorize(creds)
 
 
-@st.cache_resource(ttl=60)
-def get_spreadsheet():
-    client = get_gspread_client()
-    spreadsheet_url = st.secrets.get("spreadsheet_url", None)
-    spreadsheet_key = st.secrets.get("spreadsheet_key", None)
+def _open_spreadsheet(client, config):
+    spreadsheet_url = config.get("spreadsheet_url", None)
+    spreadsheet_key = config.get("spreadsheet_key", None)
     if spreadsheet_url:
         return client.open_by_url(spreadsheet_url)
     elif spreadsheet_key:
@@ -57,6 +79,96 @@ def get_spreadsheet():
         return client.open("TechConnect_Skills_Map")
 
 
+@st.cache_resource(ttl=60)
+def get_spreadsheet():
+    return _open_spreadsheet(get_gspread_client(), st.secrets)
+
+
+# ============================================
+# EDITION (which TechConnect the phase sheets belong to)
+# ============================================
+
+def get_edition():
+    """Active edition (secrets: edition). Phase reads and writes only touch its partition."""
+    return str(st.secrets.get("edition", LEGACY_EDITION))
+
+
+def get_event_label():
+    return st.secrets.get("event_name", f"Tech Connect {get_edition()}")
+
+
+def _title(sheet_name):
+    """Worksheet title of a sheet in the active edition."""
+    return partition_title(sheet_name, get_edition())
+
+
+# ============================================
+# SHARDS (phase sheets spread over several spreadsheets)
+# ============================================
+# With [[phase_shards]] in secrets, phase rows live in one spreadsheet per shard,
+# each optionally opened with its own service account (and so its own API quota).
+# Usuarios, Empresas and Competencias always stay in the main spreadsheet.
+
+
+def get_shards():
+    return [dict(shard) for shard in st.secrets.get("phase_shards", [])]
+
+
+@st.cache_resource(ttl=60)
+def get_shard_spreadsheet(index):
+    shard = get_shards()[index]
+    client = get_gspread_client(shard.get("service_account", "gcp_service_account"))
+    return _open_spreadsheet(client, shard)
+
+
+def _grupo_of(usuario):
+    wanted = str(usuario).strip().lower()
+    for u in get_usuarios():
+        if str(u.get("usuario", "")).strip().lower() == wanted:
+            return str(u.get("grupo", ""))
+    return ""
+
+
+def shard_for(usuario, grupo=""):
+    """
+    Shard index holding a student's phase rows (None when not sharded): the shard
+    listing their grupo, otherwise a stable hash of usuario over the shards without grupos.
+    """
+    shards = get_shards()
+    if not shards:
+        return None
+    grupo = (str(grupo).strip() or _grupo_of(usuario)).lower()
+    for i, shard in enumerate(shards):
+        if grupo and grupo in [str(g).strip().lower() for g in shard.get("grupos", [])]:
+            return i
+    pool = [i for i, shard in enumerate(shards) if not shard.get("grupos")] or list(range(len(shards)))
+    return pool[zlib.crc32(str(usuario).strip().lower().encode("utf-8")) % len(pool)]
+
+
+def _shard_of_row(schema, row):
+    """shard_for() of a sheet row (list in column order); None outside the phase sheets."""
+    if schema.name not in PHASE_SHEETS:
+        return None
+    values = dict(zip(schema.headers, row))
+    return shard_for(values.get("usuario", ""), values.get("grupo", ""))
+
+
+def _spreadsheet(shard=None):
+    return get_spreadsheet() if shard is None else get_shard_spreadsheet(shard)
+
+
+def _sheet_shards(sheet_name):
+    """Shards a sheet is spread over ([None]: only the main spreadsheet)."""
+    if sheet_name in PHASE_SHEETS and get_shards():
+        return list(range(len(get_shards())))
+    return [None]
+
+
+def _worksheets(sheet_name):
+    """Every worksheet holding the active edition's rows of a sheet (one per shard)."""
+    return [_spreadsheet(shard).worksheet(_title(sheet_name)) for shard in _sheet_shards(sheet_name)]
+
+
 # ============================================
 # RETRY HELPERS
 # ============================================
@@ -67,7 +179,7 @@ def safe_append_row(ws, row, max_retries=3):
             ws.append_row(row, value_input_option="USER_ENTERED")
             return True
         except APIError as e:
-            if attempt < max_retries - 1:
+            if attempt < max_retries - 1 and is_transient(e):
                 time.sleep(2 + attempt * 3)
             else:
                 raise e
@@ -79,7 +191,7 @@ def safe_append_rows(ws, rows, max_retries=3):
             ws.append_rows(rows, value_input_option="USER_ENTERED")
             return True
         except APIError as e:
-            if attempt < max_retries - 1:
+            if attempt < max_retries - 1 and is_transient(e):
                 time.sleep(2 + attempt * 3)
             else:
                 raise e
@@ -90,126 +202,958 @@ def safe_read(ws, max_retries=3):
         try:
             return ws.get_all_records()
         except APIError as e:
-            if attempt < max_retries - 1:
+            if attempt < max_retries - 1 and is_transient(e):
+                time.sleep(2 + attempt * 3)
+            else:
+                raise e
+
+
+def safe_batch_get(ws, ranges, max_retries=3):
+    for attempt in range(max_retries):
+        try:
+            return ws.batch_get(ranges)
+        except APIError as e:
+            if attempt < max_retries - 1 and is_transient(e):
                 time.sleep(2 + attempt * 3)
             else:
                 raise e
 
 
+def safe_values_batch_get(ss, ranges, max_retries=3):
+    for attempt in range(max_retries):
+        try:
+            return ss.values_batch_get(ranges)
+        except APIError as e:
+            if attempt < max_retries - 1 and is_transient(e):
+                time.sleep(2 + attempt * 3)
+            else:
+                raise e
+
+
+# One writer per worksheet: every read-modify-write on a sheet (upsert, delete) holds its
+# lock, so row numbers computed from a fresh read cannot shift before they are used.
+_sheet_write_locks = {}
+_write_locks_guard = threading.Lock()
+
+
+def _ws_id(ws):
+    """Identity of a worksheet across shards (same title, different spreadsheets)."""
+    return getattr(ws, "spreadsheet_id", ""), ws.title
+
+
+def sheet_write_lock(ws):
+    with _write_locks_guard:
+        return _sheet_write_locks.setdefault(_ws_id(ws), threading.RLock())
+
+
+def _delete_row_numbers(ws, row_numbers):
+    """Delete 1-based rows in a single atomic batchUpdate (bottom-up, so indices stay valid)."""
+    blocks = []
+    for n in sorted(set(row_numbers), reverse=True):
+        if blocks and blocks[-1][0] == n + 1:
+            blocks[-1][0] = n
+        else:
+            blocks.append([n, n])
+    requests = [
+        {"deleteDimension": {"range": {
+            "sheetId": ws.id, "dimension": "ROWS", "startIndex": start - 1, "endIndex": end,
+        }}}
+        for start, end in blocks
+    ]
+    if requests:
+        ws.spreadsheet.batch_update({"requests": requests})
+
+
 def delete_rows_matching(ws, col_checks, max_retries=2):
     """
     Delete all rows matching given column value pairs.
     col_checks = [(col_index_1based, value), ...]
-    Deletes from bottom to top to avoid row shift issues.
+    Rows are located and deleted under the sheet's write lock, in one batchUpdate.
     """
+    with sheet_write_lock(ws):
+        for attempt in range(max_retries):
+            try:
+                all_values = ws.get_all_values()
+                rows_to_delete = []
+                for i, row in enumerate(all_values):
+                    if i == 0:  # skip header
+                        continue
+                    match = True
+                    for col_idx, val in col_checks:
+                        if col_idx - 1 < len(row) and str(row[col_idx - 1]).strip().lower() != str(val).strip().lower():
+                            match = False
+                            break
+                    if match:
+                        rows_to_delete.append(i + 1)  # 1-based row number
+
+                _delete_row_numbers(ws, rows_to_delete)
+                return len(rows_to_delete)
+            except APIError as e:
+                if attempt < max_retries - 1 and is_transient(e):
+                    time.sleep(2 + attempt * 3)
+                else:
+                    raise e
+
+
+def safe_update(ws, range_name, rows, max_retries=3):
     for attempt in range(max_retries):
         try:
-            all_values = ws.get_all_values()
-            rows_to_delete = []
-            for i, row in enumerate(all_values):
-                if i == 0:  # skip header
-                    continue
-                match = True
-                for col_idx, val in col_checks:
-                    if col_idx - 1 < len(row) and str(row[col_idx - 1]).strip().lower() != str(val).strip().lower():
-                        match = False
-                        break
-                if match:
-                    rows_to_delete.append(i + 1)  # 1-based row number
-
-            # Delete from bottom to top
-            for row_num in sorted(rows_to_delete, reverse=True):
-                ws.delete_rows(row_num)
-                time.sleep(0.3)  # Small delay to avoid rate limits
-            return len(rows_to_delete)
+            ws.update(range_name=range_name, values=rows, value_input_option="USER_ENTERED")
+            return True
         except APIError as e:
-            if attempt < max_retries - 1:
+            if attempt < max_retries - 1 and is_transient(e):
+                time.sleep(2 + attempt * 3)
+            else:
+                raise e
+
+
+def new_request_id():
+    return uuid.uuid4().hex
+
+
+def _request_landed(ws, request_id):
+    """True if rows tagged with request_id are already in the sheet."""
+    try:
+        header = _get_header(ws)
+        if "request_id" not in header:
+            return False
+        col = safe_batch_get(ws, [_column_range(header.index("request_id") + 1)], max_retries=1)[0]
+    except SHEETS_ERRORS:
+        return False
+    return any(row and row[0] == request_id for row in col)
+
+
+def safe_append_tagged(ws, rows, request_id, max_retries=WRITE_RETRIES):
+    """
+    Append rows tagged with request_id. An append that timed out may still have
+    landed, so before every retry we check for the request_id and stop if it is there.
+    """
+    for attempt in range(max_retries):
+        try:
+            ws.append_rows(rows, value_input_option="USER_ENTERED")
+            return True
+        except RETRYABLE_WRITE_ERRORS as e:
+            if _request_landed(ws, request_id):
+                return True
+            if attempt < max_retries - 1 and is_transient(e):
                 time.sleep(2 + attempt * 3)
             else:
                 raise e
 
 
+def _matching_rows(all_values, schema, key):
+    """1-based row numbers whose key columns match key (case/space-insensitive)."""
+    return [i + 1 for i, row in enumerate(all_values) if i > 0 and schema.key_of(row) == key]
+
+
+def upsert_rows(ws, schema, key_values, rows, request_id):
+    """
+    Replace every row whose key columns match key_values (dict) with rows.
+    When the old rows form a contiguous block of the same size (the usual edit),
+    this is a single range write; otherwise the old rows are deleted in one
+    batchUpdate and the new ones appended.
+    Runs under the sheet's write lock, so concurrent saves to the same sheet
+    (from different sessions or the save pool) cannot act on shifted row numbers.
+    Appends are tagged with request_id, so retries never duplicate rows.
+    """
+    key = schema.key_of(key_values)
+    with sheet_write_lock(ws):
+        matches = _matching_rows(ws.get_all_values(), schema, key)
+        if not matches:
+            if rows:
+                safe_append_tagged(ws, rows, request_id)
+            return "append"
+        contiguous = matches == list(range(matches[0], matches[0] + len(matches)))
+        if contiguous and len(matches) == len(rows):
+            safe_update(ws, schema.a1_range(matches[0], len(rows)), rows)
+            return "update"
+        _delete_row_numbers(ws, matches)
+        if rows:
+            safe_append_tagged(ws, rows, request_id)
+        return "replace"
+
+
 # ============================================
-# INITIALIZATION
+# WRITE MODE: upsert (default) or append-only
 # ============================================
+# In append-only mode (secrets: write_mode = "append") a save is a single tagged
+# append; readers resolve the newest save per key (SheetSchema.latest), and a
+# periodic compaction rewrites each phase sheet without the superseded rows.
+
+COMPACTION_INTERVAL_MIN = 30
 
-def init_spreadsheet():
-    ss = get_spreadsheet()
-    existing = [ws.title for ws in ss.worksheets()]
 
-    if SHEET_USUARIOS not in existing:
-        ws = ss.add_worksheet(title=SHEET_USUARIOS, rows=200, cols=4)
-        ws.append_row(["usuario", "password", "nombre", "grupo"])
+def get_write_mode():
+    return st.secrets.get("write_mode", "upsert")
 
-    if SHEET_COMPETENCIAS not in existing:
-        ws = ss.add_worksheet(title=SHEET_COMPETENCIAS, rows=100, cols=3)
-        ws.append_row(["codigo", "categoria", "descripcion"])
-        rows = [[c[0], c[1], c[2]] for c in DEFAULT_COMPETENCIAS]
+
+def _save_rows(ws, schema, key_values, rows, request_id):
+    if get_write_mode() == "append":
         if rows:
-            ws.append_rows(rows)
+            safe_append_tagged(ws, rows, request_id)
+        return "append"
+    return upsert_rows(ws, schema, key_values, rows, request_id)
+
+
+def compact_sheet(sheet_name):
+    """
+    Delete rows superseded by a newer save of the same key, in one atomic batchUpdate
+    (kept rows are never rewritten, so appends landing meanwhile are safe).
+    Returns the number of rows removed (over all shards).
+    """
+    schema = get_schema(sheet_name)
+    removed = 0
+    for ws in _worksheets(sheet_name):
+        with sheet_write_lock(ws):
+            values = ws.get_all_values()
+            if len(values) <= 1 or values[0][:len(schema.headers)] != schema.headers:
+                continue  # empty or hand-edited header: don't touch it
+            stale = schema.superseded(values[1:])
+            _delete_row_numbers(ws, [i + 2 for i in stale])
+            removed += len(stale)
+    if removed:
+        invalidate_snapshot(sheet_name)
+    return removed
+
+
+def compact_phase_sheets():
+    """Compact every versioned sheet. Returns {sheet: rows removed}."""
+    return {name: compact_sheet(name) for name, schema in SCHEMAS.items() if schema.versioned}
+
+
+_compaction_lock = threading.Lock()
+_compaction_started = False
+
+
+def start_background_jobs():
+    """
+    Start (once per process) the thread that compacts phase sheets periodically in
+    append-only mode. Called at app startup, from the script thread.
+    """
+    global _compaction_started
+    if get_write_mode() != "append":
+        return
+    with _compaction_lock:
+        if _compaction_started:
+            return
+        _compaction_started = True
+    interval = float(st.secrets.get("compaction_interval_min", COMPACTION_INTERVAL_MIN)) * 60
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                compact_phase_sheets()
+            except SHEETS_ERRORS:
+                pass  # try again next round
+
+    threading.Thread(target=run, name="sheet-compaction", daemon=True).start()
+
+
+# ============================================
+# SAVE JOURNAL (write-through, held during outages)
+# ============================================
+
+class WriteRejected(Exception):
+    """Sheets refused a journaled write for a reason retrying won't fix; the write is set aside."""
+
+
+def is_transient(error):
+    """True for errors worth retrying later: connection problems, 429 and 5xx."""
+    if isinstance(error, APIError):
+        return error.code in (-1, 408, 429) or error.code >= 500  # -1: unparseable reply (proxy, 502 page)
+    return isinstance(error, (RequestException, TransportError))
+
+
+def _describe(error):
+    if isinstance(error, APIError):
+        return f"{error.code} {error.error.get('status', '')}: {error.error.get('message', '')}".strip()
+    if isinstance(error, WorksheetNotFound):
+        return f"No existe la hoja {error}"
+    return f"{type(error).__name__}: {error}"
+
+
+# Pending writes are sent per target (worksheet title, shard): one flusher per target keeps
+# each worksheet's log order, while different sheets, shards and editions flush concurrently.
+_flush_locks = {}
+_background_flush = threading.Lock()
+
+
+def _flush_lock(target):
+    with _write_locks_guard:
+        return _flush_locks.setdefault(target, threading.Lock())
+
+
+def _take_baseline(sheet_name):
+    """Before the first journaled write of a sheet, record its current content as a reset event."""
+    if journal.has_events(_title(sheet_name)):
+        return
+    schema = get_schema(sheet_name)
+    stored = read_sheet_snapshot(sheet_name)
+    if stored is not None:
+        journal.record(_title(sheet_name), journal.OP_RESET, [schema.row(r) for r in stored.records], flushed=True)
+
+
+def _event_target(ev):
+    """(worksheet title, shard) an event is written to."""
+    schema = get_schema(ev.sheet)
+    sample = ev.rows[0] if ev.rows else schema.row(dict(zip(schema.key, ev.key)))
+    return ev.sheet, _shard_of_row(schema, sample)
+
+
+def _apply_event(ev):
+    """Write one journal event (upsert, append or delete) to the spreadsheet. ev.sheet is a worksheet title."""
+    schema = get_schema(ev.sheet)
+    ws = _phase_worksheet(*_event_target(ev))
+    if ev.op == journal.OP_UPSERT:
+        _save_rows(ws, schema, dict(zip(schema.key, ev.key)), ev.rows, ev.request_id)
+    elif ev.op == journal.OP_DELETE:
+        delete_rows_matching(ws, [(schema.col(k), v) for k, v in zip(schema.key, ev.key)])
+    elif ev.request_id and "request_id" in schema.headers:
+        safe_append_tagged(ws, ev.rows, ev.request_id)
     else:
-        # If sheet exists but is empty (only header or less), repopulate
-        ws = ss.worksheet(SHEET_COMPETENCIAS)
-        all_vals = ws.get_all_values()
-        if len(all_vals) <= 1:
-            # Empty or only header — repopulate
+        safe_append_rows(ws, ev.rows)
+
+
+def _flush_target(target):
+    """
+    Send the pending events of one target in log order. A transient error stops it
+    (that event and later ones stay pending and the error propagates); a permanent one
+    sets the event aside as failed and the events behind it are still sent.
+    Returns how many were sent.
+    """
+    sent = 0
+    with _flush_lock(target):
+        for ev in journal.events(target[0], pending_only=True):
+            if _event_target(ev) != target:
+                continue
+            try:
+                _apply_event(ev)
+            except SHEETS_ERRORS as e:
+                if is_transient(e):
+                    raise
+                journal.mark_failed(ev.seq, _describe(e))
+            else:
+                journal.mark_flushed(ev.seq)
+                sent += 1
+            finally:
+                _invalidate_reads(base_sheet(ev.sheet))
+    return sent
+
+
+def flush_pending():
+    """
+    Send journaled writes not yet in the spreadsheet, target by target.
+    Targets still unreachable are skipped; the first such error is raised at the end.
+    Returns how many were sent.
+    """
+    sent, error = 0, None
+    for target in dict.fromkeys(_event_target(ev) for ev in journal.events(pending_only=True)):
+        try:
+            sent += _flush_target(target)
+        except SHEETS_ERRORS as e:
+            error = error or e
+    if error is not None:
+        raise error
+    return sent
+
+
+def _flush_in_background():
+    if not journal.pending_count() or not _background_flush.acquire(blocking=False):
+        return
+
+    def run():
+        try:
+            flush_pending()
+        except SHEETS_ERRORS:
+            pass  # still down: retried after the next successful read
+        finally:
+            _background_flush.release()
+
+    threading.Thread(target=run, name="journal-flush", daemon=True).start()
+
+
+def _commit(sheet_name, op, rows, key_values=None, request_id=""):
+    """
+    Journal a write, then send it (after any earlier pending ones for the same worksheet
+    and shard) to the spreadsheet. Returns True once written, False if Sheets is
+    unreachable and the write is held locally. Raises WriteRejected if Sheets refused it.
+    """
+    schema = get_schema(sheet_name)
+    key = [key_values.get(k, "") for k in schema.key] if key_values is not None else []
+    _take_baseline(sheet_name)
+    seq = journal.record(_title(sheet_name), op, rows, key, request_id)
+    ev = journal.Event(seq, "", _title(sheet_name), op, tuple(key), rows, request_id, False)
+    try:
+        if seq is None:  # journal unavailable: write straight through
+            _apply_event(ev)
+            return True
+        _flush_target(_event_target(ev))
+    except SHEETS_ERRORS:
+        if seq is None:
+            raise
+        return False
+    finally:
+        _invalidate_reads(sheet_name)
+    error = journal.failure(seq)
+    if error is not None:
+        raise WriteRejected(f"Google Sheets rechazó el guardado ({error}).")
+    return True
+
+
+def get_pending_writes():
+    """Number of writes held in the journal waiting for Sheets."""
+    return journal.pending_count()
+
+
+def get_failed_writes():
+    """Writes Sheets rejected for good: [(Event, failed_at, error)], oldest first."""
+    return journal.failures()
+
+
+def retry_failed_writes(seqs=None):
+    """Queue rejected writes again (e.g. after creating a missing tab) and try to send them."""
+    retried = journal.retry_failed(seqs)
+    if retried:
+        _flush_in_background()
+    return retried
+
+
+def _local_view(sheet_name, stored):
+    """
+    Overlay journaled writes the spreadsheet doesn't have yet on a read, so held saves
+    are visible at once. With no read at all, the sheet is rebuilt from the journal.
+    """
+    schema = SCHEMAS.get(sheet_name)
+    if schema is None:
+        return stored
+    if stored is None:
+        evts, base, version = journal.events(_title(sheet_name)), [], "journal"
+    else:
+        evts = journal.events(_title(sheet_name), pending_only=True)
+        base, version = [schema.row(r) for r in stored.records], stored.version
+    if not evts:
+        return stored
+    rows = journal.replay(schema, evts, base)
+    return StoredSnapshot(
+        [dict(zip(schema.headers, r)) for r in rows],
+        f"{version}+{evts[-1].seq}",
+        stored.fetched_at if stored else evts[-1].ts,
+    )
+
+
+def _write_sheet(sheet_name, rows):
+    """Replace the active edition's content of a sheet with rows, creating worksheets as needed."""
+    schema = get_schema(sheet_name)
+    title = _title(sheet_name)
+    width = len(schema.headers)
+    rows = [(list(r) + [""] * width)[:width] for r in rows]
+    by_shard = {shard: [] for shard in _sheet_shards(sheet_name)}
+    for row in rows:
+        by_shard[_shard_of_row(schema, row)].append(row)
+    for shard, part in by_shard.items():
+        ss = _spreadsheet(shard)
+        try:
+            ws = ss.worksheet(title)
+        except WorksheetNotFound:
+            ws = ss.add_worksheet(title=title, rows=max(schema.rows, len(part) + 1), cols=width + 2)
+        with sheet_write_lock(ws):
             ws.clear()
-            ws.append_row(["codigo", "categoria", "descripcion"])
-            rows = [[c[0], c[1], c[2]] for c in DEFAULT_COMPETENCIAS]
-            if rows:
-                ws.append_rows(rows)
-
-    if SHEET_EMPRESAS not in existing:
-        ws = ss.add_worksheet(title=SHEET_EMPRESAS, rows=50, cols=5)
-        ws.append_row(["id", "nombre", "sector", "web", "descripcion"])
-
-    if SHEET_FASE1 not in existing:
-        ws = ss.add_worksheet(title=SHEET_FASE1, rows=1000, cols=15)
-        ws.append_row([
-            "timestamp", "usuario", "nombre", "grupo", "empresa_id", "empresa_nombre",
-            "actividad_principal", "presencia_digital", "perfiles_necesitan",
-            "competencia_codigo", "competencia_tipo", "competencia_justificacion",
-            "competencia_nivel",
-        ])
-
-    if SHEET_FASE2 not in existing:
-        ws = ss.add_worksheet(title=SHEET_FASE2, rows=1000, cols=20)
-        ws.append_row([
-            "timestamp", "usuario", "nombre", "grupo", "empresa_nombre",
-            "persona_contacto", "cargo_contacto", "contacto_linkedin",
-            "que_hacen_digital", "perfiles_buscan", "habilidades_tecnicas",
-            "competencias_blandas", "gap_universidad", "oportunidades_practicas",
-            "consejo", "sorpresa", "elevator_pitch_usado",
-        ])
-
-    if SHEET_FASE3 not in existing:
-        ws = ss.add_worksheet(title=SHEET_FASE3, rows=1000, cols=20)
-        ws.append_row([
-            "timestamp", "usuario", "nombre", "grupo", "empresa_nombre",
-            "competencia_codigo", "competencia_tipo", "competencia_justificacion_v2",
-            "competencia_nivel_v2", "cambio_vs_v1",
-            "competencias_mas_demandadas", "competencias_sorpresa", "gap_uni_empresa",
-            "posicionamiento_personal", "plan_accion", "valoracion_experiencia",
-        ])
+            if ws.row_count < len(part) + 1:
+                ws.add_rows(len(part) + 1 - ws.row_count)
+            safe_update(ws, f"A1:{rowcol_to_a1(len(part) + 1, width)}", [schema.headers] + part)
+        _headers.pop(_ws_id(ws), None)
+    _invalidate_reads(sheet_name)
+    return len(rows)
+
+
+def restore_sheet(sheet_name, at=None):
+    """
+    Overwrite a sheet with its journal replay as of `at` (ISO string or datetime; default now);
+    phase rows go back to their shards. Returns the number of data rows written.
+    """
+    title = _title(sheet_name)
+    written = _write_sheet(sheet_name, journal.rebuild(title, get_schema(sheet_name), at))
+    # Held writes up to `at` are part of what was just written
+    for ev in journal.events(title, until=at, pending_only=True):
+        journal.mark_flushed(ev.seq)
+    return written
+
+
+def restore_sheet_from_snapshot(sheet_name):
+    """Overwrite a sheet with its last on-disk snapshot. Returns rows written, or None without a snapshot."""
+    stored = load_snapshot(_title(sheet_name))
+    if stored is None:
+        return None
+    schema = get_schema(sheet_name)
+    return _write_sheet(sheet_name, [schema.row(r) for r in stored.records])
+
+
+def restore_spreadsheet(at=None):
+    """Rebuild every journaled sheet, e.g. after a bad hand edit or into a fresh spreadsheet."""
+    return {name: restore_sheet(name, at) for name in SCHEMAS if journal.has_events(_title(name))}
+
+
+# ============================================
+# BACKGROUND SAVES
+# ============================================
+# Saves (with their retries and backoff) run on a small shared pool instead of the
+# Streamlit script thread; the UI keeps the Future and reports the outcome later.
+
+SAVE_WORKERS = 4
+_save_pool = ThreadPoolExecutor(max_workers=SAVE_WORKERS, thread_name_prefix="save")
+
+
+def submit_save(save_fn, *args, **kwargs):
+    """
+    Run a save_* function on the save pool. A request_id is fixed up front so the
+    save stays idempotent however many times it is retried. Returns a Future.
+    """
+    kwargs.setdefault("request_id", new_request_id())
+    return _save_pool.submit(save_fn, *args, **kwargs)
+
+
+# ============================================
+# SNAPSHOT READS (disk-backed)
+# ============================================
+
+_state_lock = threading.Lock()
+_live_sheets = set()    # sheets read live at least once in this process
+_refreshing = set()     # sheets with a background refresh in flight
+_stale_sheets = {}      # sheet -> fetched_at of the disk copy being served
+_prefer_live = False    # see prefer_live_reads()
+
+
+def prefer_live_reads():
+    """
+    Read every sheet from the API first for the rest of this process. For short-lived
+    processes (the CLI): a background refresh would die at exit, leaving the disk copy
+    in use. The disk copy is then only served on transient errors, flagged stale.
+    """
+    global _prefer_live
+    _prefer_live = True
+
+
+def _fetch_records(sheet_name):
+    """Live read of a sheet (gathered over its shards); persists the result to disk. Returns a StoredSnapshot."""
+    return _store_records(sheet_name, [record for ws in _worksheets(sheet_name) for record in safe_read(ws)])
+
+
+def _store_records(sheet_name, records):
+    """Persist the records of a live read to disk and mark the sheet live. Returns a StoredSnapshot."""
+    version = snapshot_version(records)
+    save_snapshot(_title(sheet_name), records, version)
+    with _state_lock:
+        _live_sheets.add(sheet_name)
+        _stale_sheets.pop(sheet_name, None)
+    _flush_in_background()
+    return StoredSnapshot(records, version, datetime.now().isoformat())
+
+
+def _refresh_in_background(sheet_name, on_refresh):
+    with _state_lock:
+        if sheet_name in _refreshing:
+            return
+        _refreshing.add(sheet_name)
+
+    def run():
+        try:
+            _fetch_records(sheet_name)
+            if on_refresh:
+                on_refresh()
+        except SHEETS_ERRORS:
+            stored = load_snapshot(_title(sheet_name))
+            with _state_lock:
+                _live_sheets.add(sheet_name)  # next read goes live and falls back itself
+                if stored:
+                    _stale_sheets[sheet_name] = stored.fetched_at
+        finally:
+            with _state_lock:
+                _refreshing.discard(sheet_name)
+
+    threading.Thread(target=run, name=f"refresh-{sheet_name}", daemon=True).start()
+
+
+def read_sheet_snapshot(sheet_name, on_refresh=None, live=False):
+    """
+    Read all records of a sheet as a StoredSnapshot (records, version, fetched_at).
+    - First read in a fresh process: serve the disk copy and refresh in background
+      (on_refresh is called once fresh data is on disk, e.g. to clear a st.cache).
+      With live=True (or after prefer_live_reads()) the API is read first instead.
+    - Sheets unavailable: serve the disk copy and flag the sheet as stale. A live
+      read only does so on transient errors and raises the others.
+    - No disk copy either: rebuild from the journal, or return None.
+    Writes held in the journal are overlaid on the result.
+    """
+    live = live or _prefer_live
+    if not live and sheet_name not in _live_sheets:
+        stored = load_snapshot(_title(sheet_name))
+        if stored is not None:
+            _refresh_in_background(sheet_name, on_refresh)
+            return _local_view(sheet_name, stored)
+    try:
+        stored = _fetch_records(sheet_name)
+    except SHEETS_ERRORS as e:
+        if live and not is_transient(e):
+            raise
+        stored = load_snapshot(_title(sheet_name))
+        if stored is not None:
+            with _state_lock:
+                _stale_sheets[sheet_name] = stored.fetched_at
+    return _local_view(sheet_name, stored)
+
+
+def read_sheet(sheet_name, default=None, on_refresh=None):
+    """Records of a sheet (see read_sheet_snapshot), or default if nothing is available."""
+    stored = read_sheet_snapshot(sheet_name, on_refresh)
+    return stored.records if stored is not None else default
+
+
+# ============================================
+# SHARED PHASE SNAPSHOTS (one frame per process)
+# ============================================
+
+SNAPSHOT_TTL = 30
+
+
+class Snapshot(namedtuple("Snapshot", ["sheet", "version", "frame", "loaded_at"])):
+    """Process-wide snapshot of one sheet. `frame` is shared by every session: never mutate it."""
+    __slots__ = ()
+
+    def view(self):
+        """Cheap copy-on-write view for renderers."""
+        return self.frame.copy(deep=False)
+
+
+_snapshots = {}         # sheet (or (sheet, columns) for projections) -> Snapshot
+_snapshot_locks = {}    # same keys -> Lock, so only one session loads a snapshot at a time
+_headers = {}           # _ws_id(worksheet) -> (header row, loaded_at)
+HEADER_TTL = 300
+
+
+def _is_fresh(snap):
+    return snap is not None and time.monotonic() - snap.loaded_at < SNAPSHOT_TTL
+
+
+def _cached_snapshot(key, load):
+    """Return the cached Snapshot for key, or build it with load(previous) under a per-key lock."""
+    snap = _snapshots.get(key)
+    if _is_fresh(snap):
+        return snap
+    with _state_lock:
+        lock = _snapshot_locks.setdefault(key, threading.Lock())
+    with lock:
+        snap = _snapshots.get(key)
+        if _is_fresh(snap):
+            return snap
+        snap = load(snap)
+        _snapshots[key] = snap
+        return snap
+
+
+def _parse_records(sheet_name, records):
+    schema = SCHEMAS.get(sheet_name)
+    return schema.latest(schema.dedupe(schema.parse(records))) if schema else pd.DataFrame(records)
+
+
+def get_snapshot(sheet_name, live=False):
+    """
+    Current Snapshot of a sheet, reloaded at most every SNAPSHOT_TTL seconds.
+    live=True reloads it now from the API (see read_sheet_snapshot).
+    """
+    if live:
+        invalidate_snapshot(sheet_name)
+
+    def load(previous):
+        stored = read_sheet_snapshot(sheet_name, on_refresh=lambda: invalidate_snapshot(sheet_name), live=live)
+        version = stored.version if stored else "empty"
+        if previous and previous.version == version:
+            frame = previous.frame  # unchanged content: keep the same shared frame
+        else:
+            frame = _parse_records(sheet_name, stored.records if stored else [])
+        return Snapshot(sheet_name, version, frame, time.monotonic())
+
+    return _cached_snapshot(sheet_name, load)
+
+
+def _value_range_records(value_range):
+    """Records of a whole-tab values:batchGet range, as get_all_records() builds them."""
+    values = fill_gaps(value_range.get("values", [[]]))
+    if values == [[]]:
+        return []
+    return to_records(values[0], [numericise_all(row, default_blank="") for row in values[1:]])
+
+
+def get_snapshots_together(sheet_names):
+    """
+    Live Snapshot of each sheet, reading every tab of a spreadsheet in one
+    values_batch_get: the sheets kept in one spreadsheet are from the same instant.
+    Shards are separate spreadsheets read one after another, so a sheet split over
+    shards is only consistent within each shard. A spreadsheet whose batch read
+    fails (or lacks a tab) has its sheets read one by one with get_snapshot().
+    """
+    sheet_names = list(sheet_names)
+    by_spreadsheet = {}  # shard -> sheets with rows there
+    for name in sheet_names:
+        for shard in _sheet_shards(name):
+            by_spreadsheet.setdefault(shard, []).append(name)
+    records = {name: [] for name in sheet_names}
+    separate = set()
+    for shard, names in by_spreadsheet.items():
+        try:
+            ss = _spreadsheet(shard)
+            reply = safe_values_batch_get(ss, [absolute_range_name(_title(n)) for n in names])
+        except SHEETS_ERRORS:
+            separate.update(names)
+            continue
+        for name, value_range in zip(names, reply.get("valueRanges", [])):
+            records[name].extend(_value_range_records(value_range))
+
+    snapshots = {}
+    for name in sheet_names:
+        if name in separate:
+            snapshots[name] = get_snapshot(name)
+            continue
+        stored = _local_view(name, _store_records(name, records[name]))
+        snapshots[name] = Snapshot(name, stored.version, _parse_records(name, stored.records), time.monotonic())
+    return snapshots
+
+
+def _get_header(ws):
+    cached = _headers.get(_ws_id(ws))
+    if cached and time.monotonic() - cached[1] < HEADER_TTL:
+        return cached[0]
+    header = ws.row_values(1)
+    _headers[_ws_id(ws)] = (header, time.monotonic())
+    return header
+
+
+def _column_range(col_idx):
+    """A1 range covering a whole column, e.g. 6 -> 'F:F'."""
+    letter = rowcol_to_a1(1, col_idx).rstrip("0123456789")
+    return f"{letter}:{letter}"
+
+
+def _fetch_projection(sheet_name, columns):
+    """
+    Live read of only the named columns through A1 column ranges (one batch_get per shard).
+    Returns (frame, version).
+    """
+    # Row-identity, key and timestamp columns come along so duplicates and
+    # superseded saves can be resolved exactly as in the full snapshot
+    schema = SCHEMAS.get(sheet_name)
+    extra = [c for c in (schema.resolution_columns() if schema else ()) if c not in columns]
+    parts, fetched_cols = [], []
+    for ws in _worksheets(sheet_name):
+        header = _get_header(ws)
+        fetched = [c for c in list(columns) + extra if c in header]
+        if not any(c in columns for c in fetched):
+            continue
+        value_ranges = safe_batch_get(ws, [_column_range(header.index(c) + 1) for c in fetched])
+        cols = [[row[0] if row else "" for row in vr][1:] for vr in value_ranges]
+        n_rows = max((len(c) for c in cols), default=0)
+        data = {
+            name: [numericise(v) for v in col] + [""] * (n_rows - len(col))
+            for name, col in zip(fetched, cols)
+        }
+        parts.append(pd.DataFrame(data, columns=fetched))
+        fetched_cols.append(cols)
+    if not parts:
+        return pd.DataFrame(columns=[]), "empty"
+    present = [c for c in columns if any(c in part.columns for part in parts)]
+    raw = parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True).fillna("")
+    frame = _parse_records(sheet_name, raw)
+    return frame[present], snapshot_version(fetched_cols)
+
+
+def get_projection(sheet_name, columns):
+    """
+    Snapshot holding only the named columns of a sheet, cached separately from the
+    full records. Served from the full snapshot when that one is already fresh, or
+    while writes to the sheet are held in the journal (only full reads overlay them).
+    """
+    columns = tuple(columns)
+
+    def load(previous):
+        full = _snapshots.get(sheet_name)
+        if journal.pending_count(_title(sheet_name)):
+            full = get_snapshot(sheet_name)
+        elif not _is_fresh(full):
+            try:
+                frame, version = _fetch_projection(sheet_name, columns)
+                if previous and previous.version == version:
+                    frame = previous.frame
+                return Snapshot(sheet_name, version, frame, time.monotonic())
+            except SHEETS_ERRORS:
+                full = get_snapshot(sheet_name)  # disk fallback, flagged stale
+        frame = full.frame[[c for c in columns if c in full.frame.columns]]
+        return Snapshot(sheet_name, full.version, frame, time.monotonic())
+
+    return _cached_snapshot((sheet_name, columns), load)
+
+
+def invalidate_snapshot(sheet_name):
+    """Force the next read of this sheet (full or projected) to reload."""
+    for key, snap in list(_snapshots.items()):
+        if key == sheet_name or (isinstance(key, tuple) and key[0] == sheet_name):
+            _snapshots[key] = snap._replace(loaded_at=float("-inf"))
+
+
+def get_stale_sheets():
+    """Sheets currently served from disk because the API failed: {sheet: fetched_at}."""
+    with _state_lock:
+        return dict(_stale_sheets)
+
+
+# ============================================
+# PAST EDITIONS (local archive, year-over-year)
+# ============================================
+
+_archived_frames = {}   # (edition, sheet) -> parsed archive frame
+
+
+def _edition_worksheets(sheet_name, edition):
+    """
+    Worksheets holding an edition's rows of a phase sheet. The main spreadsheet is
+    always searched: tabs from before [[phase_shards]] was configured live there.
+    """
+    title = partition_title(sheet_name, edition)
+    found = {}
+    for shard in dict.fromkeys([None] + _sheet_shards(sheet_name)):
+        try:
+            ws = _spreadsheet(shard).worksheet(title)
+        except WorksheetNotFound:
+            continue
+        found.setdefault(_ws_id(ws), ws)
+    return list(found.values())
+
+
+def archive_edition(edition, drop=False):
+    """
+    Copy a past edition's phase sheets (main spreadsheet and all shards) into the local
+    archive. With drop=True its worksheets are then deleted from the spreadsheets.
+    Returns {sheet: rows archived}.
+    """
+    edition = str(edition).strip()
+    if edition == get_edition():
+        raise ValueError("No se puede archivar la edición activa.")
+    archived = {}
+    for name in PHASE_SHEETS:
+        found = _edition_worksheets(name, edition)
+        if not found:
+            continue
+        records = [record for ws in found for record in safe_read(ws)]
+        if not save_archive(edition, name, records):
+            raise OSError(f"No se pudo escribir el archivo de la edición {edition}.")
+        archived[name] = len(records)
+        _archived_frames.pop((edition, name), None)
+        if drop:
+            for ws in found:
+                ws.spreadsheet.del_worksheet(ws)
+            left = _edition_worksheets(name, edition)
+            if left:
+                raise OSError(f"No se pudieron eliminar {len(left)} pestaña(s) de {name} ({edition}).")
+    return archived
+
+
+def get_editions():
+    """Archived editions plus the active one, oldest first."""
+    return sorted(set(archived_editions()) | {get_edition()})
+
+
+def get_edition_frame(sheet_name, edition=None):
+    """Phase frame of an edition: the live snapshot for the active one, the local archive otherwise."""
+    edition = str(edition or get_edition())
+    if edition == get_edition():
+        return get_snapshot(sheet_name).view()
+    key = (edition, sheet_name)
+    if key not in _archived_frames:
+        _archived_frames[key] = _parse_records(sheet_name, load_archive(edition, sheet_name) or [])
+    return _archived_frames[key].copy(deep=False)
+
+
+def get_editions_frame(sheet_name):
+    """Every edition of a phase sheet stacked, with an 'edicion' column, for year-over-year views."""
+    frames = [get_edition_frame(sheet_name, ed).assign(edicion=ed) for ed in get_editions()]
+    return pd.concat(frames, ignore_index=True)
+
+
+# ============================================
+# INITIALIZATION
+# ============================================
+
+_headers_checked = set()
+
+
+def _ensure_headers(ws, schema):
+    """Append schema columns missing at the end of an existing header row (e.g. request_id)."""
+    header = ws.row_values(1)
+    _headers_checked.add(_ws_id(ws))
+    if not header or header == schema.headers or header != schema.headers[:len(header)]:
+        return  # empty, up to date, or hand-edited: leave it alone
+    if ws.col_count < len(schema.headers):
+        ws.add_cols(len(schema.headers) - ws.col_count)
+    safe_update(ws, schema.a1_range(1), [schema.headers])
+    _headers.pop(_ws_id(ws), None)
+
+
+def _phase_worksheet(title, shard=None):
+    """Worksheet for a save (exact title, in the given shard); migrates its header once per process."""
+    ws = _spreadsheet(shard).worksheet(title)
+    if _ws_id(ws) not in _headers_checked:
+        _ensure_headers(ws, get_schema(title))
+    return ws
+
+
+def init_spreadsheet():
+    default_comps = [[c[0], c[1], c[2]] for c in DEFAULT_COMPETENCIAS]
+    existing = {}  # shard -> worksheet titles
+
+    for name, schema in SCHEMAS.items():
+        title = _title(name)
+        for shard in _sheet_shards(name):
+            ss = _spreadsheet(shard)
+            if shard not in existing:
+                existing[shard] = [ws.title for ws in ss.worksheets()]
+            if title not in existing[shard]:
+                ws = ss.add_worksheet(title=title, rows=schema.rows, cols=len(schema.columns) + 2)
+                ws.append_row(schema.headers)
+                _headers.pop(_ws_id(ws), None)
+                if name == SHEET_COMPETENCIAS:
+                    ws.append_rows(default_comps)
+                continue
+            ws = ss.worksheet(title)
+            _ensure_headers(ws, schema)
+            if name == SHEET_COMPETENCIAS:
+                # If sheet exists but is empty (only header or less), repopulate
+                if len(ws.get_all_values()) <= 1:
+                    ws.clear()
+                    ws.append_row(schema.headers)
+                    ws.append_rows(default_comps)
+                    _headers.pop(_ws_id(ws), None)
 
     get_competencias.clear()
     get_empresas.clear()
     get_usuarios.clear()
+    invalidate_snapshot(SHEET_COMPETENCIAS)
     return True
 
 
+def _invalidate_reads(sheet_name):
+    """Drop every cached read of a sheet after writing to it."""
+    invalidate_snapshot(sheet_name)
+    cached = {SHEET_USUARIOS: get_usuarios, SHEET_COMPETENCIAS: get_competencias, SHEET_EMPRESAS: get_empresas}
+    if sheet_name in cached:
+        cached[sheet_name].clear()
+
+
 # ============================================
 # USUARIOS (authentication)
 # ============================================
 
 @st.cache_data(ttl=15)
 def get_usuarios():
-    ss = get_spreadsheet()
-    try:
-        ws = ss.worksheet(SHEET_USUARIOS)
-        return safe_read(ws)
-    except (WorksheetNotFound, APIError):
-        return []
+    return read_sheet(SHEET_USUARIOS, default=[], on_refresh=lambda: get_usuarios.clear())
 
 
 def authenticate_student(usuario, password):
@@ -226,31 +1170,18 @@ def authenticate_student(usuario, password):
 
 
 def add_usuario(usuario, password, nombre, grupo):
-    ss = get_spreadsheet()
-    ws = ss.worksheet(SHEET_USUARIOS)
-    safe_append_row(ws, [usuario, password, nombre, grupo])
-    get_usuarios.clear()
+    return _commit(SHEET_USUARIOS, journal.OP_APPEND, [get_schema(SHEET_USUARIOS).row(
+        {"usuario": usuario, "password": password, "nombre": nombre, "grupo": grupo}
+    )])
 
 
 def add_usuarios_bulk(rows):
-    ss = get_spreadsheet()
-    ws = ss.worksheet(SHEET_USUARIOS)
-    safe_append_rows(ws, rows)
-    get_usuarios.clear()
+    return _commit(SHEET_USUARIOS, journal.OP_APPEND, rows)
 
 
 def delete_usuario(usuario):
-    ss = get_spreadsheet()
-    ws = ss.worksheet(SHEET_USUARIOS)
-    try:
-        cell = ws.find(usuario, in_column=1)
-        if cell:
-            ws.delete_rows(cell.row)
-            get_usuarios.clear()
-            return True
-    except (APIError, Exception):
-        pass
-    return False
+    """Delete every row of a usuario. Same return / raise contract as the other writes (_commit)."""
+    return _commit(SHEET_USUARIOS, journal.OP_DELETE, [], {"usuario": usuario})
 
 
 # ============================================
@@ -259,53 +1190,45 @@ def delete_usuario(usuario):
 
 @st.cache_data(ttl=30)
 def get_competencias():
-    ss = get_spreadsheet()
-    try:
-        ws = ss.worksheet(SHEET_COMPETENCIAS)
-        records = safe_read(ws)
-        return records
-    except (WorksheetNotFound, APIError):
+    records = read_sheet(SHEET_COMPETENCIAS, on_refresh=lambda: get_competencias.clear())
+    if records is None:
         return [{"codigo": c[0], "categoria": c[1], "descripcion": c[2]} for c in DEFAULT_COMPETENCIAS]
+    return records
+
+
+_catalog = DEFAULT_CATALOG
+
+
+def get_catalog():
+    """Catalog for the current Competencias snapshot, rebuilt only when its version changes."""
+    global _catalog
+    snap = get_snapshot(SHEET_COMPETENCIAS)
+    if snap.frame.empty:
+        return DEFAULT_CATALOG
+    if _catalog.version != snap.version:
+        _catalog = Catalog(snap.frame.to_dict("records"), snap.version)
+    return _catalog
 
 
 def get_competencias_flat():
-    comps = get_competencias()
-    return {c["codigo"]: c["descripcion"] for c in comps}
+    """{codigo: descripcion} (read-only)."""
+    return get_catalog().descriptions
 
 
 def get_competencias_by_category():
-    comps = get_competencias()
-    result = {}
-    for cat_key, cat_info in CATEGORIAS.items():
-        items = {c["codigo"]: c["descripcion"] for c in comps if c["categoria"] == cat_key}
-        if items:
-            result[cat_key] = {
-                "label": cat_info["label"],
-                "color": cat_info["color"],
-                "items": items,
-            }
-    return result
+    """{categoria: {label, color, items: {codigo: descripcion}}} (read-only)."""
+    return get_catalog().by_category
 
 
 def add_competencia(codigo, categoria, descripcion):
-    ss = get_spreadsheet()
-    ws = ss.worksheet(SHEET_COMPETENCIAS)
-    safe_append_row(ws, [codigo, categoria, descripcion])
-    get_competencias.clear()
+    return _commit(SHEET_COMPETENCIAS, journal.OP_APPEND, [get_schema(SHEET_COMPETENCIAS).row(
+        {"codigo": codigo, "categoria": categoria, "descripcion": descripcion}
+    )])
 
 
 def delete_competencia(codigo):
-    ss = get_spreadsheet()
-    ws = ss.worksheet(SHEET_COMPETENCIAS)
-    try:
-        cell = ws.find(codigo, in_column=1)
-        if cell:
-            ws.delete_rows(cell.row)
-            get_competencias.clear()
-            return True
-    except (APIError, Exception):
-        pass
-    return False
+    """Delete a competencia. Same return / raise contract as the other writes (_commit)."""
+    return _commit(SHEET_COMPETENCIAS, journal.OP_DELETE, [], {"codigo": codigo})
 
 
 # ============================================
@@ -314,180 +1237,116 @@ def delete_competencia(codigo):
 
 @st.cache_data(ttl=30)
 def get_empresas():
-    ss = get_spreadsheet()
-    try:
-        ws = ss.worksheet(SHEET_EMPRESAS)
-        return safe_read(ws)
-    except (WorksheetNotFound, APIError):
-        return []
+    return read_sheet(SHEET_EMPRESAS, default=[], on_refresh=lambda: get_empresas.clear())
 
 
 def add_empresa(empresa_data):
-    ss = get_spreadsheet()
-    ws = ss.worksheet(SHEET_EMPRESAS)
-    safe_append_row(ws, [
-        empresa_data.get("id", ""),
-        empresa_data.get("nombre", ""),
-        empresa_data.get("sector", ""),
-        empresa_data.get("web", ""),
-        empresa_data.get("descripcion", ""),
-    ])
-    get_empresas.clear()
+    return _commit(SHEET_EMPRESAS, journal.OP_APPEND, [get_schema(SHEET_EMPRESAS).row(empresa_data)])
+
+
+def add_empresas_bulk(rows):
+    return _commit(SHEET_EMPRESAS, journal.OP_APPEND, rows)
 
 
 # ============================================
 # FASE 1
 # ============================================
 
-def save_fase1(usuario, nombre, grupo, empresa_id, empresa_nombre, analisis, competencias_list):
-    """Save Fase 1 data. Deletes previous entry for same usuario+empresa first (edit support)."""
-    ss = get_spreadsheet()
-    ws = ss.worksheet(SHEET_FASE1)
-    ts = datetime.now().isoformat()
-
-    # Delete previous entries for this usuario + empresa
-    # Col 2 = usuario, Col 6 = empresa_nombre
-    delete_rows_matching(ws, [(2, usuario), (6, empresa_nombre)])
-
-    rows = []
-    for comp in competencias_list:
-        rows.append([
-            ts, usuario, nombre, grupo, empresa_id, empresa_nombre,
-            analisis.get("actividad_principal", ""),
-            analisis.get("presencia_digital", ""),
-            analisis.get("perfiles_necesitan", ""),
-            comp.get("codigo", ""),
-            comp.get("tipo", ""),
-            comp.get("justificacion", ""),
-            comp.get("nivel", ""),
-        ])
-
-    if rows:
-        safe_append_rows(ws, rows)
-    get_fase1_data.clear()
-    return True
+def save_fase1(usuario, nombre, grupo, empresa_id, empresa_nombre, analisis, competencias_list,
+               request_id=None):
+    """Save Fase 1 data. Replaces previous entry for same usuario+empresa (edit support).
+    Returns False if Sheets is down and the save is held in the local journal."""
+    schema = get_schema(SHEET_FASE1)
+    request_id = request_id or new_request_id()
+    base = {
+        "request_id": request_id,
+        "timestamp": datetime.now().isoformat(), "usuario": usuario, "nombre": nombre, "grupo": grupo,
+        "empresa_id": empresa_id, "empresa_nombre": empresa_nombre,
+        "actividad_principal": analisis.get("actividad_principal", ""),
+        "presencia_digital": analisis.get("presencia_digital", ""),
+        "perfiles_necesitan": analisis.get("perfiles_necesitan", ""),
+    }
+    rows = [
+        schema.row({
+            **base,
+            "competencia_codigo": comp.get("codigo", ""),
+            "competencia_tipo": comp.get("tipo", ""),
+            "competencia_justificacion": comp.get("justificacion", ""),
+            "competencia_nivel": comp.get("nivel", ""),
+        })
+        for comp in competencias_list
+    ]
+    return _commit(SHEET_FASE1, journal.OP_UPSERT, rows, base, request_id)
 
 
-@st.cache_data(ttl=30)
 def get_fase1_data():
-    ss = get_spreadsheet()
-    try:
-        ws = ss.worksheet(SHEET_FASE1)
-        records = safe_read(ws)
-        return pd.DataFrame(records)
-    except (WorksheetNotFound, APIError):
-        return pd.DataFrame()
+    return get_snapshot(SHEET_FASE1).view()
 
 
 # ============================================
 # FASE 2
 # ============================================
 
-def save_fase2(usuario, nombre, grupo, registro):
-    """Save Fase 2 data. Deletes previous entry for same usuario+empresa first (edit support)."""
-    ss = get_spreadsheet()
-    ws = ss.worksheet(SHEET_FASE2)
-    ts = datetime.now().isoformat()
-
-    empresa = registro.get("empresa_nombre", "")
-    # Delete previous entries for this usuario + empresa
-    # Col 2 = usuario, Col 5 = empresa_nombre
-    if empresa:
-        delete_rows_matching(ws, [(2, usuario), (5, empresa)])
-
-    safe_append_row(ws, [
-        ts, usuario, nombre, grupo,
-        empresa,
-        registro.get("persona_contacto", ""),
-        registro.get("cargo_contacto", ""),
-        registro.get("contacto_linkedin", ""),
-        registro.get("que_hacen_digital", ""),
-        registro.get("perfiles_buscan", ""),
-        registro.get("habilidades_tecnicas", ""),
-        registro.get("competencias_blandas", ""),
-        registro.get("gap_universidad", ""),
-        registro.get("oportunidades_practicas", ""),
-        registro.get("consejo", ""),
-        registro.get("sorpresa", ""),
-        registro.get("elevator_pitch_usado", ""),
-    ])
-    get_fase2_data.clear()
-    return True
+def save_fase2(usuario, nombre, grupo, registro, request_id=None):
+    """Save Fase 2 data. Replaces previous entry for same usuario+empresa (edit support)."""
+    schema = get_schema(SHEET_FASE2)
+    request_id = request_id or new_request_id()
+    values = {
+        **registro,
+        "request_id": request_id,
+        "timestamp": datetime.now().isoformat(), "usuario": usuario, "nombre": nombre, "grupo": grupo,
+        "empresa_nombre": registro.get("empresa_nombre", ""),
+    }
+    row = schema.row(values)
+    if values["empresa_nombre"]:
+        return _commit(SHEET_FASE2, journal.OP_UPSERT, [row], values, request_id)
+    return _commit(SHEET_FASE2, journal.OP_APPEND, [row], request_id=request_id)
 
 
-@st.cache_data(ttl=30)
 def get_fase2_data():
-    ss = get_spreadsheet()
-    try:
-        ws = ss.worksheet(SHEET_FASE2)
-        records = safe_read(ws)
-        return pd.DataFrame(records)
-    except (WorksheetNotFound, APIError):
-        return pd.DataFrame()
+    return get_snapshot(SHEET_FASE2).view()
 
 
 # ============================================
 # FASE 3
 # ============================================
 
-def save_fase3_competencias(usuario, nombre, grupo, empresa_nombre, competencias_v2):
-    """Save Fase 3 competencias. Deletes previous for same usuario+empresa (edit support)."""
-    ss = get_spreadsheet()
-    ws = ss.worksheet(SHEET_FASE3)
-    ts = datetime.now().isoformat()
-
-    # Delete previous competencia entries (not REFLEXION_GENERAL) for this usuario+empresa
-    # Col 2 = usuario, Col 5 = empresa_nombre
-    delete_rows_matching(ws, [(2, usuario), (5, empresa_nombre)])
-
-    rows = []
-    for comp in competencias_v2:
-        rows.append([
-            ts, usuario, nombre, grupo, empresa_nombre,
-            comp.get("codigo", ""),
-            comp.get("tipo", ""),
-            comp.get("justificacion_v2", ""),
-            comp.get("nivel_v2", ""),
-            comp.get("cambio_vs_v1", ""),
-            "", "", "", "", "", "",
-        ])
-
-    if rows:
-        safe_append_rows(ws, rows)
-    get_fase3_data.clear()
-    return True
+def save_fase3_competencias(usuario, nombre, grupo, empresa_nombre, competencias_v2, request_id=None):
+    """Save Fase 3 competencias. Replaces previous for same usuario+empresa (edit support)."""
+    schema = get_schema(SHEET_FASE3)
+    request_id = request_id or new_request_id()
+    base = {
+        "request_id": request_id,
+        "timestamp": datetime.now().isoformat(), "usuario": usuario, "nombre": nombre, "grupo": grupo,
+        "empresa_nombre": empresa_nombre,
+    }
+    rows = [
+        schema.row({
+            **base,
+            "competencia_codigo": comp.get("codigo", ""),
+            "competencia_tipo": comp.get("tipo", ""),
+            "competencia_justificacion_v2": comp.get("justificacion_v2", ""),
+            "competencia_nivel_v2": comp.get("nivel_v2", ""),
+            "cambio_vs_v1": comp.get("cambio_vs_v1", ""),
+        })
+        for comp in competencias_v2
+    ]
+    return _commit(SHEET_FASE3, journal.OP_UPSERT, rows, base, request_id)
+
+
+def save_fase3_reflexion(usuario, nombre, grupo, reflexion, request_id=None):
+    """Save Fase 3 reflexion. Replaces previous reflexion for same usuario (edit support)."""
+    schema = get_schema(SHEET_FASE3)
+    request_id = request_id or new_request_id()
+    # The reflexion is stored as a Fase 3 row with empresa_nombre = REFLEXION_GENERAL
+    values = {
+        **reflexion,
+        "request_id": request_id,
+        "timestamp": datetime.now().isoformat(), "usuario": usuario, "nombre": nombre, "grupo": grupo,
+        "empresa_nombre": "REFLEXION_GENERAL",
+    }
+    return _commit(SHEET_FASE3, journal.OP_UPSERT, [schema.row(values)], values, request_id)
 
 
-def save_fase3_reflexion(usuario, nombre, grupo, reflexion):
-    """Save Fase 3 reflexion. Deletes previous reflexion for same usuario (edit support)."""
-    ss = get_spreadsheet()
-    ws = ss.worksheet(SHEET_FASE3)
-    ts = datetime.now().isoformat()
-
-    # Delete previous REFLEXION_GENERAL for this usuario
-    # Col 2 = usuario, Col 5 = empresa_nombre (= REFLEXION_GENERAL)
-    delete_rows_matching(ws, [(2, usuario), (5, "REFLEXION_GENERAL")])
-
-    safe_append_row(ws, [
-        ts, usuario, nombre, grupo, "REFLEXION_GENERAL",
-        "", "", "", "", "",
-        reflexion.get("competencias_mas_demandadas", ""),
-        reflexion.get("competencias_sorpresa", ""),
-        reflexion.get("gap_uni_empresa", ""),
-        reflexion.get("posicionamiento_personal", ""),
-        reflexion.get("plan_accion", ""),
-        reflexion.get("valoracion_experiencia", ""),
-    ])
-    get_fase3_data.clear()
-    return True
-
-
-@st.cache_data(ttl=30)
 def get_fase3_data():
-    ss = get_spreadsheet()
-    try:
-        ws = ss.worksheet(SHEET_FASE3)
-        records = safe_read(ws)
-        return pd.DataFrame(records)
-    except (WorksheetNotFound, APIError):
-        return pd.DataFrame()
+    return get_snapshot(SHEET_FASE3).view()
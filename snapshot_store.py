@@ -0,0 +1,146 @@
+"""
+On-disk snapshot store for TechConnect Skills Map.
+Keeps the last successful read of every sheet in a local SQLite file,
+so a fresh process can serve immediately and reads survive Sheets outages.
+Past editions are archived the same way in a separate, durable file.
+"""
+
+import hashlib
+import json
+import os
+import pathlib
+import sqlite3
+import threading
+import zlib
+from collections import namedtuple
+from contextlib import closing
+from datetime import datetime
+
+
+CACHE_DIR = pathlib.Path(
+    os.environ.get("TECHCONNECT_CACHE_DIR", pathlib.Path(__file__).parent / ".cache")
+)
+DB_FILE = "snapshots.sqlite3"
+ARCHIVE_DIR = pathlib.Path(
+    os.environ.get("TECHCONNECT_ARCHIVE_DIR", pathlib.Path(__file__).parent / "archive")
+)
+ARCHIVE_FILE = "editions.sqlite3"
+
+StoredSnapshot = namedtuple("StoredSnapshot", ["records", "version", "fetched_at"])
+
+_lock = threading.Lock()
+
+
+def snapshot_version(records):
+    """Short content hash used as the version stamp of a snapshot."""
+    payload = json.dumps(records, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def _connect():
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(CACHE_DIR / DB_FILE), timeout=10)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS snapshots ("
+        "sheet TEXT PRIMARY KEY, version TEXT NOT NULL, "
+        "fetched_at TEXT NOT NULL, payload BLOB NOT NULL)"
+    )
+    return conn
+
+
+def save_snapshot(sheet_name, records, version=None):
+    """Persist records for a sheet. Returns the version stamp (None if the disk write failed)."""
+    version = version or snapshot_version(records)
+    fetched_at = datetime.now().isoformat()
+    try:
+        with _lock, closing(_connect()) as conn, conn:
+            row = conn.execute("SELECT version FROM snapshots WHERE sheet = ?", (sheet_name,)).fetchone()
+            if row and row[0] == version:
+                # Same content: only refresh the timestamp
+                conn.execute("UPDATE snapshots SET fetched_at = ? WHERE sheet = ?", (fetched_at, sheet_name))
+            else:
+                blob = zlib.compress(json.dumps(records, ensure_ascii=False, default=str).encode("utf-8"))
+                conn.execute(
+                    "INSERT OR REPLACE INTO snapshots (sheet, version, fetched_at, payload) VALUES (?, ?, ?, ?)",
+                    (sheet_name, version, fetched_at, blob),
+                )
+    except (OSError, sqlite3.Error):
+        return None
+    return version
+
+
+def load_snapshot(sheet_name):
+    """Returns the last stored StoredSnapshot for a sheet, or None."""
+    try:
+        with _lock, closing(_connect()) as conn:
+            row = conn.execute(
+                "SELECT payload, version, fetched_at FROM snapshots WHERE sheet = ?", (sheet_name,)
+            ).fetchone()
+    except (OSError, sqlite3.Error):
+        return None
+    if not row:
+        return None
+    try:
+        records = json.loads(zlib.decompress(row[0]).decode("utf-8"))
+    except (zlib.error, ValueError):
+        return None
+    return StoredSnapshot(records, row[1], row[2])
+
+
+# ============================================
+# EDITION ARCHIVES
+# ============================================
+
+def _connect_archive():
+    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(ARCHIVE_DIR / ARCHIVE_FILE), timeout=10)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS archives ("
+        "edition TEXT NOT NULL, sheet TEXT NOT NULL, archived_at TEXT NOT NULL, "
+        "payload BLOB NOT NULL, PRIMARY KEY (edition, sheet))"
+    )
+    return conn
+
+
+def save_archive(edition, sheet_name, records):
+    """Store (or replace) a past edition's records for a sheet. Returns False if the disk write failed."""
+    blob = zlib.compress(json.dumps(records, ensure_ascii=False, default=str).encode("utf-8"), 9)
+    try:
+        with _lock, closing(_connect_archive()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO archives (edition, sheet, archived_at, payload) VALUES (?, ?, ?, ?)",
+                (str(edition), sheet_name, datetime.now().isoformat(), blob),
+            )
+    except (OSError, sqlite3.Error):
+        return False
+    return True
+
+
+def load_archive(edition, sheet_name):
+    """Archived records of a sheet for an edition, or None."""
+    if not (ARCHIVE_DIR / ARCHIVE_FILE).exists():
+        return None
+    try:
+        with _lock, closing(_connect_archive()) as conn:
+            row = conn.execute(
+                "SELECT payload FROM archives WHERE edition = ? AND sheet = ?", (str(edition), sheet_name)
+            ).fetchone()
+    except (OSError, sqlite3.Error):
+        return None
+    if not row:
+        return None
+    try:
+        return json.loads(zlib.decompress(row[0]).decode("utf-8"))
+    except (zlib.error, ValueError):
+        return None
+
+
+def archived_editions():
+    """Editions present in the archive, sorted."""
+    if not (ARCHIVE_DIR / ARCHIVE_FILE).exists():
+        return []
+    try:
+        with _lock, closing(_connect_archive()) as conn:
+            return [r[0] for r in conn.execute("SELECT DISTINCT edition FROM archives ORDER BY edition")]
+    except (OSError, sqlite3.Error):
+        return []
@@ -0,0 +1,28 @@
+"""
+Shared fixtures for the TechConnect Skills Map tests.
+The app modules live at the repository root; the SQLite journal and snapshot
+store are pointed at a temporary folder per test.
+"""
+
+import pathlib
+import sys
+
+import pytest
+import streamlit.logger
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+# st.cache_data works without a running app, but warns about it on every call
+streamlit.logger.set_log_level("error")
+
+import journal  # noqa: E402
+import snapshot_store  # noqa: E402
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """Local cache (journal and disk snapshots) in tmp_path. CACHE_DIR is read at import."""
+    monkeypatch.setenv("TECHCONNECT_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(snapshot_store, "CACHE_DIR", tmp_path)
+    monkeypatch.setattr(journal, "CACHE_DIR", tmp_path)
+    return tmp_path
@@ -0,0 +1,154 @@
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+import pytest
+
+import analytics
+from competencias import Catalog
+
+
+# ============================================
+# AGGREGATE CACHE
+# ============================================
+@pytest.fixture
+def aggregates(monkeypatch):
+    monkeypatch.setattr(analytics, "_aggregates", OrderedDict())
+    return analytics._aggregates
+
+
+def counting(result):
+    calls = []
+
+    def build():
+        calls.append(1)
+        return result
+    return build, calls
+
+
+def test_built_once_per_version_and_params(aggregates):
+    build, calls = counting(1)
+    for _ in range(3):
+        analytics.cached_aggregate("x", ("v1",), (), build)
+    analytics.cached_aggregate("x", ("v1",), ("A",), build)
+    analytics.cached_aggregate("x", ("v2",), (), build)
+    assert len(calls) == 3
+
+
+def test_least_recently_used_entries_are_evicted(aggregates, monkeypatch):
+    monkeypatch.setattr(analytics, "AGGREGATE_CACHE_ENTRIES", 2)
+    build, calls = counting(1)
+    analytics.cached_aggregate("x", 1, (), build)
+    analytics.cached_aggregate("x", 2, (), build)
+    analytics.cached_aggregate("x", 1, (), build)   # 2 is now the oldest
+    analytics.cached_aggregate("x", 3, (), build)
+    assert [key[1] for key in aggregates] == [1, 3]
+    analytics.cached_aggregate("x", 1, (), build)
+    assert len(calls) == 3
+
+
+def test_callers_get_their_own_frame(aggregates):
+    build, _ = counting(pd.DataFrame({"n": [1, 2]}))
+    mine = analytics.cached_aggregate("x", 1, (), build)
+    mine.loc[0, "n"] = 99
+    mine.columns = ["m"]
+    assert analytics.cached_aggregate("x", 1, (), build).to_dict("list") == {"n": [1, 2]}
+
+
+def test_concurrent_sessions_build_once(aggregates):
+    calls = []
+
+    def build():
+        calls.append(1)
+        time.sleep(0.05)
+        return 1
+    threads = [threading.Thread(target=analytics.cached_aggregate, args=("x", 1, (), build)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+
+
+# ============================================
+# SIMILAR STUDENTS
+# ============================================
+CATALOG = Catalog([{"codigo": c, "categoria": "C", "descripcion": c} for c in ("C15", "C35", "H21")], "v1")
+
+
+def phase(*rows):
+    return pd.DataFrame(
+        [(u, u.title(), g, e, c) for u, g, e, c in rows],
+        columns=["usuario", "nombre", "grupo", "empresa_nombre", "competencia_codigo"],
+    )
+
+
+F1 = phase(
+    ("ana", "A", "Acme", "C15"), ("ana", "A", "Acme", "H21"),
+    ("bea", "B", "Acme", "C15"), ("bea", "B", "Acme", "H21"), ("bea", "B", "Initech", "X99"),
+    ("cai", "A", "Globex", "C15"),
+    ("dan", "B", "Globex", "C35"),
+)
+F3 = phase(("ana", "A", "Acme", "C15"), ("bea", "B", "Acme", "C15"))
+
+
+@pytest.fixture(scope="module")
+def peers():
+    return analytics.PeerIndex(F1, F3, CATALOG)
+
+
+def test_similar_students_best_first(peers):
+    out = peers.similar(" ANA")
+    assert out["usuario"].tolist() == ["bea", "cai"]   # dan shares nothing
+    assert out["similitud"].tolist() == pytest.approx([1.0, 0.333])
+    assert out["en_comun"].tolist() == [3, 1]
+    assert out[["nombre", "grupo"]].iloc[0].tolist() == ["Bea", "B"]
+
+
+def test_cosine_metric(peers):
+    assert peers.similar("ana", metric="coseno")["similitud"].tolist() == pytest.approx([1.0, 0.577])
+
+
+def test_unknown_student(peers):
+    assert "eva" not in peers
+    assert peers.similar("eva").empty and peers.peer_companies("eva").empty
+
+
+def test_most_similar_pairs(peers):
+    pairs = peers.most_similar_pairs()
+    assert pairs.iloc[0][["usuario_a", "usuario_b", "similitud"]].tolist() == ["ana", "bea", 1.0]
+    assert "dan" not in set(pairs["usuario_a"]) | set(pairs["usuario_b"])
+
+
+def test_peer_companies_skip_the_ones_already_analyzed(peers):
+    out = peers.peer_companies("ana")
+    assert out[["empresa_nombre", "companeros"]].values.tolist() == [["Globex", 1]]
+    assert out["puntuacion"].tolist() == pytest.approx([0.333])
+
+
+def test_empty_cohort():
+    empty = analytics.PeerIndex(phase(), phase(), CATALOG)
+    assert empty.similar("ana").empty and empty.most_similar_pairs().empty
+
+
+# ============================================
+# COMPANY RECOMMENDATIONS
+# ============================================
+def test_recommendations_weigh_affinity_and_coverage():
+    out = analytics.CompanyProfiles(F1, CATALOG).recommend(["Acme", "Globex", "Hooli", "Hooli "], ["C35"], exclude=["ACME"])
+    assert out["empresa_nombre"].tolist() == ["Hooli", "Globex"]   # nobody analyzed Hooli yet
+    hooli, globex = out.to_dict("records")
+    assert (hooli["afinidad"], hooli["estudiantes"], hooli["cobertura"]) == (0.0, 0, 1.0)
+    assert (globex["afinidad"], globex["estudiantes"], globex["cobertura"]) == (0.707, 2, 0.0)
+    assert globex["en_comun"] == ["C35"]
+
+
+def test_recommendations_without_fase1_rows():
+    out = analytics.CompanyProfiles(phase(), CATALOG).recommend(["Acme", "Globex"], ["C15"])
+    assert out["empresa_nombre"].tolist() == ["Acme", "Globex"]
+    assert out["afinidad"].tolist() == [0.0, 0.0] and out["cobertura"].tolist() == [1.0, 1.0]
+
+
+def test_no_candidates():
+    assert analytics.CompanyProfiles(F1, CATALOG).recommend(["Acme"], ["C15"], exclude=["acme"]).empty
@@ -0,0 +1,29 @@
+import csv
+import io
+import zipfile
+
+import pandas as pd
+
+import bulk_export
+import sheets_backend as sb
+
+
+def test_batch_values_parse_like_get_all_records():
+    value_range = {"values": [["usuario", "password", "grupo"], ["ana", "0012"], ["bea", "7", "B"]]}
+    assert sb._value_range_records(value_range) == [
+        {"usuario": "ana", "password": 12, "grupo": ""},
+        {"usuario": "bea", "password": 7, "grupo": "B"},
+    ]
+    assert sb._value_range_records({"range": "'Empresas'!A1:Z1000"}) == []
+
+
+def test_zip_has_every_sheet_and_their_versions():
+    snapshots = {
+        "Usuarios": sb.Snapshot("Usuarios", "v1", pd.DataFrame({"usuario": ["ana", "bea"]}), 0),
+        "Empresas": sb.Snapshot("Empresas", "v2", pd.DataFrame({"nombre": ["Acmé"]}), 0),
+    }
+    with zipfile.ZipFile(io.BytesIO(bulk_export.export_zip(snapshots, "csv"))) as zf:
+        assert zf.namelist() == ["Usuarios.csv", "Empresas.csv", "versiones.csv"]
+        assert zf.read("Empresas.csv").decode("utf-8-sig").splitlines() == ["nombre", "Acmé"]
+        versions = list(csv.reader(io.StringIO(zf.read("versiones.csv").decode("utf-8"))))
+    assert versions == [["hoja", "filas", "version"], ["Usuarios", "2", "v1"], ["Empresas", "1", "v2"]]
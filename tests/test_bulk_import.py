@@ -0,0 +1,73 @@
+import io
+
+import pytest
+
+import bulk_import
+from schemas import SHEET_EMPRESAS, SHEET_USUARIOS
+
+
+def records(text, sheet_name, filename="datos.csv"):
+    return list(bulk_import.read_records(io.BytesIO(text.encode("utf-8")), filename, sheet_name))
+
+
+# ============================================
+# PARSING
+# ============================================
+def test_headers_are_matched_through_aliases():
+    text = "Correo;Contraseña;Nombre completo;Clase;Notas\nana@x.es;1;Ana  Pérez;A;ignorar\n"
+    assert records(text, SHEET_USUARIOS) == [
+        (2, {"usuario": "ana@x.es", "password": "1", "nombre": "Ana Pérez", "grupo": "A"}),
+    ]
+
+
+def test_blank_rows_are_skipped_and_lines_kept():
+    text = "Empresa,URL\nAcme,acme.com\n,\nGlobex,\n"
+    assert records(text, SHEET_EMPRESAS) == [
+        (2, {"nombre": "Acme", "web": "acme.com"}), (4, {"nombre": "Globex", "web": ""}),
+    ]
+
+
+def test_xlsx(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    wb = openpyxl.Workbook()
+    wb.active.append(["User", "Name", "Group"])
+    wb.active.append(["bea", "Bea", None])
+    wb.save(tmp_path / "u.xlsx")
+    with open(tmp_path / "u.xlsx", "rb") as f:
+        assert list(bulk_import.read_records(f, "u.xlsx", SHEET_USUARIOS)) == [
+            (2, {"usuario": "bea", "nombre": "Bea", "grupo": ""}),
+        ]
+
+
+# ============================================
+# PLANNING
+# ============================================
+def test_existing_and_repeated_keys_are_skipped():
+    recs = [(2, {"usuario": "Ana", "password": "1"}), (3, {"usuario": "bea", "password": "2"}),
+            (4, {"usuario": " BEA", "password": "3"}), (5, {"nombre": "Sin usuario"})]
+    job = bulk_import.plan_import(SHEET_USUARIOS, recs, [{"usuario": "ana"}])
+    assert [r[0] for r in job.rows] == ["bea"]
+    assert job.skipped == [(2, "duplicado"), (4, "duplicado"), (5, "falta usuario")]
+    assert job.total == 4
+
+
+def test_students_without_password_get_an_access_code():
+    job = bulk_import.plan_import(SHEET_USUARIOS, [(2, {"usuario": "cai"})], [])
+    [(usuario, code)] = job.generated
+    assert usuario == "cai" and job.rows[0][1] == code
+    assert len(code) == bulk_import.CODE_LENGTH and set(code) <= set(bulk_import.CODE_ALPHABET)
+
+
+def test_companies_get_an_id_from_their_name():
+    job = bulk_import.plan_import(SHEET_EMPRESAS, [(2, {"nombre": "Acme Labs"})], [])
+    assert job.rows[0][:2] == ["acme_labs", "Acme Labs"]
+
+
+def test_job_writes_in_chunks_and_counts_held_ones(monkeypatch):
+    monkeypatch.setattr(bulk_import, "CHUNK_ROWS", 2)
+    recs = [(i, {"usuario": f"u{i}", "password": "x"}) for i in range(5)]
+    job = bulk_import.plan_import(SHEET_USUARIOS, recs, [])
+    chunks = []
+    job.run(lambda rows: chunks.append(len(rows)) or len(chunks) != 2)
+    assert chunks == [2, 2, 1]
+    assert job.finished and job.held == 1
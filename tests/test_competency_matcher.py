@@ -0,0 +1,38 @@
+import pytest
+
+from competencias import DEFAULT_CATALOG, Catalog
+from competency_matcher import MAX_CODES, CatalogMatcher
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return CatalogMatcher(Catalog([
+        {"codigo": "SEO", "categoria": "C", "descripcion": "Soy capaz de optimizar el posicionamiento SEO en buscadores"},
+        {"codigo": "UX", "categoria": "C", "descripcion": "Soy capaz de diseñar interfaces y experiencia de usuario"},
+        {"codigo": "RRSS", "categoria": "C", "descripcion": "Manejo la gestión de redes sociales y comunidades"},
+    ], "v1"))
+
+
+def test_notes_match_the_closest_description(matcher):
+    assert [code for code, _ in matcher.match("Buscan diseñadores de interfaces")] == ["UX"]
+    assert matcher.match("Quieren gente para gestionar sus redes sociales")[0][0] == "RRSS"
+
+
+def test_shared_catalog_phrasing_is_not_evidence(matcher):
+    assert matcher.match("soy capaz") == []
+
+
+def test_unrelated_notes_match_nothing(matcher):
+    assert matcher.match("") == []
+    assert matcher.match("Muy simpáticos, nos invitaron a café") == []
+
+
+def test_scores_are_cosines_best_first(matcher):
+    scores = [s for _, s in matcher.match("SEO y diseño de interfaces de usuario")]
+    assert scores == sorted(scores, reverse=True)
+    assert all(0 < s <= 1 for s in scores)
+
+
+def test_at_most_max_codes():
+    text = " ".join(DEFAULT_CATALOG.descriptions.values())
+    assert len(CatalogMatcher(DEFAULT_CATALOG).match(text)) <= MAX_CODES
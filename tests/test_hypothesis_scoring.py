@@ -0,0 +1,41 @@
+import pandas as pd
+
+from hypothesis_scoring import score
+
+
+def phase(*rows):
+    return pd.DataFrame(rows, columns=["usuario", "grupo", "empresa_nombre", "competencia_codigo"])
+
+
+F1 = phase(
+    ("ana", "A", "Acme", "C15"), ("ana", "A", "Acme", "H21"),
+    ("bea", "B", "Acme", "C15"),
+    ("cai", "A", "Globex", "C35"),
+    ("ana", "A", "REFLEXION_GENERAL", "C15"),
+)
+F3 = phase(("ana", "A", "Acme", "C15"), ("bea", "B", "Acme", "C15"))
+EVIDENCE = pd.DataFrame({"usuario": ["dan"], "empresa_nombre": ["Acme"], "competencia_codigo": ["H21"], "score": [0.5]})
+
+
+def by_user(table):
+    return table.set_index("usuario").to_dict("index")
+
+
+def test_observed_codes_come_from_other_students_and_fase2():
+    pairs, students, grupos, empresas = score(F1, F3, EVIDENCE)
+    assert sorted(zip(pairs["usuario"], pairs["empresa"])) == [("ana", "Acme"), ("bea", "Acme")]
+    ana, bea = by_user(students)["ana"], by_user(students)["bea"]
+    assert (ana["hipotesis"], ana["observadas"], ana["aciertos"], ana["f1"]) == (2, 2, 2, 1.0)
+    assert (bea["precision"], bea["recall"], bea["f1"]) == (1.0, 0.5, 0.667)
+    assert empresas.set_index("empresa").loc["Acme", "pares"] == 2
+    assert sorted(grupos["grupo"]) == ["A", "B"]
+
+
+def test_own_fase3_codes_are_not_evidence():
+    pairs, students, _, _ = score(phase(("ana", "A", "Acme", "C15")), phase(("ana", "A", "Acme", "C15")), None)
+    assert pairs.empty and students.empty
+
+
+def test_no_data():
+    pairs, students, grupos, empresas = score(phase(), phase(), pd.DataFrame())
+    assert pairs.empty and students.empty and grupos.empty and empresas.empty
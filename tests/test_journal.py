@@ -0,0 +1,91 @@
+import journal
+from schemas import SCHEMAS, SHEET_EMPRESAS, SHEET_FASE1
+
+EMPRESAS = SCHEMAS[SHEET_EMPRESAS]
+FASE1 = SCHEMAS[SHEET_FASE1]
+
+
+def event(op, rows=(), key=(), seq=1):
+    return journal.Event(seq, "", SHEET_EMPRESAS, op, tuple(key), [list(r) for r in rows], "", False)
+
+
+def empresa(nombre, sector=""):
+    return EMPRESAS.row({"id": nombre.lower(), "nombre": nombre, "sector": sector})
+
+
+def fase1(usuario, empresa_nombre, codigo, ts="2026-03-01T10:00:00"):
+    return FASE1.row({"timestamp": ts, "usuario": usuario, "empresa_nombre": empresa_nombre,
+                      "competencia_codigo": codigo})
+
+
+# ============================================
+# REPLAY
+# ============================================
+def test_replay_appends_to_base():
+    rows = journal.replay(EMPRESAS, [event(journal.OP_APPEND, [empresa("Globex")])], [empresa("Acme")])
+    assert [r[1] for r in rows] == ["Acme", "Globex"]
+
+
+def test_replay_reset_replaces_everything_before_it():
+    evts = [event(journal.OP_APPEND, [empresa("Acme")]), event(journal.OP_RESET, [empresa("Initech")])]
+    assert [r[1] for r in journal.replay(EMPRESAS, evts, [empresa("Globex")])] == ["Initech"]
+
+
+def test_replay_upsert_replaces_rows_with_the_key():
+    base = [fase1("ana", "Acme", "C15"), fase1("ana", "Acme", "H21"), fase1("bea", "Acme", "C15")]
+    upsert = event(journal.OP_UPSERT, [fase1("ana", "Acme", "C35")], key=("ana", "Acme"))
+    rows = journal.replay(FASE1, [upsert], base)
+    assert sorted((r[1], r[9]) for r in rows) == [("ana", "C35"), ("bea", "C15")]
+
+
+def test_replay_matches_keys_like_the_backend():
+    upsert = event(journal.OP_UPSERT, [empresa("Acme", "nuevo")], key=(" ACME ",))
+    rows = journal.replay(EMPRESAS, [upsert], [empresa("acme", "viejo")])
+    assert [(r[1], r[2]) for r in rows] == [("Acme", "nuevo")]
+
+
+def test_replay_delete_removes_rows_with_the_key():
+    rows = journal.replay(EMPRESAS, [event(journal.OP_DELETE, key=("acme",))], [empresa("Acme"), empresa("Globex")])
+    assert [r[1] for r in rows] == ["Globex"]
+
+
+# ============================================
+# LOG
+# ============================================
+def test_rebuild_replays_the_log(cache_dir):
+    journal.record(SHEET_EMPRESAS, journal.OP_RESET, [empresa("Acme")], flushed=True)
+    journal.record(SHEET_EMPRESAS, journal.OP_APPEND, [empresa("Globex")])
+    journal.record(SHEET_EMPRESAS, journal.OP_DELETE, key=("acme",))
+    assert [r[1] for r in journal.rebuild(SHEET_EMPRESAS, EMPRESAS)] == ["Globex"]
+
+
+def test_rebuild_at_a_past_timestamp(cache_dir):
+    journal.record(SHEET_EMPRESAS, journal.OP_APPEND, [empresa("Acme")])
+    first = journal.events(SHEET_EMPRESAS)[0]
+    journal.record(SHEET_EMPRESAS, journal.OP_APPEND, [empresa("Globex")])
+    assert [r[1] for r in journal.rebuild(SHEET_EMPRESAS, EMPRESAS, at=first.ts)] == ["Acme"]
+
+
+def test_events_per_sheet_and_pending(cache_dir):
+    seq = journal.record(SHEET_EMPRESAS, journal.OP_APPEND, [empresa("Acme")])
+    journal.record(SHEET_EMPRESAS, journal.OP_APPEND, [empresa("Globex")])
+    journal.record(SHEET_FASE1, journal.OP_APPEND, [fase1("ana", "Acme", "C15")])
+    journal.mark_flushed(seq)
+    assert [e.rows[0][1] for e in journal.events(SHEET_EMPRESAS, pending_only=True)] == ["Globex"]
+    assert journal.pending_count() == 2
+    assert journal.pending_count(SHEET_EMPRESAS) == 1
+
+
+def test_failed_events_are_set_aside_until_retried(cache_dir):
+    seq = journal.record(SHEET_EMPRESAS, journal.OP_APPEND, [empresa("Acme")])
+    journal.mark_failed(seq, "403 PERMISSION_DENIED")
+    assert journal.events(SHEET_EMPRESAS) == []
+    assert journal.pending_count() == 0
+    assert journal.failed_count() == 1
+    assert journal.failure(seq) == "403 PERMISSION_DENIED"
+    [(ev, _, error)] = journal.failures()
+    assert (ev.seq, error) == (seq, "403 PERMISSION_DENIED")
+
+    assert journal.retry_failed([seq]) == 1
+    assert journal.failure(seq) is None
+    assert [e.seq for e in journal.events(SHEET_EMPRESAS, pending_only=True)] == [seq]
@@ -0,0 +1,66 @@
+import pandas as pd
+
+from schemas import SCHEMAS, SHEET_EMPRESAS, SHEET_FASE1
+
+FASE1 = SCHEMAS[SHEET_FASE1]
+
+
+def fase1(usuario, empresa, codigo, ts, request_id=""):
+    return {"timestamp": ts, "usuario": usuario, "empresa_nombre": empresa,
+            "competencia_codigo": codigo, "request_id": request_id}
+
+
+def frame(*records):
+    """Parsed Fase 1 frame, every column present as read from the sheet."""
+    return FASE1.parse([dict(zip(FASE1.headers, FASE1.row(r))) for r in records])
+
+
+# ============================================
+# DEDUPE (retried saves)
+# ============================================
+def test_dedupe_drops_rows_written_twice_by_a_retry():
+    df = frame(fase1("ana", "Acme", "C15", "2026-03-01T10:00", "r1"),
+               fase1("ana", "Acme", "H21", "2026-03-01T10:00", "r1"),
+               fase1("ana", "Acme", "C15", "2026-03-01T10:00", "r1"))
+    assert FASE1.dedupe(df)["competencia_codigo"].tolist() == ["C15", "H21"]
+
+
+def test_dedupe_keeps_rows_without_request_id():
+    df = frame(fase1("ana", "Acme", "C15", "2026-03-01T10:00"), fase1("ana", "Acme", "C15", "2026-03-01T10:00"))
+    assert len(FASE1.dedupe(df)) == 2
+
+
+def test_dedupe_needs_request_id_column():
+    df = pd.DataFrame({"nombre": ["Acme", "Acme"]})
+    assert SCHEMAS[SHEET_EMPRESAS].dedupe(df) is df
+
+
+# ============================================
+# LATEST (append-only saves)
+# ============================================
+def test_latest_keeps_only_the_newest_save_of_each_key():
+    df = frame(fase1("ana", "Acme", "C15", "2026-03-01T10:00", "r1"),
+               fase1("ana", "Acme", "H21", "2026-03-01T10:00", "r1"),
+               fase1("ANA ", "Acme", "C35", "2026-03-01T11:00", "r2"),
+               fase1("bea", "Acme", "C15", "2026-03-01T09:00", "r3"))
+    out = FASE1.latest(df)
+    assert sorted(zip(out["usuario"], out["competencia_codigo"])) == [("ANA ", "C35"), ("bea", "C15")]
+
+
+def test_latest_keeps_rows_with_a_blank_key_part():
+    df = frame(fase1("ana", "", "C15", "2026-03-01T10:00"), fase1("ana", "", "H21", "2026-03-01T11:00"))
+    assert len(FASE1.latest(df)) == 2
+
+
+def test_superseded_points_at_the_raw_rows_latest_drops():
+    rows = [FASE1.row(fase1("ana", "Acme", "C15", "2026-03-01T10:00")),
+            FASE1.row(fase1("bea", "Acme", "C15", "2026-03-01T10:00")),
+            FASE1.row(fase1("ana", "acme", "C35", "2026-03-01T11:00"))]
+    assert FASE1.superseded(rows) == [0]
+
+
+def test_parse_types_known_columns_and_keeps_extra_ones():
+    df = FASE1.parse([{**fase1("ana", "Acme", "C15", "2026-03-01T10:00"), "nota": 7}])
+    assert pd.api.types.is_datetime64_any_dtype(df["timestamp"])
+    assert df["competencia_codigo"].dtype == "category"
+    assert df["nota"].tolist() == [7]
@@ -0,0 +1,58 @@
+import pytest
+
+import sheets_backend as sb
+from schemas import SCHEMAS, SHEET_FASE1, SHEET_USUARIOS
+
+SHARDS = [{"grupos": ["A", "B"]}, {}, {}]
+
+
+@pytest.fixture
+def shards(monkeypatch):
+    monkeypatch.setattr(sb, "get_shards", lambda: SHARDS)
+
+
+def test_not_sharded(monkeypatch):
+    monkeypatch.setattr(sb, "get_shards", lambda: [])
+    assert sb.shard_for("ana", "A") is None
+    assert sb._sheet_shards(SHEET_FASE1) == [None]
+
+
+def test_listed_grupo_goes_to_its_shard(shards):
+    assert sb.shard_for("ana", " a ") == 0
+    assert sb.shard_for("bea", "B") == 0
+
+
+def test_other_students_are_hashed_over_shards_without_grupos(shards):
+    placed = {sb.shard_for(f"u{i}", "C") for i in range(50)}
+    assert placed == {1, 2}
+    assert sb.shard_for("Ana ", "C") == sb.shard_for("ana", "C")
+
+
+def test_rows_follow_their_student(shards):
+    fase1 = SCHEMAS[SHEET_FASE1]
+    assert sb._shard_of_row(fase1, fase1.row({"usuario": "ana", "grupo": "A"})) == 0
+    usuarios = SCHEMAS[SHEET_USUARIOS]
+    assert sb._shard_of_row(usuarios, usuarios.row({"usuario": "ana", "grupo": "A"})) is None
+
+
+def test_only_phase_sheets_are_sharded(shards):
+    assert sb._sheet_shards(SHEET_FASE1) == [0, 1, 2]
+    assert sb._sheet_shards(SHEET_USUARIOS) == [None]
+
+
+class Worksheet:
+    def __init__(self, spreadsheet_id, header):
+        self.spreadsheet_id, self.title, self.header, self.reads = spreadsheet_id, SHEET_FASE1, header, 0
+
+    def row_values(self, row):
+        self.reads += 1
+        return self.header
+
+
+def test_header_cache_tells_shards_apart(monkeypatch):
+    monkeypatch.setattr(sb, "_headers", {})
+    a, b = Worksheet("s0", ["usuario", "grupo"]), Worksheet("s1", ["grupo", "usuario"])
+    assert sb._get_header(a) == ["usuario", "grupo"]
+    assert sb._get_header(b) == ["grupo", "usuario"]
+    assert sb._get_header(a) == ["usuario", "grupo"]
+    assert (a.reads, b.reads) == (1, 1)
@@ -0,0 +1,52 @@
+import pandas as pd
+
+from text_search import TextIndex, fold, snippet, stem, terms
+
+
+def test_fold_strips_accents_and_case():
+    assert fold("Comunicación DIGITAL, Ñandú") == "comunicacion digital, nandu"
+
+
+def test_stems_join_plurals_and_derived_words():
+    assert stem("disenadores") == stem("diseno") == "disen"
+    assert stem("comunicaciones") == stem("comunicacion")
+    assert stem("red") == "red"   # too short to strip
+
+
+def test_terms_drop_stopwords():
+    assert terms("Trabajo en equipo") == terms("trabajo equipo")
+
+
+def test_snippet_bolds_every_match():
+    assert snippet("SEO, Figma y analítica web", {stem("figma")}) == "SEO, **Figma** y analítica web"
+    assert snippet("SEO", {stem("figma")}) is None
+
+
+def notes(*rows):
+    return pd.DataFrame([
+        {"usuario": u, "empresa_nombre": e, "timestamp": "2026-03-02T10:00", "request_id": u + e,
+         "habilidades_tecnicas": h, "consejo": c}
+        for u, e, h, c in rows
+    ])
+
+
+def test_search_needs_every_word_and_ranks_by_matches():
+    index = TextIndex()
+    index.update(notes(
+        ("ana", "Acme", "Diseño y diseñadores UX", "Portfolio"),
+        ("bea", "Globex", "Diseño gráfico", "Portfolios con diseño web"),
+        ("cai", "Initech", "Redes sociales", "Portfolio"),
+    ), "v1")
+    hits = index.search("diseño portfolio")
+    assert [h.row["usuario"] for h in hits] == ["ana", "bea"]
+    assert hits[0].score == 3
+    assert [col for col, _ in hits[1].fields] == ["habilidades_tecnicas", "consejo"]
+    assert index.search("en la") == []
+
+
+def test_update_only_indexes_new_rows_and_drops_removed_ones():
+    index = TextIndex()
+    first = notes(("ana", "Acme", "SEO", ""), ("bea", "Globex", "Figma", ""))
+    assert index.update(first, "v1") == (2, 0)
+    assert index.update(notes(("bea", "Globex", "Figma", ""), ("cai", "Acme", "SEO", "")), "v2") == (1, 1)
+    assert [h.row["usuario"] for h in index.search("seo")] == ["cai"]
@@ -0,0 +1,190 @@
+"""
+Full-text search over Fase 2 conversation notes for TechConnect Skills Map.
+An inverted index (stem -> rows) is kept per process and updated incrementally
+when the Fase 2 snapshot changes: only added or removed rows are (re)indexed.
+Matching folds case and accents and uses a light Spanish stemmer, so
+"portfolio"/"portfolios" or "diseño"/"diseñadores" find each other.
+"""
+
+import re
+import threading
+import unicodedata
+from collections import namedtuple
+from functools import lru_cache
+
+from sheets_backend import SHEET_FASE2, get_snapshot
+
+
+# Searchable Fase 2 columns and their labels in results
+SEARCH_FIELDS = {
+    "que_hacen_digital": "Qué hacen en digital",
+    "perfiles_buscan": "Perfiles que buscan",
+    "habilidades_tecnicas": "Habilidades técnicas",
+    "competencias_blandas": "Competencias blandas",
+    "gap_universidad": "Gap universidad-empresa",
+    "consejo": "Consejo",
+}
+
+SNIPPET_CHARS = 70      # context shown on each side of the first match
+MIN_STEM = 3
+
+# Longest first; a suffix is only removed if MIN_STEM letters remain
+SUFFIXES = sorted((
+    "amientos", "imientos", "amiento", "imiento", "aciones", "uciones", "adoras", "adores",
+    "ancias", "encias", "idades", "mente", "acion", "ucion", "adora", "ador", "ante", "ancia",
+    "encia", "idad", "ismo", "ista", "ible", "able", "osos", "osas", "oso", "osa", "ivos",
+    "ivas", "ivo", "iva", "ando", "iendo", "ados", "idos", "adas", "idas", "ado", "ido",
+    "ada", "ida", "ar", "er", "ir", "es", "os", "as", "s", "o", "a", "e",
+), key=len, reverse=True)
+
+# Not indexed, and ignored in queries ("trabajo en equipo" == "trabajo equipo")
+STOPWORDS = frozenset(
+    "a al con de del el en es la las lo los o para por que se su sus un una uno y".split()
+)
+
+WORD = re.compile(r"\w+")
+
+Hit = namedtuple("Hit", ["row", "score", "fields"])   # row: Series; fields: [(column, snippet markdown)]
+
+
+# Accented Latin letters -> base letter (one character each, so offsets are kept)
+_UNACCENT = {
+    c: unicodedata.normalize("NFD", chr(c))[0]
+    for c in range(0xC0, 0x250)
+    if len(unicodedata.normalize("NFD", chr(c))) > 1
+}
+
+
+def fold(text):
+    """Lowercase and strip accents."""
+    return str(text).lower().translate(_UNACCENT)
+
+
+@lru_cache(maxsize=65536)
+def stem(word):
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM:
+            return word[:-len(suffix)]
+    return word
+
+
+def terms(text):
+    """Stems of the words of a text, without stopwords."""
+    return [stem(w) for w in WORD.findall(fold(text)) if w not in STOPWORDS]
+
+
+def _escape(text):
+    return re.sub(r"([\\`*_\[\]<>#|~$])", r"\\\1", text)
+
+
+def snippet(text, stems):
+    """Markdown excerpt around the first matching word, with every match in bold."""
+    text = str(text)
+    folded = fold(text)
+    spans = [
+        m.span() for m in WORD.finditer(folded)
+        if m.group() not in STOPWORDS and stem(m.group()) in stems
+    ]
+    if not spans:
+        return None
+    start = max(0, spans[0][0] - SNIPPET_CHARS)
+    end = min(len(text), spans[0][1] + SNIPPET_CHARS)
+    parts, pos = [], start
+    for a, b in spans:
+        if a < start or b > end:
+            continue
+        parts += [_escape(text[pos:a]), f"**{_escape(text[a:b])}**"]
+        pos = b
+    parts.append(_escape(text[pos:end]))
+    return ("…" if start else "") + "".join(parts) + ("…" if end < len(text) else "")
+
+
+def _row_key(row):
+    return tuple(str(row.get(c, "")) for c in ("usuario", "empresa_nombre", "timestamp", "request_id"))
+
+
+class TextIndex:
+    """
+    Inverted index over the SEARCH_FIELDS of a frame's rows.
+    Documents are keyed by row identity (usuario, empresa, timestamp, request_id),
+    so update() with a newer frame only indexes new rows and drops removed ones.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.frame = None
+        self.postings = {}      # stem -> {doc key: term count}
+        self.doc_terms = {}     # doc key -> {stem: count}
+        self.rows = {}          # doc key -> position in self.frame
+        self._lock = threading.Lock()
+
+    def _add(self, key, row):
+        counts = {}
+        for col in SEARCH_FIELDS:
+            for t in terms(row.get(col, "")):
+                counts[t] = counts.get(t, 0) + 1
+        self.doc_terms[key] = counts
+        for t, n in counts.items():
+            self.postings.setdefault(t, {})[key] = n
+
+    def _remove(self, key):
+        for t in self.doc_terms.pop(key, {}):
+            docs = self.postings.get(t, {})
+            docs.pop(key, None)
+            if not docs:
+                self.postings.pop(t, None)
+
+    def update(self, frame, version):
+        """Bring the index in line with frame. Returns (added, removed) row counts."""
+        with self._lock:
+            records = frame.to_dict("records")
+            rows, seen = {}, {}
+            for i, r in enumerate(records):
+                key = _row_key(r)
+                seen[key] = seen.get(key, 0) + 1
+                rows[key + (seen[key],)] = i
+            added = [k for k in rows if k not in self.doc_terms]
+            removed = [k for k in self.doc_terms if k not in rows]
+            for key in removed:
+                self._remove(key)
+            for key in added:
+                self._add(key, records[rows[key]])
+            self.frame, self.rows, self.version = frame, rows, version
+            return len(added), len(removed)
+
+    def search(self, query, limit=50):
+        """Rows containing every query word, best first, with a snippet per matching field."""
+        stems = set(terms(query))
+        if not stems:
+            return []
+        with self._lock:
+            frame, rows = self.frame, self.rows
+            postings = sorted((self.postings.get(t, {}) for t in stems), key=len)  # rarest first
+            matches = set(postings[0])
+            for docs in postings[1:]:
+                matches.intersection_update(docs)
+            scored = sorted(
+                ((sum(self.postings[t][k] for t in stems), k) for k in matches),
+                key=lambda x: (-x[0], rows[x[1]]),
+            )
+        hits = []
+        for score, key in scored[:limit]:
+            row = frame.iloc[rows[key]]
+            fields = [(col, snippet(row[col], stems)) for col in SEARCH_FIELDS if col in frame.columns]
+            hits.append(Hit(row, score, [(c, s) for c, s in fields if s]))
+        return hits
+
+
+_fase2_index = TextIndex()
+
+
+def get_fase2_index():
+    """The process-wide Fase 2 index, updated from the current snapshot if its version changed."""
+    snap = get_snapshot(SHEET_FASE2)
+    if _fase2_index.version != snap.version:
+        _fase2_index.update(snap.frame, snap.version)
+    return _fase2_index
+
+
+def search_fase2(query, limit=50):
+    return get_fase2_index().search(query, limit)